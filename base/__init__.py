@@ -22,20 +22,85 @@ SOFTWARE.
 Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
 """
 
-from .commands import command, Command
-from .checks import check, has_permission, bot_has_permission
-from .bot import Bot
-from .cogs import Cog
-from .converters import Converter, MentionConverter
-from .ctx import Context
-from .exceptions import (FrameworkException, SyntaxError,  # noqa pylint: disable=redefined-builtin
-                         CheckFailed, ConverterError)
-from .holders import CommandHolder
-from .translations import LocaleEngine
+import importlib
+
+# Not imported from typing, which alone would double the import time
+TYPE_CHECKING = False
+if TYPE_CHECKING:  # pragma: no cover
+    # For static analysis only, at runtime names are imported on access
+    from .commands import command, Command
+    from .checks import check, has_permission, bot_has_permission
+    from .bot import Bot
+    from .cogs import Cog
+    from .config import Setting, Schema, SettingsStore, SQLiteBackend
+    from .converters import Converter, MentionConverter
+    from .ctx import Context
+    from .edits import EditTracker
+    from .events import listener
+    from .host import Host
+    from .ipc import IPCClient, IPCServer
+    from .exceptions import (FrameworkException, SyntaxError,  # noqa pylint: disable=redefined-builtin
+                             CheckFailed, ConverterError)
+    from .holders import CommandHolder
+    from .middleware import Middleware, DisabledCommands
+    from .paginator import Paginator
+    from .state import (StateBackend, LocalState, SharedMemoryState,
+                        TCPState, StateServer)
+    from .storage import Storage
+    from .translations import LocaleEngine
+    from .triggers import trigger
+
+# Public names and the submodule defining them. They are imported on first
+# access, so `import base` stays cheap for tools that only need a part.
+_EXPORTS = {
+    "command": "commands", "Command": "commands",
+    "check": "checks", "has_permission": "checks",
+    "bot_has_permission": "checks",
+    "Bot": "bot",
+    "Cog": "cogs",
+    "Setting": "config", "Schema": "config", "SettingsStore": "config",
+    "SQLiteBackend": "config",
+    "Converter": "converters", "MentionConverter": "converters",
+    "Context": "ctx",
+    "EditTracker": "edits",
+    "listener": "events",
+    "Host": "host",
+    "IPCClient": "ipc", "IPCServer": "ipc",
+    "FrameworkException": "exceptions", "SyntaxError": "exceptions",
+    "CheckFailed": "exceptions", "ConverterError": "exceptions",
+    "CommandHolder": "holders",
+    "Middleware": "middleware", "DisabledCommands": "middleware",
+    "Paginator": "paginator",
+    "StateBackend": "state", "LocalState": "state",
+    "SharedMemoryState": "state", "TCPState": "state",
+    "StateServer": "state",
+    "Storage": "storage",
+    "LocaleEngine": "translations",
+    "trigger": "triggers",
+}
 
 __all__ = [
     "command", "Command", "Bot", "Cog", "Converter", "Context", "check",
     "FrameworkException", "SyntaxError", "CommandHolder", "LocaleEngine",
     "CheckFailed", "ConverterError", "MentionConverter",
-    "has_permission", "bot_has_permission"
+    "has_permission", "bot_has_permission", "Paginator", "Middleware",
+    "DisabledCommands", "Setting", "Schema", "SettingsStore", "SQLiteBackend",
+    "Storage", "listener", "EditTracker", "IPCClient", "IPCServer",
+    "StateBackend", "LocalState", "SharedMemoryState", "TCPState",
+    "StateServer", "Host", "trigger"
 ]
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    # Cache it, later lookups don't go through __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
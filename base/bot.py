@@ -22,28 +22,86 @@ SOFTWARE.
 Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
 """
 
+import asyncio
 import importlib
 import inspect
+import logging
+import time
 import traceback
 
 from discord import Client
 
+from .cache import LRUCache
+from .checks import PermissionCache
 from .holders import CommandHolder
 from .exceptions import FrameworkException
 from .commands import command
 from .ctx import Context
+from .events import ListenerIndex
+from .memo import ResponseCache
+from .middleware import MiddlewarePipeline
+from .state import LocalState
+from .triggers import TriggerIndex
+from .translations import LocaleEngine
 
 
 __all__ = ["Bot"]
 
 
-class Bot(Client):
+log = logging.getLogger(__name__)
+
+
+class Bot(Client):  # pylint: disable=too-many-public-methods
     """ Bot class
     ext.commands-like command parser.
+
+    `locale` is either a locale string or a function taking the bot and
+    a message, returning the locale (or an awaitable of it) for the
+    author and guild. Results of the function are cached per guild and
+    user, see `invalidate_locale`.
+
+    `settings` is an optional `SettingsStore`. Guilds can then set their
+    own `prefix` and `locale`, which take precedence over the bot's.
+
+    `storage` is an optional `Storage`, each cog gets a namespace of it.
+
+    `edits` is an optional `EditTracker`, re-running commands when their
+    message is edited.
+
+    `ipc` is the `IPCClient` of the shard worker running the bot, if it
+    was started by the launcher.
+
+    `state` is a `StateBackend` for state shared between processes,
+    `LocalState` by default. Trigger cooldowns are kept in it.
+
+    `translations` is a `LocaleEngine` to use instead of loading
+    `translation_file`, to share one between bots. Its catalogs can give
+    commands localized names, see `CommandHolder`. `host` is the `Host`
+    running the bot, if any.
     """
     def __init__(self, prefix=None, *args, **kwargs):
+        translation_file = kwargs.pop("translation_file", None)
+        self.settings = kwargs.pop("settings", None)
+        self.storage = kwargs.pop("storage", None)
+        self.edits = kwargs.pop("edits", None)
+        self.ipc = kwargs.pop("ipc", None)
+        self.state = kwargs.pop("state", None) or LocalState()
+        self.locale = kwargs.pop("locale", None) or "en"
         self.prefix = prefix or "!"
-        self._commands = CommandHolder()
+        self.translations = kwargs.pop("translations", None)
+        if self.translations is None and translation_file is not None:
+            self.translations = LocaleEngine(translation_file)
+        self.host = None
+        self._locale_cache = LRUCache(kwargs.pop("locale_cache_size", 1024))
+        self.permissions = PermissionCache()
+        self.pipeline = MiddlewarePipeline()
+        self.listeners = ListenerIndex()
+        self.triggers = TriggerIndex()
+        self.responses = ResponseCache(
+            kwargs.pop("response_cache_size", 1024))
+        if self.edits is not None:
+            self.add_listener(self._redispatch, "message_edit")
+        self._commands = CommandHolder(self.translations)
         self.command_list = self._commands.commands
         self._cogs = {}
         super().__init__(*args, **kwargs)
@@ -78,24 +136,83 @@ class Bot(Client):
 
     def add_command(self, _command):
         """ Add a command dynamically """
-        if _command.name in self._commands.commands:
+        if _command.name in self._commands:
             raise FrameworkException("Command already registered!")
 
         self._commands.add_command(_command)
 
+    def get_command(self, name, locale=None):
+        """ Returns the command invoked by `name`, or None.
+        With a `locale`, its localized command names work too """
+        return self._commands.get_command(name, locale) or None
+
+    def add_middleware(self, middleware, stage=None):
+        """ Add a middleware function to a stage, or a `Middleware`
+        instance to all the stages it defines """
+        self.pipeline.add(middleware, stage)
+
+    def add_listener(self, func, event):
+        """ Add a coroutine listening to a gateway event """
+        self.listeners.add(event, func)
+
+    def remove_listener(self, func):
+        """ Remove a listener from all events """
+        self.listeners.remove(lambda f: f == func)
+
+    def dispatch(self, event, *args, **kwargs):  # noqa pylint: disable=arguments-differ
+        """ Runs `on_<event>` methods, then each listener of the event in
+        its own task """
+        super().dispatch(event, *args, **kwargs)
+
+        listeners = self.listeners.get(event)
+        if listeners is None:
+            return
+
+        for func in listeners:
+            asyncio.ensure_future(self.listeners.run(
+                func, event, args, kwargs, self.listener_error))
+
+    def process_triggers(self, message):
+        """ Runs the cog triggers matching a message, each in its own
+        task. Messages of bots never trigger """
+        if message.author.bot or not self.triggers.triggers:
+            return
+
+        for trig, match in self.triggers.scan(message):
+            asyncio.ensure_future(self.triggers.run(
+                trig, message, match, self.state, self.listener_error))
+
+    def remove_middleware(self, middleware):
+        """ Remove a middleware function or instance from all stages """
+        self.pipeline.remove(middleware)
+
+    def middleware(self, stage):
+        """ Register a middleware function for a stage, used as decorator """
+        def decorator(func):  # pylint: disable=missing-docstring
+            self.add_middleware(func, stage)
+            return func
+        return decorator
+
     def remove_command(self, command_name):
         """ Remove a command dynamically """
-        if command_name in self._commands.commands:
+        if command_name in self._commands:
             self._commands.remove_command(command_name)
 
-    async def on_message(self, message):
-        """ Redirects on_message to process_commands
-        If you decide to override this,
-        make sure to call process_commands """
-        await self.process_commands(message)
+    async def guild_settings(self, guild):
+        """ Returns the settings dict of a guild, or None without a
+        settings store or outside of guilds """
+        if self.settings is None or guild is None:
+            return None
+
+        return (self.settings.get_cached(guild.id) or
+                await self.settings.load(guild.id))
+
+    async def get_prefix(self, message):
+        """ Returns the prefixes to use for a message """
+        values = await self.guild_settings(message.guild)
+        if values and values["prefix"]:
+            return [values["prefix"]]
 
-    async def process_commands(self, message):
-        """ Does command parsing """
         if inspect.isfunction(self.prefix):
             prefix = self.prefix(self, message)
 
@@ -108,25 +225,112 @@ class Bot(Client):
         if isinstance(prefix, str):
             prefix = [prefix]
 
-        if not any(message.content.startswith(p) for p in prefix):
-            return False
+        return prefix
 
-        for p in prefix:
-            # Check for any prefix
-            if message.content.startswith(p):
-                content = message.content[len(p):]
-                break
+    async def get_locale(self, message):
+        """ Returns the locale to use for a message """
+        values = await self.guild_settings(message.guild)
+        if values and values["locale"]:
+            return values["locale"]
 
-        else:
-            return False
+        if isinstance(self.locale, str):
+            return self.locale
+
+        key = (getattr(message.guild, "id", None), message.author.id)
+        locale = self._locale_cache.get(key)
+
+        if locale is None:
+            locale = self.locale(self, message)
+            if inspect.isawaitable(locale):
+                locale = await locale
+
+            self._locale_cache.set(key, locale)
+
+        return locale
+
+    def invalidate_locale(self, guild=None, user=None):
+        """ Forget cached locales of a guild and/or user id,
+        or of everyone if neither is given """
+        for key in self._locale_cache:
+            if ((guild is None or key[0] == guild) and
+                    (user is None or key[1] == user)):
+                self._locale_cache.pop(key)
+
+    # Keep cached permissions in sync, see `PermissionCache`.
+    # If you override these, make sure to call super()
+
+    async def on_guild_update(self, before, after):  # noqa pylint: disable=unused-argument
+        self.permissions.invalidate(guild=after.id)
+
+    async def on_guild_role_create(self, role):
+        self.permissions.invalidate(guild=role.guild.id)
+
+    async def on_guild_role_update(self, before, after):  # noqa pylint: disable=unused-argument
+        self.permissions.invalidate(guild=after.guild.id)
+
+    async def on_guild_role_delete(self, role):
+        self.permissions.invalidate(guild=role.guild.id)
+
+    async def on_guild_channel_update(self, before, after):  # noqa pylint: disable=unused-argument
+        self.permissions.invalidate(channel=after.id)
+
+    async def on_guild_channel_delete(self, channel):
+        self.permissions.invalidate(channel=channel.id)
+
+    async def on_member_update(self, before, after):
+        if before.roles != after.roles:
+            self.permissions.invalidate(guild=after.guild.id,
+                                        member=after.id)
+
+    async def on_member_remove(self, member):
+        self.permissions.invalidate(guild=member.guild.id, member=member.id)
+
+    async def on_message(self, message):
+        """ Redirects on_message to process_commands
+        If you decide to override this,
+        make sure to call process_commands """
+        await self.process_commands(message)
+
+    async def _redispatch(self, before, after):
+        await self.edits.on_message_edit(self, before, after)
+
+    async def process_commands(self, message, prefix=None, triggers=True):
+        """ Does command parsing
+        `prefix` is tried before resolving the prefixes, for messages
+        known to have used it. Messages that aren't commands run the cog
+        triggers, unless `triggers` is false """
+        stage = self.pipeline.pre_parse
+        if stage is not None:
+            result = stage(message)
+            if result is False or (result is not True and
+                                   await result is False):
+                return False
+
+        if prefix is None or not message.content.startswith(prefix):
+            for p in await self.get_prefix(message):
+                # Check for any prefix
+                if message.content.startswith(p):
+                    prefix = p
+                    break
+
+            else:
+                if triggers:
+                    self.process_triggers(message)
+                return False
+
+        content = message.content[len(prefix):]
 
         # TODO: Custom parsing for quoted content
         args = [_ for _ in content.split(" ")]
 
-        _command = self._commands.get_command(args[0])
+        # Localized names are looked up in the table of the locale
+        locale = await self.get_locale(message)
+        _command = self._commands.get_command(args[0], locale)
 
         if _command is False:
             # Command not found
+            if triggers:
+                self.process_triggers(message)
             return False
 
         # Build the context
@@ -139,14 +343,67 @@ class Bot(Client):
             bot=self,
             invoker=args[0],
             args=args[1:],
-            send=message.channel.send
+            send=(message.channel.send if self.edits is None else
+                  self.edits.track(message, prefix, message.channel.send)),
+            locale=locale
         )
 
+        stage = self.pipeline.post_lookup
+        if stage is not None:
+            result = stage(context)
+            if result is False or (result is not True and
+                                   await result is False):
+                return False
+
+        error = None
+        start = time.perf_counter()
         try:
             await _command.invoke(context)
 
         except Exception as e:  # noqa pylint: disable=broad-except
+            error = e
+            context.update({"elapsed": time.perf_counter() - start})
+            log.error("Command %s failed", _command.name, exc_info=e,
+                      extra={"fields": self._log_fields(context)})
             await self.command_error(context, e)
 
+        else:
+            context.update({"elapsed": time.perf_counter() - start})
+            if log.isEnabledFor(logging.INFO):
+                log.info("Command %s", _command.name,
+                         extra={"fields": self._log_fields(context)})
+
+        stage = self.pipeline.post_invoke
+        if stage is not None:
+            result = stage(context, error)
+            if result is not True and result is not False:
+                await result
+
+    @staticmethod
+    def _log_fields(ctx):
+        return {
+            "command": ctx.command.name,
+            "guild": ctx.guild.id if ctx.guild else None,
+            "channel": ctx.channel.id,
+            "user": ctx.author.id,
+            "latency_ms": round(ctx.elapsed * 1000, 2),
+        }
+
+    async def close(self):
+        """ Flush settings and storage before disconnecting """
+        if self.settings is not None:
+            await self.settings.close()
+
+        if self.storage is not None:
+            await self.storage.close()
+
+        await super().close()
+
     async def command_error(self, ctx, e):  # pylint: disable=unused-argument
         await ctx.send("```py\n{}```".format(traceback.format_exc()))
+
+    async def listener_error(self, event, func, e):  # noqa pylint: disable=unused-argument
+        """ Called when a listener or trigger raises, override to report
+        errors """
+        log.error("Listener %s failed", func.__qualname__, exc_info=e,
+                  extra={"fields": {"event": event}})
@@ -0,0 +1,97 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+
+import time
+from collections import OrderedDict
+
+
+__all__ = ["LRUCache"]
+
+
+_MISSING = object()
+
+
+class LRUCache:
+    """ Mapping with a fixed size that evicts the least recently used
+    entry once `maxsize` entries are stored.
+
+    With a `ttl` in seconds, entries also expire that long after they
+    were set. Expired entries are dropped when they are looked up, or
+    all at once by `expire`.
+    """
+    def __init__(self, maxsize=128, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __iter__(self):
+        return iter(list(self._data))
+
+    def get(self, key, default=None):
+        """ Returns the value for `key` and marks it as recently used """
+        item = self._data.get(key, _MISSING)
+        if item is _MISSING:
+            return default
+
+        value, expires = item
+        if expires is not None and expires <= time.monotonic():
+            del self._data[key]
+            return default
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value, ttl=None):
+        """ Stores `value`, evicting the oldest entry if the cache is full.
+        `ttl` overrides the cache's ttl for this entry """
+        ttl = ttl or self.ttl
+        expires = time.monotonic() + ttl if ttl is not None else None
+        self._data[key] = (value, expires)
+        self._data.move_to_end(key)
+
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        """ Removes `key` and returns its value """
+        item = self._data.pop(key, _MISSING)
+        return default if item is _MISSING else item[0]
+
+    def expire(self):
+        """ Drops every expired entry """
+        now = time.monotonic()
+        for key, (_, expires) in list(self._data.items()):
+            if expires is not None and expires <= now:
+                del self._data[key]
+
+    def clear(self):
+        """ Drops every entry """
+        self._data.clear()
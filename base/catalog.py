@@ -0,0 +1,278 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from collections.abc import Mapping
+
+from .exceptions import SyntaxError  # noqa: ignore=E402 pylint: disable=redefined-builtin
+
+
+__all__ = ["Catalog", "compile_catalog", "write_catalog"]
+
+
+# Layout, all little endian:
+#   header | locale records | entry records | string table
+# Entries of a locale are sorted by their UTF-8 key so they can be binary
+# searched in place. Strings are stored once no matter how often they occur.
+MAGIC = b"CLCT"
+VERSION = 2
+# magic, version, source mtime/size, locale count, entry count, string
+# table size
+_HEADER = struct.Struct("<4sHxxqQIII4x")
+# name offset/length, first entry, entry count
+_LOCALE = struct.Struct("<IIII")
+# key offset/length, value offset/length, kind
+_ENTRY = struct.Struct("<IIIIB3x")
+
+_STRING, _PLURAL = 0, 1
+# Plural forms are stored as one string: category \x1f text \x1e ...
+_FORM_SEP, _CAT_SEP = "\x1e", "\x1f"
+
+
+def _source_stat(source):
+    st = os.stat(source)
+    return st.st_mtime_ns, st.st_size
+
+
+class _StringTable:
+    """ Deduplicated UTF-8 strings, addressed by offset and length """
+    def __init__(self):
+        self.data = bytearray()
+        self._offsets = {}
+
+    def intern(self, text):
+        raw = text.encode("utf-8")
+        if raw not in self._offsets:
+            self._offsets[raw] = len(self.data)
+            self.data.extend(raw)
+        return self._offsets[raw], len(raw)
+
+
+def _encode(value, locale, key):
+    if isinstance(value, dict):
+        return _FORM_SEP.join(f"{cat}{_CAT_SEP}{text}"
+                              for cat, text in value.items()), _PLURAL
+
+    if not isinstance(value, str):
+        raise SyntaxError(f"Invalid translation for {locale}/{key}")
+
+    return value, _STRING
+
+
+def write_catalog(data, target, source_stat=(0, 0)):
+    """ Writes translation data, as loaded from JSON, to a binary catalog.
+    `source_stat` is the (mtime_ns, size) of the file it was loaded from.
+    """
+    strings = _StringTable()
+    locales = []
+    entries = []
+
+    for locale in sorted(data):
+        items = sorted((key.encode("utf-8"), key, value)
+                       for key, value in data[locale].items())
+        locales.append((*strings.intern(locale), len(entries), len(items)))
+
+        for _, key, value in items:
+            value, kind = _encode(value, locale, key)
+            entries.append((*strings.intern(key), *strings.intern(value),
+                            kind))
+
+    records = b"".join([_HEADER.pack(MAGIC, VERSION, *source_stat,
+                                     len(locales), len(entries),
+                                     len(strings.data))] +
+                       [_LOCALE.pack(*record) for record in locales] +
+                       [_ENTRY.pack(*record) for record in entries])
+
+    # A file of our own, other processes may be writing the catalog too
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target) or ".",
+                               prefix=f"{os.path.basename(target)}.",
+                               suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(records + strings.data)
+
+        # Swap in atomically so running bots never map a half written file
+        os.replace(tmp, target)
+
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def compile_catalog(source, target=None):
+    """ Compiles a JSON translation file into a binary catalog,
+    by default next to it as `<source>.catalog` """
+    try:
+        with open(source, encoding="utf-8") as f:
+            data = json.load(f)
+
+    except json.JSONDecodeError as e:
+        raise SyntaxError("Invalid JSON in translation file!") from e
+
+    target = target or f"{source}.catalog"
+    write_catalog(data, target, _source_stat(source))
+    return target
+
+
+class _LocaleView(Mapping):
+    """ The messages of one locale, read from the catalog on access """
+    def __init__(self, catalog, first, count):
+        self.catalog = catalog
+        self.first = first
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        catalog = self.catalog
+        for i in range(self.first, self.first + self.count):
+            key_off, key_len, *_ = catalog._entry(i)
+            yield catalog._string(key_off, key_len)
+
+    def _value(self, val_off, val_len, kind):
+        value = self.catalog._string(val_off, val_len)
+        if kind == _PLURAL:
+            value = dict(form.split(_CAT_SEP, 1)
+                         for form in value.split(_FORM_SEP))
+        return value
+
+    def _lower_bound(self, raw):
+        # Index of the first entry whose key isn't below `raw`
+        catalog = self.catalog
+        lo, hi = self.first, self.first + self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            key_off, key_len, *_ = catalog._entry(mid)
+            if catalog._bytes(key_off, key_len) < raw:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def __getitem__(self, key):
+        catalog = self.catalog
+        raw = key.encode("utf-8")
+        index = self._lower_bound(raw)
+
+        if index < self.first + self.count:
+            key_off, key_len, val_off, val_len, kind = catalog._entry(index)
+            if catalog._bytes(key_off, key_len) == raw:
+                return self._value(val_off, val_len, kind)
+
+        raise KeyError(key)
+
+    def prefixed(self, prefix):
+        """ Yields the `(key, value)` pairs whose key starts with
+        `prefix`, decoding only those """
+        catalog = self.catalog
+        raw = prefix.encode("utf-8")
+        for i in range(self._lower_bound(raw), self.first + self.count):
+            key_off, key_len, val_off, val_len, kind = catalog._entry(i)
+            key = catalog._bytes(key_off, key_len)
+            if not key.startswith(raw):
+                return
+            yield (key.decode("utf-8"),
+                   self._value(val_off, val_len, kind))
+
+
+class Catalog(Mapping):
+    """ Memory mapped binary translation catalog.
+    Behaves like the dict loaded from the JSON file, but only the
+    messages that are looked up are ever decoded.
+    """
+    def __init__(self, filename):
+        self.filename = filename
+
+        with open(filename, "rb") as f:
+            # An empty file can't be mapped at all
+            if os.fstat(f.fileno()).st_size < _HEADER.size:
+                raise SyntaxError(f"{filename} is not a translation catalog!")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, version, mtime, size, n_locales, n_entries,
+         strings_size) = _HEADER.unpack_from(self._map, 0)
+        self._entries_at = _HEADER.size + n_locales * _LOCALE.size
+        self._strings_at = self._entries_at + n_entries * _ENTRY.size
+
+        # A truncated catalog is shorter than its tables
+        if (magic != MAGIC or version != VERSION or
+                len(self._map) != self._strings_at + strings_size):
+            self._map.close()
+            raise SyntaxError(f"{filename} is not a translation catalog!")
+
+        self.source_stat = (mtime, size)
+
+        self._locales = {}
+        for i in range(n_locales):
+            name_off, name_len, first, count = _LOCALE.unpack_from(
+                self._map, _HEADER.size + i * _LOCALE.size)
+            self._locales[self._string(name_off, name_len)] = _LocaleView(
+                self, first, count)
+
+    def __len__(self):
+        return len(self._locales)
+
+    def __iter__(self):
+        return iter(self._locales)
+
+    def __getitem__(self, locale):
+        return self._locales[locale]
+
+    def _entry(self, index):
+        return _ENTRY.unpack_from(self._map,
+                                  self._entries_at + index * _ENTRY.size)
+
+    def _bytes(self, offset, length):
+        start = self._strings_at + offset
+        return self._map[start:start + length]
+
+    def _string(self, offset, length):
+        return self._bytes(offset, length).decode("utf-8")
+
+    def is_stale(self, source):
+        """ Returns true if `source` changed since the catalog was built """
+        try:
+            return _source_stat(source) != self.source_stat
+
+        except OSError:
+            # Only the catalog was shipped
+            return False
+
+    def close(self):
+        """ Unmaps the file, the catalog can't be read anymore """
+        self._map.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Usage: python -m base.catalog <translations.json> [output]")
+
+    print(compile_catalog(*sys.argv[1:]))
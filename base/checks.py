@@ -0,0 +1,196 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+
+import asyncio
+import inspect
+import itertools
+
+from .cache import LRUCache
+from .exceptions import CheckFailed
+
+
+__all__ = ["check", "has_permission", "bot_has_permission",
+           "run_checks", "PermissionCache"]
+
+
+def check(predicate):
+    """ Adds a check to a command, put it above @command().
+
+    `predicate` takes the context and returns whether the command may
+    run. It may be a coroutine function, async checks of a command are
+    run concurrently. It may also raise CheckFailed with a reason.
+    """
+    def decorator(comm):  # pylint: disable=missing-docstring
+        comm.checks.append(predicate)
+        return comm
+    return decorator
+
+
+def _name(predicate):
+    return getattr(predicate, "__qualname__", repr(predicate))
+
+
+def _close(pending):
+    """ Close coroutines of async checks that won't be awaited """
+    for _, awaitable in pending:
+        if inspect.iscoroutine(awaitable):
+            awaitable.close()
+
+
+async def _expect(predicate, awaitable):
+    try:
+        result = await awaitable
+
+    except CheckFailed:
+        raise
+
+    except Exception as e:
+        raise CheckFailed(f"Check {_name(predicate)} errored: {e!r}") from e
+
+    if not result:
+        raise CheckFailed(f"Check {_name(predicate)} failed")
+
+
+async def run_checks(checks, ctx):
+    """ Runs checks on the context, raising CheckFailed on the first
+    one that fails.
+
+    Sync checks run first, in order. Async checks then run concurrently,
+    and the rest are cancelled as soon as one of them fails.
+    """
+    pending = []
+
+    for predicate in checks:
+        try:
+            result = predicate(ctx)
+
+        except CheckFailed:
+            _close(pending)
+            raise
+
+        except Exception as e:
+            _close(pending)
+            raise CheckFailed(
+                f"Check {_name(predicate)} errored: {e!r}") from e
+
+        if inspect.isawaitable(result):
+            pending.append((predicate, result))
+
+        elif not result:
+            _close(pending)
+            raise CheckFailed(f"Check {_name(predicate)} failed")
+
+    if len(pending) == 1:
+        await _expect(*pending[0])
+
+    elif pending:
+        tasks = [asyncio.ensure_future(_expect(*p)) for p in pending]
+        try:
+            await asyncio.gather(*tasks)
+
+        finally:
+            for task in tasks:
+                if task.done() and not task.cancelled():
+                    task.exception()  # Don't warn about the other failures
+                task.cancel()
+
+
+class PermissionCache:
+    """ Caches computed channel permissions per (guild, channel, member).
+
+    Invalidating a guild, channel or member is O(1): it stamps the object
+    with a counter, and entries computed before the stamp are recomputed
+    on their next lookup. Stale entries are evicted like any other.
+    """
+    def __init__(self, maxsize=4096):
+        self._cache = LRUCache(maxsize)
+        self._clock = itertools.count(1)
+        self._stamps = {}
+
+    def get(self, channel, member):
+        """ Returns `channel.permissions_for(member)`, cached """
+        guild = getattr(channel, "guild", None)
+        if guild is None:
+            # DMs, nothing to compute
+            return channel.permissions_for(member)
+
+        key = (guild.id, channel.id, member.id)
+        entry = self._cache.get(key)
+
+        if entry is not None:
+            stamps = self._stamps
+            if entry[1] > max(stamps.get(guild.id, 0),
+                              stamps.get(channel.id, 0),
+                              stamps.get((guild.id, member.id), 0)):
+                return entry[0]
+
+        permissions = channel.permissions_for(member)
+        self._cache.set(key, (permissions, next(self._clock)))
+        return permissions
+
+    def invalidate(self, guild=None, channel=None, member=None):
+        """ Forget permissions in a guild, in a channel, or of a member of
+        a guild, all by id. Member invalidation needs the guild too. """
+        if len(self._stamps) > self._cache.maxsize:
+            # Don't let stamps pile up, start over instead
+            self.clear()
+
+        stamp = next(self._clock)
+        if member is not None:
+            self._stamps[(guild, member)] = stamp
+        elif channel is not None:
+            self._stamps[channel] = stamp
+        elif guild is not None:
+            self._stamps[guild] = stamp
+
+    def clear(self):
+        self._cache.clear()
+        self._stamps.clear()
+
+
+def _has(permissions, perms):
+    missing = [name for name, value in perms.items()
+               if getattr(permissions, name) != value]
+
+    if missing:
+        raise CheckFailed(f"Missing permissions: {', '.join(missing)}")
+
+    return True
+
+
+def has_permission(**perms):
+    """ Check that the author has the given permissions in the channel,
+    e.g. `@has_permission(ban_members=True)` """
+    def predicate(ctx):
+        return _has(ctx.bot.permissions.get(ctx.channel, ctx.author), perms)
+    return check(predicate)
+
+
+def bot_has_permission(**perms):
+    """ Check that the bot has the given permissions in the channel """
+    def predicate(ctx):
+        me = ctx.guild.me if ctx.guild is not None else ctx.bot.user
+        return _has(ctx.bot.permissions.get(ctx.channel, me), perms)
+    return check(predicate)
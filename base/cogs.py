@@ -23,6 +23,7 @@ Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
 """
 
 
+import copy
 import inspect
 
 from .commands import Command
@@ -32,19 +33,41 @@ __all__ = ["Cog"]
 
 
 class Cog:
-    """ Cogs must inherit from this """
+    """ Cogs must inherit from this
+
+    `storage` is the cog's namespace of the bot's storage, named after
+    the cog class, or None if the bot has no storage.
+    """
 
     def __init__(self, bot):
         self.bot = bot
+        self.storage = (bot.storage.namespace(type(self).__name__.lower())
+                        if bot.storage is not None else None)
 
-        # Register all the cog's commands
-        for _, comm in inspect.getmembers(
+        # Register all the cog's commands, copied so that several bots
+        # in one process each have commands bound to their own cog
+        for name, comm in inspect.getmembers(
                 self, lambda v: isinstance(v, Command)):
+            comm = copy.copy(comm)
+            # Coalesced invocations must not be followed across bots
+            comm._inflight = {}
+            setattr(self, name, comm)
             comm.set_cog(self)
             bot.add_command(comm)
 
+        # Index the cog's listeners and triggers, all at once
+        bot.listeners.add_owner(self)
+        bot.triggers.add_owner(self)
+
     def _unload(self):
         # Unregister all the cog's commands
         for _, comm in inspect.getmembers(
                 self, lambda v: isinstance(v, Command)):
-            self.bot.remove_command(comm)
+            self.bot.remove_command(comm.name)
+
+        self.bot.listeners.remove_owner(self)
+        self.bot.triggers.remove_owner(self)
+        self.cog_unload()
+
+    def cog_unload(self):
+        """ Called when the cog is unloaded, override to clean up """
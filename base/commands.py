@@ -22,17 +22,24 @@ SOFTWARE.
 Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
 """
 
+import asyncio
 import inspect
+import logging
 
+from .checks import run_checks
 from .holders import CommandHolder
 from .converters import Converter
 from .translations import LocaleEngine
-from .exceptions import CheckFailed, FrameworkException
+from .exceptions import FrameworkException
+from .memo import Recorder, make_key
 
 
 __all__ = ["command", "Command"]
 
 
+log = logging.getLogger(__name__)
+
+
 def command(bot=None, **kwargs):
     """ Command creation decorator when not using @bot.command """
     def decorator(func):  # pylint: disable=missing-docstring
@@ -40,8 +47,22 @@ def command(bot=None, **kwargs):
     return decorator
 
 
-class Command:
-    """ Command dataclass """
+class Command:  # pylint: disable=too-many-instance-attributes
+    """ Command dataclass
+
+    `cache` makes the command's responses cached for that many seconds,
+    for commands that only send and give the same output for the same
+    arguments. Responses are shared by the `scope` ("global", "guild",
+    "channel" or "user", default "guild") and the converted arguments,
+    or by the command and what `key(ctx, kwargs)` returns. After
+    expiring they are served for `stale` more seconds (default `cache`)
+    while the command runs again in the background. `tags` name groups
+    of responses to drop with `bot.responses.invalidate(tag=...)`.
+
+    `coalesce` makes invocations with the same key that arrive while the
+    command runs wait for it, and send its responses instead of running
+    the command themselves. If it fails, they stop silently.
+    """
     def __init__(self, **kwargs):
         func = kwargs['func']
         self.func = func
@@ -50,25 +71,25 @@ class Command:
         self.aliases = kwargs.get("aliases") or []
         self.pass_ctx = kwargs.get("pass_context", True)
         self.subcommands = CommandHolder()
+        self.translation = None
         if "translation_file" in kwargs:
             self.translation = LocaleEngine(kwargs.get("translation_file"))
         if kwargs.get("bot") is not None:
             kwargs['bot'].add_command(self)
         self.checks = []
         self.cog = None
+        self.cache = kwargs.get("cache")
+        self.cache_key = kwargs.get("key")
+        self.cache_scope = kwargs.get("scope", "guild")
+        self.cache_stale = kwargs.get("stale", self.cache)
+        self.cache_tags = (self.name, *kwargs.get("tags", ()))
+        self.coalesce = kwargs.get("coalesce", False)
+        self._inflight = {}
 
     def set_cog(self, cog):
         self.cog = cog
 
-    def _do_check(self, _check, ctx):  # pylint: disable=no-self-use
-        """ Run a check on the ctx """
-        try:
-            assert _check(ctx)
-
-        except Exception as e:  # noqa pylint: disable=broad-except
-            raise e from CheckFailed
-
-    async def invoke(self, context):  # pylint: disable=too-many-branches
+    async def invoke(self, context):
         """ Run the command or optionally subcommands """
         args = context.args
 
@@ -79,8 +100,105 @@ class Command:
             return await comm.invoke(context)
 
         # Run checks
-        for _check in self.checks:
-            self._do_check(_check, context)
+        if self.checks:
+            await run_checks(self.checks, context)
+
+        if self.cache is not None or self.coalesce:
+            return await self._invoke_shared(context)
+
+        # Run the function using the arguments collected
+        return await self.func(**self.convert(context))
+
+    async def _invoke_shared(self, context):
+        """ Invoke sharing the response with other invocations of the same
+        key, cached or coalesced """
+        recorder = Recorder(context.send)
+        ctx = context.copy(send=recorder)
+        kwarg_data = self.convert(ctx)
+        # Responses of all commands share one cache, keep them apart
+        key = ((self.name, self.cache_key(ctx, kwarg_data)) if self.cache_key
+               else make_key(self, ctx, kwarg_data))
+
+        if self.cache is not None:
+            responses = context.bot.responses
+            entry = responses.get(key)
+            if entry is not None:
+                responses.record(self.name, True, entry.is_stale)
+                if entry.is_stale and not entry.refreshing:
+                    entry.refreshing = True
+                    recorder.forward = False
+                    asyncio.ensure_future(self._refresh(
+                        responses, key, entry, recorder, kwarg_data))
+
+                return await self._replay(context, entry.sends)
+
+            responses.record(self.name, False)
+
+        if not self.coalesce:
+            return await self._run(context, key, recorder, kwarg_data)
+
+        flight = self._inflight.get(key)
+        if flight is not None:
+            try:
+                sends = await asyncio.shield(flight)
+
+            except asyncio.CancelledError:
+                if flight.cancelled():
+                    # The leader failed, and reported the error
+                    return None
+                raise
+
+            if sends is None:
+                # The leader sent files, which can't be sent again
+                return await self._run(context, key, recorder, kwarg_data)
+            return await self._replay(context, sends)
+
+        flight = asyncio.get_event_loop().create_future()
+        self._inflight[key] = flight
+        try:
+            await self._run(context, key, recorder, kwarg_data)
+
+        except BaseException:
+            flight.cancel()
+            raise
+
+        else:
+            flight.set_result(recorder.sends if recorder.cacheable else None)
+
+        finally:
+            del self._inflight[key]
+
+    async def _run(self, context, key, recorder, kwarg_data):
+        await self.func(**kwarg_data)
+        if self.cache is not None and recorder.cacheable:
+            context.bot.responses.set(key, recorder.sends, self.cache,
+                                      self.cache_stale, self.cache_tags)
+
+    @staticmethod
+    async def _replay(context, sends):
+        for content, kwargs in sends:
+            await context.send(content, **kwargs)
+
+    async def _refresh(self, responses, key, entry, recorder, kwarg_data):  # noqa pylint: disable=too-many-arguments
+        """ Runs the command again without sending, to update a stale
+        response """
+        try:
+            await self.func(**kwarg_data)
+
+        except Exception:  # noqa pylint: disable=broad-except
+            entry.refreshing = False
+            log.exception("Refreshing the cached response of %s failed",
+                          self.name)
+            return
+
+        if recorder.cacheable:
+            responses.set(key, recorder.sends, self.cache, self.cache_stale,
+                          self.cache_tags)
+
+    def convert(self, context):  # pylint: disable=too-many-branches
+        """ Returns the keyword arguments to call the function with,
+        converted from the context's arguments """
+        args = context.args
 
         # Get the function arguments
         func_args = self.sig.parameters.values()
@@ -135,8 +253,7 @@ class Command:
                     break
                 raise FrameworkException(f"Missing argument: {arg.name}!")
 
-        # Run the function using the arguments collected
-        await self.func(**kwarg_data)
+        return kwarg_data
 
     @property
     def has_subcommands(self):  # pylint: disable=unused-variable
@@ -0,0 +1,266 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+
+import asyncio
+import copy
+import json
+import logging
+
+from .cache import LRUCache
+from .db import ConnectionPool
+from .exceptions import FrameworkException
+
+
+__all__ = ["Setting", "Schema", "SettingsStore", "SQLiteBackend",
+           "DEFAULT_SCHEMA"]
+
+
+log = logging.getLogger(__name__)
+
+
+_MISSING = object()
+
+
+class Setting:
+    """ A typed per-guild setting, stored as JSON """
+    def __init__(self, name, typ, default=None):
+        self.name = name
+        self.typ = typ
+        self.default = default
+
+    def validate(self, value):
+        if value is None or isinstance(value, self.typ):
+            return value
+
+        try:
+            return self.typ(value)
+
+        except (TypeError, ValueError) as e:
+            raise FrameworkException(
+                f"Invalid value for {self.name}: {value!r}") from e
+
+    def encode(self, value):
+        return None if value is None else json.dumps(value)
+
+    def decode(self, text):
+        return self.validate(json.loads(text))
+
+
+class Schema:
+    """ The settings a guild can have """
+    def __init__(self, *settings):
+        self.settings = {s.name: s for s in settings}
+
+    def __getitem__(self, name):
+        try:
+            return self.settings[name]
+
+        except KeyError:
+            raise FrameworkException(f"Unknown setting {name}!") from None
+
+    def defaults(self):
+        return {name: copy.copy(s.default)
+                for name, s in self.settings.items()}
+
+
+DEFAULT_SCHEMA = Schema(
+    Setting("prefix", str),
+    Setting("locale", str),
+    Setting("disabled_commands", list, []),
+    Setting("mod_roles", list, [])
+)
+
+
+class SQLiteBackend:
+    """ Keeps settings in a `settings(guild_id, key, value)` table """
+    def __init__(self, path, pool_size=2):
+        self.pool = ConnectionPool(path, pool_size)
+        self._created = False
+
+    async def _ensure_table(self):
+        if not self._created:
+            await self.pool.run(lambda conn: conn.execute(
+                "CREATE TABLE IF NOT EXISTS settings ("
+                "guild_id INTEGER, key TEXT, value TEXT, "
+                "PRIMARY KEY (guild_id, key))"))
+            self._created = True
+
+    async def load(self, guild_id):
+        """ Returns a dict of a guild's encoded settings """
+        await self._ensure_table()
+        rows = await self.pool.run(lambda conn: conn.execute(
+            "SELECT key, value FROM settings WHERE guild_id = ?",
+            (guild_id,)).fetchall())
+        return dict(rows)
+
+    async def write(self, changes):
+        """ Writes (guild_id, key, encoded value or None) rows in one
+        transaction, None deletes the setting """
+        await self._ensure_table()
+
+        def write(conn):
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO settings VALUES (?, ?, ?)",
+                    [c for c in changes if c[2] is not None])
+                conn.executemany(
+                    "DELETE FROM settings WHERE guild_id = ? AND key = ?",
+                    [c[:2] for c in changes if c[2] is None])
+
+        await self.pool.run(write)
+
+    async def close(self):
+        # Waits for running queries, off the event loop
+        await asyncio.get_event_loop().run_in_executor(None, self.pool.close)
+
+
+class SettingsStore:
+    """ Per-guild settings with an in-memory read-through cache.
+
+    Up to `cache_size` guilds are kept in memory. Writes go to the cache
+    right away and are written to the backend in batches, every
+    `flush_interval` seconds and on `close`.
+
+    In the dispatch path, use `get_cached` and only `await load` when a
+    guild isn't cached yet, the backend runs on worker threads.
+    """
+    def __init__(self, backend, schema=DEFAULT_SCHEMA, cache_size=10000,
+                 flush_interval=5):
+        self.backend = backend
+        self.schema = schema
+        self.flush_interval = flush_interval
+        self._cache = LRUCache(cache_size)
+        self._loading = {}
+        self._dirty = {}
+        self._flushing = {}
+        # Flushes finished, successful or not
+        self._flushes = 0
+        self._flusher = None
+
+    def get_cached(self, guild_id, key=None):
+        """ Returns a guild's settings dict, or one setting of it, if the
+        guild is cached, else None. Never waits. """
+        values = self._cache.get(guild_id)
+        if values is None or key is None:
+            return values
+        return values[key]
+
+    async def load(self, guild_id):
+        """ Returns a guild's settings dict, loading it if needed.
+        Don't mutate it, use `set`. """
+        values = self._cache.get(guild_id)
+        if values is not None:
+            return values
+
+        # Concurrent messages from a cold guild share one query
+        task = self._loading.get(guild_id)
+        if task is None:
+            task = asyncio.ensure_future(self._load(guild_id))
+            self._loading[guild_id] = task
+            task.add_done_callback(
+                lambda _: self._loading.pop(guild_id, None))
+
+        return await asyncio.shield(task)
+
+    async def _load(self, guild_id):
+        while True:
+            flushes = self._flushes
+            stored = await self.backend.load(guild_id)
+            # A flush that ended meanwhile may have written after the
+            # read, and its batch isn't pending anymore. Read again.
+            if flushes == self._flushes:
+                break
+
+        # Writes that didn't reach the backend yet win, including the
+        # batch a flush is writing right now
+        for pending in (self._flushing, self._dirty):
+            stored.update((key, value) for (guild, key), value
+                          in pending.items() if guild == guild_id)
+
+        values = self.schema.defaults()
+        for key, text in stored.items():
+            if key in values and text is not None:
+                values[key] = self.schema[key].decode(text)
+
+        self._cache.set(guild_id, values)
+        return values
+
+    async def get(self, guild_id, key):
+        values = self.get_cached(guild_id) or await self.load(guild_id)
+        return values[key]
+
+    def set(self, guild_id, key, value):
+        """ Changes a setting, None resets it to the default """
+        setting = self.schema[key]
+        value = setting.validate(value)
+
+        values = self._cache.get(guild_id)
+        if values is not None:
+            values[key] = setting.default if value is None else value
+
+        self._dirty[(guild_id, key)] = setting.encode(value)
+
+        if self._flusher is None:
+            self._flusher = asyncio.ensure_future(self._flush_loop())
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:  # noqa pylint: disable=broad-except
+                log.exception("Flushing settings failed")
+
+    async def flush(self):
+        """ Writes all pending changes to the backend """
+        if not self._dirty:
+            return
+
+        # The batch stays visible to `_load` until the write commits
+        dirty, self._dirty = self._dirty, {}
+        self._flushing = dirty
+        try:
+            await self.backend.write([(guild, key, value) for
+                                      (guild, key), value in dirty.items()])
+
+        except BaseException:
+            # Keep them for the next flush, newer writes win. This also
+            # covers cancellation, `close` cancels the flush loop.
+            dirty.update(self._dirty)
+            self._dirty = dirty
+            raise
+
+        finally:
+            self._flushing = {}
+            self._flushes += 1
+
+    async def close(self):
+        """ Flushes pending writes and closes the backend """
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+
+        await self.flush()
+        await self.backend.close()
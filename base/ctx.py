@@ -22,6 +22,9 @@ SOFTWARE.
 Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
 """
 
+from .exceptions import FrameworkException
+from .paginator import Paginator
+
 
 __all__ = ["Context"]
 
@@ -40,6 +43,8 @@ class Context:
     `args`: [List[str]] - The arguments used in the message
     `send`: [Coroutine] - Sends a message to the channel it was sent in
         See the discord.py `Messageable.send` docs
+    `locale`: [str] - The locale resolved for the author and guild
+    `elapsed`: [float] - Seconds the command took, set once it ran
 
     """
     def __init__(self, **kwargs):
@@ -54,3 +59,42 @@ class Context:
     def update(self, d):
         """ Update contents of the context after init """
         self.kwargs.update(d)
+
+    def copy(self, **kwargs):
+        """ Returns a copy of the context with kwargs changed """
+        return Context(**{**self.kwargs, **kwargs})
+
+    def t(self, key, **kwargs):
+        """ Translate `key` into the context's locale, rendered with kwargs.
+        Uses the command's translations if it has any, else the bot's.
+        """
+        engine = self.command.translation or self.bot.translations
+
+        if engine is None:
+            raise FrameworkException("No translations loaded!")
+
+        return engine.render(key, kwargs, self.kwargs.get("locale"))
+
+    async def send_paginated(self, chunks, paginator=None, edit=None,
+                             **kwargs):
+        """ Send text too long for one message as several messages.
+
+        `chunks` is a string or an iterable of strings, read lazily so
+        every page is sent as soon as it is full. `paginator` defaults to
+        a python code block of at most 10 pages. If `edit` is a message,
+        it's edited to hold the first page. kwargs go to the first send.
+        Returns the messages.
+        """
+        paginator = paginator or Paginator(max_pages=10)
+        messages = []
+
+        for page in paginator.pages(chunks):
+            if edit is not None:
+                await edit.edit(content=page, **kwargs)
+                messages.append(edit)
+                edit = None
+            else:
+                messages.append(await self.send(page, **kwargs))
+            kwargs = {}
+
+        return messages
@@ -0,0 +1,77 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+
+import asyncio
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+__all__ = ["ConnectionPool"]
+
+
+class ConnectionPool:
+    """ Runs blocking sqlite3 calls on a small pool of worker threads,
+    each with its own connection to `path`, so the event loop never
+    waits on the database.
+
+    The database is put in WAL mode, so readers don't wait on writers.
+    """
+    def __init__(self, path, size=2):
+        self.path = path
+        self.size = size
+        self._executor = ThreadPoolExecutor(max_workers=size,
+                                            thread_name_prefix="sqlite")
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _call(self, func, args):
+        return func(self._connection(), *args)
+
+    async def run(self, func, *args):
+        """ Runs `func(connection, *args)` on a worker thread """
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self._executor, self._call,
+                                          func, args)
+
+    def close(self):
+        """ Waits for pending calls and closes the connections """
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
@@ -0,0 +1,144 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+import time
+
+from discord import HTTPException
+
+from .cache import LRUCache
+
+
+__all__ = ["EditTracker"]
+
+
+# Discord snowflakes count milliseconds from the start of 2015
+DISCORD_EPOCH = 1420070400000
+
+
+def _age(message_id):
+    """ Seconds since the message with `message_id` was sent """
+    return time.time() - ((message_id >> 22) + DISCORD_EPOCH) / 1000
+
+
+class _Entry:
+    """ What the bot remembers of a command message """
+    __slots__ = ("prefix", "responses", "stale")
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.responses = []
+        self.stale = []
+
+
+class EditTracker:
+    """ Re-runs commands when their message is edited, pass it to the bot
+    as `edits` to enable it.
+
+    For every command message the prefix it used and the bot's responses
+    are kept, at most `maxsize` messages for `ttl` seconds with up to
+    `max_responses` responses each. When the content of such a message
+    changes, the command is run again and its responses are edited in
+    place of the old ones, left over old responses are deleted.
+
+    Edits of recent messages that didn't run a command are processed
+    like new messages, to catch typos in the command name.
+    """
+    def __init__(self, maxsize=1000, ttl=300, max_responses=5):
+        self.ttl = ttl
+        self.max_responses = max_responses
+        self._entries = LRUCache(maxsize, ttl)
+
+    def track(self, message, prefix, send):
+        """ Starts tracking a command message, returns the send function
+        for its context """
+        entry = self._entries.get(message.id)
+        if entry is None:
+            entry = _Entry(prefix)
+            self._entries.set(message.id, entry)
+        entry.prefix = prefix
+
+        async def tracked_send(content=None, **kwargs):
+            response = None
+            if entry.stale:
+                response = entry.stale.pop(0)
+                response = await self._edit(response, content, kwargs)
+
+            if response is None:
+                response = await send(content, **kwargs)
+
+            if len(entry.responses) < self.max_responses:
+                entry.responses.append(response)
+            return response
+
+        return tracked_send
+
+    @staticmethod
+    async def _edit(response, content, kwargs):
+        # Attachments can't be edited in, send a new message instead
+        if "file" in kwargs or "files" in kwargs:
+            await EditTracker._delete([response])
+            return None
+
+        kwargs.setdefault("embed", None)
+        try:
+            await response.edit(content=content, **kwargs)
+
+        except HTTPException:
+            return None
+
+        return response
+
+    @staticmethod
+    async def _delete(responses):
+        for response in responses:
+            try:
+                await response.delete()
+
+            except HTTPException:
+                pass
+
+    def forget(self, message_id):
+        """ Stops tracking a message """
+        self._entries.pop(message_id)
+
+    async def on_message_edit(self, bot, before, after):
+        """ Runs the command of an edited message again """
+        if before.content == after.content:
+            # Embeds loading in also count as edits
+            return
+
+        entry = self._entries.get(after.id)
+        if entry is None:
+            if _age(after.id) < self.ttl:
+                # Triggers already ran on the original message
+                await bot.process_commands(after, triggers=False)
+            return
+
+        entry.stale, entry.responses = entry.responses, []
+        try:
+            await bot.process_commands(after, entry.prefix, triggers=False)
+
+        finally:
+            stale, entry.stale = entry.stale, []
+            await self._delete(stale)
@@ -0,0 +1,131 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+import asyncio
+import inspect
+import time
+
+from .exceptions import FrameworkException
+
+
+__all__ = ["listener", "ListenerIndex", "ListenerStats"]
+
+
+def listener(event=None):
+    """ Marks a cog method as listener of a gateway event.
+
+    The event defaults to the method name, `on_member_join` and
+    `member_join` both listen to member joins.
+    """
+    def decorator(func):  # pylint: disable=missing-docstring
+        if not inspect.iscoroutinefunction(func):
+            raise FrameworkException("Listeners must be coroutines!")
+
+        name = event or func.__name__
+        func.__listener__ = name[3:] if name.startswith("on_") else name
+        return func
+    return decorator
+
+
+class ListenerStats:
+    """ Call count, errors and run time of a listener """
+    __slots__ = ("calls", "errors", "total", "max")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, elapsed, failed):
+        self.calls += 1
+        self.errors += failed
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+
+
+class ListenerIndex:
+    """ Listeners by event name.
+
+    The index is never changed in place, adding or removing builds a
+    new dict and swaps it in, so a dispatch always sees either all of a
+    cog's listeners or none of them.
+    """
+    def __init__(self):
+        self._listeners = {}
+        self.stats = {}
+
+    def get(self, event):
+        """ Returns a tuple of the event's listeners, or None """
+        return self._listeners.get(event)
+
+    def add(self, event, func):
+        self.add_many([(event, func)])
+
+    def add_many(self, pairs):
+        """ Adds `(event, func)` pairs in one swap """
+        listeners = dict(self._listeners)
+        for event, func in pairs:
+            listeners[event] = listeners.get(event, ()) + (func,)
+            self.stats.setdefault(func.__qualname__, ListenerStats())
+
+        self._listeners = listeners
+
+    def remove(self, predicate):
+        """ Removes all listeners for which `predicate(func)` is true """
+        listeners = {}
+        for event, funcs in self._listeners.items():
+            kept = tuple(f for f in funcs if not predicate(f))
+            if kept:
+                listeners[event] = kept
+
+        self._listeners = listeners
+
+    def add_owner(self, owner):
+        """ Adds the listener methods of a cog """
+        self.add_many(
+            (func.__listener__, func) for _, func in inspect.getmembers(
+                owner, lambda v: hasattr(v, "__listener__")))
+
+    def remove_owner(self, owner):
+        """ Removes the listener methods of a cog """
+        self.remove(lambda f: getattr(f, "__self__", None) is owner)
+
+    async def run(self, func, event, args, kwargs, on_error):
+        """ Runs a listener, timing it and handing errors to `on_error`
+        so one listener can't break the others """
+        stats = self.stats[func.__qualname__]
+        start = time.perf_counter()
+        try:
+            await func(*args, **kwargs)
+
+        except asyncio.CancelledError:  # pylint: disable=try-except-raise
+            raise
+
+        except Exception as e:  # noqa pylint: disable=broad-except
+            stats.add(time.perf_counter() - start, True)
+            await on_error(event, func, e)
+
+        else:
+            stats.add(time.perf_counter() - start, False)
@@ -30,34 +30,103 @@ class CommandHolder:
     """ DONT USE THIS CLASS YOURSELF!
     This is a holder class used by the Bot class, and should never be
     used manually.
+
+    Commands are looked up in a dict of their names and aliases. With
+    `translations`, a `LocaleEngine`, each locale also gets its own dict
+    with the localized names from its catalog, under the key
+    `command.<name>` as names separated by spaces:
+
+        {"fr": {"command.ban": "bannir ban2"}}
+
+    The dict of a locale holds the default names, then the names of its
+    fallback chain, more specific locales winning, and is built the
+    first time the locale is used. When the catalogs reload, the dicts
+    of locales whose names changed are rebuilt right away, lookups only
+    ever read a dict.
     """
-    def __init__(self):
+    def __init__(self, translations=None):
         self.commands = []
+        self.translations = translations
+        self._index = {}
+        self._tables = {}
+        self._names = {}
+        if translations is not None:
+            self._names = translations.command_names
+            translations.add_reload_hook(self._reload)
 
     def __contains__(self, command_name):
-        return any(command_name in x['invokes'] for x in self.commands)
+        return command_name in self._index
 
     def add_command(self, command):
         """ Registers a command """
+        invokes = [command.name] + command.aliases
         self.commands.append({
-            "invokes": [command.name] + command.aliases,
+            "invokes": invokes,
             "command": command,
             "subcommands": command.subcommands
         })
+        for name in invokes:
+            self._index.setdefault(name, command)
+        self._tables = {}
 
-    def get_command(self, name):
-        """ Returns a command """
-        for command in self.commands:
-            if name in command["invokes"]:
-                return command["command"]
+    def get_command(self, name, locale=None):
+        """ Returns a command, by its localized names in `locale` too """
+        if self.translations is None:
+            return self._index.get(name, False)
 
-        return False
+        table = self._tables.get(locale)
+        if table is None:
+            table = self._tables[locale] = self._table(locale)
+
+        return table.get(name, False)
 
     def remove_command(self, name):
         """ Removes a command """
         for i, command in enumerate(self.commands):
             if name in command["invokes"]:
                 del self.commands[i]
+                # Names it shadowed go back to the commands that had them
+                self._index = {}
+                for other in self.commands:
+                    for invoke in other["invokes"]:
+                        self._index.setdefault(invoke, other["command"])
+                self._tables = {}
                 return True
 
         return False
+
+    def _table(self, locale):
+        chain = self.translations.fallback_chain(locale)
+        if not any(self._names.get(loc) for loc in chain):
+            # Nothing localized, share the default index
+            return self._index
+
+        by_name = {c["command"].name: c["command"] for c in self.commands}
+        table = dict(self._index)
+        for loc in reversed(chain):
+            for name, localized in self._names.get(loc, {}).items():
+                command = by_name.get(name)
+                if command is not None:
+                    table.update(dict.fromkeys(localized, command))
+        return table
+
+    def _reload(self):
+        """ Called after the catalogs reloaded, rebuilds the tables of
+        locales whose names changed """
+        names = self.translations.command_names
+        old, self._names = self._names, names
+        if set(names) != set(old):
+            # Fallback chains change with the locales present
+            stale = set(self._tables)
+        else:
+            changed = {locale for locale in names
+                       if names[locale] != old[locale]}
+            stale = {locale for locale in self._tables
+                     if not changed.isdisjoint(
+                         self.translations.fallback_chain(locale))}
+
+        if stale:
+            tables = dict(self._tables)
+            for locale in stale:
+                tables[locale] = self._table(locale)
+            self._tables = tables
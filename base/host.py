@@ -0,0 +1,180 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+import asyncio
+import collections.abc
+import contextvars
+import time
+
+from .bot import Bot
+from .translations import LocaleEngine
+
+
+__all__ = ["Host", "Tenant"]
+
+
+# The tenant whose code is running, inherited by the tasks it creates
+_tenant = contextvars.ContextVar("tenant", default=None)
+
+
+class _Timed(collections.abc.Coroutine):
+    """ Wraps a task's coroutine to add the CPU time of each step to its
+    tenant """
+    __slots__ = ("coro", "tenant")
+
+    def __init__(self, coro, tenant):
+        self.coro = coro
+        self.tenant = tenant
+
+    def send(self, value):
+        start = time.thread_time()
+        try:
+            return self.coro.send(value)
+
+        finally:
+            self.tenant.cpu += time.thread_time() - start
+
+    def throw(self, *args):  # pylint: disable=arguments-differ
+        start = time.thread_time()
+        try:
+            return self.coro.throw(*args)
+
+        finally:
+            self.tenant.cpu += time.thread_time() - start
+
+    def close(self):
+        return self.coro.close()
+
+    def __await__(self):
+        return self.coro.__await__()
+
+
+def _task_factory(loop, coro, **kwargs):
+    context = kwargs.get("context")
+    tenant = (context.get(_tenant) if context is not None else
+              _tenant.get())
+    if tenant is not None:
+        tenant.tasks += 1
+        coro = _Timed(coro, tenant)
+    return asyncio.Task(coro, loop=loop, **kwargs)
+
+
+class Tenant:
+    """ A bot run by a `Host`, with the CPU time spent in its tasks and
+    the number of tasks it started """
+    def __init__(self, name, bot, token):
+        self.name = name
+        self.bot = bot
+        self.token = token
+        self.cpu = 0.0
+        self.tasks = 0
+        self.task = None
+
+
+class Host:
+    """ Runs many bots in one process and event loop.
+
+    Each bot has its own commands, cogs and caches, while cog modules,
+    command functions and signatures, and translations (one
+    `LocaleEngine` per file) are shared. CPU time is accounted per
+    tenant, see `usage`.
+    """
+    def __init__(self, cogs=(), translation_file=None):
+        self.cogs = list(cogs)
+        self.translation_file = translation_file
+        self.tenants = {}
+        self._engines = {}
+
+    def engine(self, filename):
+        """ Returns the shared `LocaleEngine` of a translation file """
+        if filename not in self._engines:
+            self._engines[filename] = LocaleEngine(filename)
+        return self._engines[filename]
+
+    def shared(self):
+        """ Returns the objects shared by all tenants, to leave out of
+        per-tenant memory estimates: the host, its tenants, the event
+        loop, the translations and backends handed to several bots """
+        objects = [self, *self.tenants.values(), *self._engines.values()]
+        try:
+            objects.append(asyncio.get_running_loop())
+        except RuntimeError:
+            pass
+
+        backends = {}
+        for tenant in self.tenants.values():
+            for attr in ("settings", "storage", "state", "translations"):
+                value = getattr(tenant.bot, attr)
+                if value is not None:
+                    backends.setdefault(id(value), []).append(value)
+        objects.extend(v[0] for v in backends.values() if len(v) > 1)
+        return objects
+
+    def add(self, name, token, **kwargs):
+        """ Creates a bot for a tenant, kwargs go to `Bot` """
+        filename = kwargs.pop("translation_file", self.translation_file)
+        if filename is not None:
+            kwargs["translations"] = self.engine(filename)
+
+        bot = Bot(**kwargs)
+        bot.host = self
+        for cog in self.cogs:
+            bot.load_cog(cog)
+
+        tenant = self.tenants[name] = Tenant(name, bot, token)
+        return tenant
+
+    def _start(self, tenant):
+        token = _tenant.set(tenant)
+        try:
+            tenant.task = asyncio.ensure_future(
+                tenant.bot.start(tenant.token))
+
+        finally:
+            _tenant.reset(token)
+
+    async def start(self):
+        """ Starts every bot and runs until they all stop """
+        loop = asyncio.get_event_loop()
+        loop.set_task_factory(_task_factory)
+
+        for tenant in self.tenants.values():
+            self._start(tenant)
+
+        await asyncio.gather(*(t.task for t in self.tenants.values()),
+                             return_exceptions=True)
+
+    async def remove(self, name):
+        """ Stops and drops a tenant """
+        tenant = self.tenants.pop(name)
+        await tenant.bot.close()
+
+    async def close(self):
+        for name in list(self.tenants):
+            await self.remove(name)
+
+    def usage(self):
+        """ Returns (name, cpu seconds, tasks, guilds) per tenant """
+        return [(t.name, t.cpu, t.tasks, len(t.bot.guilds))
+                for t in self.tenants.values()]
@@ -0,0 +1,218 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+import asyncio
+import inspect
+import itertools
+import json
+import logging
+
+from .exceptions import FrameworkException
+
+
+__all__ = ["IPCServer", "IPCClient", "read_messages"]
+
+
+log = logging.getLogger(__name__)
+
+
+# Lines are JSON messages, allow large query results
+LIMIT = 2 ** 20
+
+
+async def _open(address, server=None):
+    """ Opens a Unix socket for a path, or TCP for a (host, port) tuple """
+    if isinstance(address, str):
+        if server is not None:
+            return await asyncio.start_unix_server(server, address,
+                                                   limit=LIMIT)
+        return await asyncio.open_unix_connection(address, limit=LIMIT)
+
+    if server is not None:
+        return await asyncio.start_server(server, *address, limit=LIMIT)
+    return await asyncio.open_connection(*address, limit=LIMIT)
+
+
+def _send(writer, **message):
+    writer.write(json.dumps(message).encode() + b"\n")
+
+
+async def read_messages(reader):
+    """ Yields the JSON messages of a stream until it's closed """
+    while True:
+        line = await reader.readline()
+        if not line:
+            return
+        yield json.loads(line)
+
+
+class IPCServer:
+    """ Relays queries between shard workers, run by the launcher.
+
+    A worker sends `{"op": "query", "id", "name", "args"}`, the server
+    calls the handler `name` on every connected worker and answers with
+    the list of results; `"broadcast"` does the same without waiting.
+    """
+    def __init__(self, address, timeout=10):
+        self.address = address
+        self.timeout = timeout
+        self._workers = set()
+        self._pending = {}
+        self._ids = itertools.count()
+        self._server = None
+
+    async def start(self):
+        self._server = await _open(self.address, self._handle)
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        self._workers.add(writer)
+        try:
+            async for message in read_messages(reader):
+                if message["op"] == "reply":
+                    future = self._pending.pop(message["id"], None)
+                    if future is not None and not future.done():
+                        future.set_result(message.get("result"))
+
+                else:
+                    asyncio.ensure_future(self._relay(writer, message))
+
+        except (ConnectionError, ValueError):
+            pass
+
+        finally:
+            self._workers.discard(writer)
+            writer.close()
+
+    async def _call(self, writer, name, args):
+        call_id = next(self._ids)
+        future = asyncio.get_event_loop().create_future()
+        self._pending[call_id] = future
+        try:
+            _send(writer, op="call", id=call_id, name=name, args=args)
+            return await asyncio.wait_for(future, self.timeout)
+
+        except (asyncio.TimeoutError, ConnectionError):
+            return None
+
+        finally:
+            self._pending.pop(call_id, None)
+
+    async def _relay(self, writer, message):
+        calls = [self._call(w, message["name"], message["args"])
+                 for w in list(self._workers)]
+
+        if message["op"] == "broadcast":
+            _send(writer, op="result", id=message["id"], result=None)
+            await asyncio.gather(*calls)
+            return
+
+        results = await asyncio.gather(*calls)
+        try:
+            _send(writer, op="result", id=message["id"], result=results)
+
+        except ConnectionError:
+            pass
+
+
+class IPCClient:
+    """ A shard worker's connection to the launcher.
+
+    Handlers are registered by name with `register`, and called with
+    the query's arguments when any worker queries that name. Results and
+    arguments must be JSON serializable.
+    """
+    def __init__(self, address):
+        self.address = address
+        self.handlers = {}
+        self._pending = {}
+        self._ids = itertools.count()
+        self._writer = None
+        self._reader_task = None
+
+    def register(self, name, func):
+        self.handlers[name] = func
+
+    async def connect(self):
+        reader, self._writer = await _open(self.address)
+        self._reader_task = asyncio.ensure_future(self._read(reader))
+
+    async def _read(self, reader):
+        async for message in read_messages(reader):
+            if message["op"] == "call":
+                asyncio.ensure_future(self._answer(message))
+            else:
+                future = self._pending.pop(message["id"], None)
+                if future is not None and not future.done():
+                    future.set_result(message["result"])
+
+        # The launcher is gone, fail pending queries
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(
+                    FrameworkException("IPC connection lost!"))
+
+    async def _answer(self, message):
+        handler = self.handlers.get(message["name"])
+        result = None
+        if handler is not None:
+            try:
+                result = handler(*message["args"])
+                if inspect.isawaitable(result):
+                    result = await result
+
+            except Exception:  # noqa pylint: disable=broad-except
+                log.exception("IPC handler %s failed", message["name"])
+                result = None
+
+        _send(self._writer, op="reply", id=message["id"], result=result)
+
+    async def _request(self, op, name, args):
+        if self._writer is None:
+            raise FrameworkException("IPC is not connected!")
+
+        request_id = next(self._ids)
+        future = asyncio.get_event_loop().create_future()
+        self._pending[request_id] = future
+        _send(self._writer, op=op, id=request_id, name=name, args=args)
+        return await future
+
+    async def query(self, name, *args):
+        """ Calls `name` on every worker, returns the list of results,
+        None for workers that didn't answer in time """
+        return await self._request("query", name, args)
+
+    async def broadcast(self, name, *args):
+        """ Calls `name` on every worker without waiting for results """
+        await self._request("broadcast", name, args)
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        if self._reader_task is not None:
+            self._reader_task.cancel()
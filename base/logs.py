@@ -0,0 +1,143 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+import atexit
+import copy
+import itertools
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+
+
+__all__ = ["JSONFormatter", "SamplingFilter", "BoundedQueueHandler",
+           "setup_logging"]
+
+
+_TRACEBACKS = logging.Formatter()
+
+
+class JSONFormatter(logging.Formatter):
+    """ Formats records as JSON lines. Structured fields are passed as
+    `extra={"fields": {...}}`, for example command, guild and latency. """
+    def format(self, record):
+        data = {
+            "time": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        data.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data["exception"] = record.exc_text
+        return json.dumps(data, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """ Keeps one in `rates[level]` records of a level, levels not in
+    `rates` are kept whole. Counting instead of random draws keeps it
+    cheap and the output even. """
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = {logging.getLevelName(k) if isinstance(k, str) else k: v
+                      for k, v in rates.items()}
+        self._counters = {level: itertools.count()
+                          for level in self.rates}
+
+    def filter(self, record):
+        rate = self.rates.get(record.levelno)
+        if rate is None or rate <= 1:
+            return True
+        return next(self._counters[record.levelno]) % rate == 0
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """ Queues records for a `QueueListener` without ever blocking. When
+    the queue is full, records are dropped and counted, and a warning
+    with the count is queued once there is room again. """
+    def __init__(self, maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Render the message and traceback now, while the arguments and
+        # frames are current; the JSON is built by the writer thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _TRACEBACKS.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            if self.dropped:
+                note = logging.LogRecord(
+                    "base.logs", logging.WARNING, __file__, 0,
+                    "Dropped %d log records, the log sink is too slow",
+                    (self.dropped,), None)
+                self.queue.put_nowait(note)
+                self.dropped = 0
+            self.queue.put_nowait(record)
+
+        except queue.Full:
+            self.dropped += 1
+
+
+class _Listener(logging.handlers.QueueListener):
+    def stop(self):
+        # Also called at exit, after a manual stop
+        if self._thread is not None:
+            super().stop()
+
+
+def setup_logging(stream=None, filename=None, level=logging.INFO,
+                  sampling=None, queue_size=10000):
+    """ Sends the framework's logs (and everything else logged) as JSON
+    lines to `filename` or `stream` (default stderr) from a background
+    thread. `sampling` maps levels to 1-in-N rates, see SamplingFilter.
+    Returns the `QueueListener`, which is stopped at exit.
+    """
+    if filename is not None:
+        sink = logging.FileHandler(filename, encoding="utf-8")
+    else:
+        sink = logging.StreamHandler(stream or sys.stderr)
+    sink.setFormatter(JSONFormatter())
+
+    handler = BoundedQueueHandler(queue_size)
+    if sampling:
+        handler.addFilter(SamplingFilter(sampling))
+
+    root = logging.getLogger()
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    listener = _Listener(handler.queue, sink)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
@@ -0,0 +1,180 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+import time
+
+from .cache import LRUCache
+from .exceptions import FrameworkException
+
+
+__all__ = ["ResponseCache", "CacheStats", "Recorder", "SCOPES"]
+
+
+# What part of the context a cached response is shared by
+SCOPES = {
+    "global": lambda ctx: None,
+    "guild": lambda ctx: ctx.guild.id if ctx.guild else ctx.channel.id,
+    "channel": lambda ctx: ctx.channel.id,
+    "user": lambda ctx: ctx.author.id,
+}
+
+
+def normalize(value):
+    """ Hashable stand-in for a converted argument """
+    ident = getattr(value, "id", None)
+    if ident is not None:
+        # Discord models compare by id
+        return (type(value).__name__, ident)
+
+    try:
+        hash(value)
+
+    except TypeError:
+        return repr(value)
+
+    return value
+
+
+def make_key(command, ctx, kwargs):
+    """ The default cache key, the command, scope, locale and converted
+    arguments, without the context and cog """
+    scope = SCOPES.get(command.cache_scope)
+    if scope is None:
+        raise FrameworkException(f"Invalid scope {command.cache_scope}!")
+
+    return (command.name, scope(ctx), ctx.kwargs.get("locale"),
+            tuple((name, normalize(value)) for name, value in kwargs.items()
+                  if name != "self" and value is not ctx))
+
+
+class Recorder:
+    """ Send function that records what a command sends, and passes it on
+    to `send` while `forward` is set """
+    def __init__(self, send, forward=True):
+        self.send = send
+        self.forward = forward
+        self.sends = []
+        self.cacheable = True
+
+    async def __call__(self, content=None, **kwargs):
+        if "file" in kwargs or "files" in kwargs:
+            # Files are read when sent, they can't be sent again
+            self.cacheable = False
+        else:
+            self.sends.append((content, kwargs))
+
+        if self.forward:
+            return await self.send(content, **kwargs)
+        return None
+
+
+class CacheStats:
+    """ Cache hits and misses of a command """
+    __slots__ = ("hits", "misses", "stale")
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    @property
+    def ratio(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class _Entry:
+    __slots__ = ("sends", "fresh_until", "tags", "refreshing")
+
+    def __init__(self, sends, ttl, tags):
+        self.sends = sends
+        self.fresh_until = time.monotonic() + ttl
+        self.tags = tags
+        self.refreshing = False
+
+    @property
+    def is_stale(self):
+        return time.monotonic() >= self.fresh_until
+
+
+class ResponseCache:
+    """ Responses of commands with `cache` set, by key.
+
+    Entries are fresh for the command's `cache` seconds, and then served
+    stale for another `cache_stale` seconds while the command runs again
+    in the background. Entries can be dropped by key or by tag, every
+    entry is tagged with its command name and the command's tags.
+    """
+    def __init__(self, maxsize=1024):
+        self._entries = LRUCache(maxsize)
+        self._tags = {}
+        self.stats = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """ Returns the entry for `key`, which may be stale, or None """
+        return self._entries.get(key)
+
+    def set(self, key, sends, ttl, stale=0, tags=()):
+        self.invalidate(key)
+        self._entries.set(key, _Entry(sends, ttl, tags), ttl + stale)
+
+        for tag in tags:
+            keys = self._tags.setdefault(tag, set())
+            keys.add(key)
+            if len(keys) > self._entries.maxsize:
+                # Forget keys the cache evicted in the meantime
+                keys.intersection_update(self._entries)
+
+    def invalidate(self, key=None, tag=None):
+        """ Drops the entry with `key` and all entries tagged `tag` """
+        keys = self._tags.pop(tag, set()) if tag is not None else set()
+        if key is not None:
+            keys.add(key)
+
+        for k in keys:
+            entry = self._entries.pop(k)
+            if entry is None:
+                continue
+
+            for t in entry.tags:
+                if t != tag and t in self._tags:
+                    self._tags[t].discard(k)
+
+    def clear(self):
+        self._entries.clear()
+        self._tags.clear()
+
+    def record(self, name, hit, stale=False):
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = CacheStats()
+
+        if hit:
+            stats.hits += 1
+            stats.stale += stale
+        else:
+            stats.misses += 1
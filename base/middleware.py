@@ -0,0 +1,196 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+
+import inspect
+
+from .exceptions import FrameworkException
+
+
+__all__ = ["Middleware", "MiddlewarePipeline", "DisabledCommands",
+           "compile_stage"]
+
+
+# Stage name -> the arguments its middlewares get
+STAGES = {
+    "pre_parse": "message",
+    "post_lookup": "ctx",
+    "post_invoke": "ctx, error"
+}
+
+
+def _is_async(func):
+    return (inspect.iscoroutinefunction(func) or
+            inspect.iscoroutinefunction(getattr(func, "__call__", None)))
+
+
+def compile_stage(stage, funcs):
+    """ Compiles the middlewares of a stage into one function calling
+    them in order, stopping at the first one returning False.
+
+    The function is only a coroutine function if one of the middlewares
+    is, so stages of sync middlewares never create coroutines.
+    Returns None when there's nothing to call.
+    """
+    if not funcs:
+        return None
+
+    params = STAGES[stage]
+    prefix = "async " if any(_is_async(f) for f in funcs) else ""
+    lines = [f"{prefix}def {stage}({params}):"]
+
+    for i, func in enumerate(funcs):
+        call = f"_{i}({params})"
+        if _is_async(func):
+            call = f"(await {call})"
+        lines += [f"    if {call} is False:", "        return False"]
+
+    lines.append("    return True")
+
+    namespace = {f"_{i}": func for i, func in enumerate(funcs)}
+    code = compile("\n".join(lines), f"<middleware {stage}>", "exec")
+    exec(code, namespace)  # pylint: disable=exec-used
+    return namespace[stage]
+
+
+class Middleware:
+    """ Base class for middlewares hooking into several stages.
+
+    Define any of these, sync or async:
+        `pre_parse(message)` - before the prefix and command are parsed
+        `post_lookup(ctx)` - once the command is found, before checks
+        `post_invoke(ctx, error)` - after the command ran, `error` is the
+            exception it raised or None
+    Returning False from a middleware skips the ones after it, and for
+    `pre_parse` and `post_lookup` stops the command from running.
+    """
+
+
+class MiddlewarePipeline:
+    """ Holds the middlewares of a bot. Each stage is compiled into one
+    function, or None, whenever middlewares are added or removed. """
+    def __init__(self):
+        self._middlewares = {stage: [] for stage in STAGES}
+        self.pre_parse = None
+        self.post_lookup = None
+        self.post_invoke = None
+
+    def _compile(self, stage):
+        setattr(self, stage, compile_stage(stage, self._middlewares[stage]))
+
+    def add(self, middleware, stage=None):
+        """ Adds a function to `stage`, or every stage method of a
+        `Middleware` if no stage is given """
+        if stage is None:
+            stages = [s for s in STAGES if hasattr(middleware, s)]
+            if not stages:
+                raise FrameworkException("Middleware has no stages!")
+
+            for name in stages:
+                self.add(getattr(middleware, name), name)
+            return
+
+        if stage not in STAGES:
+            raise FrameworkException(f"Unknown middleware stage {stage}!")
+
+        self._middlewares[stage].append(middleware)
+        self._compile(stage)
+
+    def remove(self, middleware):
+        """ Removes a function or all stages of a `Middleware` """
+        for stage, funcs in self._middlewares.items():
+            kept = [f for f in funcs if f != middleware and
+                    getattr(f, "__self__", None) is not middleware]
+
+            if len(kept) != len(funcs):
+                self._middlewares[stage] = kept
+                self._compile(stage)
+
+
+class DisabledCommands(Middleware):
+    """ Stops commands that are disabled in a guild.
+
+    Every command name gets a bit, each guild a bitset of the commands
+    it disabled, so checking a command is a dict lookup and a shift.
+
+    With a `SettingsStore`, the disabled commands are kept in the
+    guild's `disabled_commands` setting.
+    """
+    def __init__(self, store=None):
+        self.store = store
+        self._bits = {}
+        self._masks = {}
+
+    def _bit(self, name):
+        return self._bits.setdefault(name, len(self._bits))
+
+    def _mask(self, guild_id):
+        mask = self._masks.get(guild_id)
+        if mask is not None or self.store is None:
+            return mask or 0
+
+        # The bot loads guild settings before looking up commands
+        names = self.store.get_cached(guild_id, "disabled_commands")
+        if names is None:
+            return 0
+
+        mask = 0
+        for name in names:
+            mask |= 1 << self._bit(name)
+        self._masks[guild_id] = mask
+        return mask
+
+    def _save(self, guild_id, mask):
+        self._masks[guild_id] = mask
+        if self.store is not None:
+            self.store.set(guild_id, "disabled_commands",
+                           self.disabled(guild_id))
+
+    def disable(self, guild_id, name):
+        self._save(guild_id, self._mask(guild_id) | 1 << self._bit(name))
+
+    def enable(self, guild_id, name):
+        self._save(guild_id, self._mask(guild_id) & ~(1 << self._bit(name)))
+
+    def is_disabled(self, guild_id, name):
+        mask = self._mask(guild_id)
+        bit = self._bits.get(name)
+        return bit is not None and bool(mask >> bit & 1)
+
+    def disabled(self, guild_id):
+        """ Returns the names of the commands disabled in a guild """
+        mask = self._mask(guild_id)
+        return [name for name, bit in self._bits.items() if mask >> bit & 1]
+
+    def post_lookup(self, ctx):
+        guild = ctx.guild
+        if guild is None:
+            return True
+
+        mask = self._mask(guild.id)
+        if not mask:
+            return True
+
+        bit = self._bits.get(ctx.command.name)
+        return bit is None or not mask >> bit & 1
@@ -0,0 +1,141 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+
+import reprlib
+
+
+__all__ = ["Paginator", "iter_repr"]
+
+
+_repr = reprlib.Repr()
+_repr.maxlevel = 3
+_repr.maxstring = _repr.maxother = 200
+_repr.maxlong = 100
+
+
+def iter_repr(obj, max_items=200):
+    """ Yields a readable but bounded repr of `obj` line by line.
+    Big containers are shown one item per line, up to `max_items` items,
+    with their contents shortened like reprlib does. Nothing is rendered
+    beyond what is yielded, so huge objects stay cheap.
+    """
+    if isinstance(obj, dict):
+        opener, closer = "{", "}"
+        items = (f"{_repr.repr(k)}: {_repr.repr(v)}" for k, v in obj.items())
+
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        opener, closer = {list: "[]", tuple: "()"}.get(type(obj), "{}")
+        items = (_repr.repr(item) for item in obj)
+
+    else:
+        yield _repr.repr(obj)
+        return
+
+    if len(obj) <= 10:
+        short = _repr.repr(obj)
+        if len(short) <= 60 and "..." not in short:
+            yield short
+            return
+
+    yield opener + "\n"
+    for i, item in enumerate(items):
+        if i == max_items:
+            yield f" ... {len(obj) - max_items} more\n"
+            break
+        yield f" {item},\n"
+    yield closer
+
+
+class Paginator:
+    """ Splits text into pages that each fit in one message.
+
+    Pages are wrapped in `prefix` and `suffix`, a code block by default.
+    `pages` consumes its input lazily and stops reading it after
+    `max_pages` pages, so output can be produced and sent as it goes.
+    """
+    truncated = "\n[output truncated]"
+
+    def __init__(self, prefix="```py", suffix="```", limit=2000,
+                 max_pages=None):
+        self.prefix = prefix
+        self.suffix = suffix
+        self.limit = limit
+        self.max_pages = max_pages
+
+    def _page(self, parts):
+        text = "".join(parts)
+        if not self.prefix and not self.suffix:
+            return text
+
+        return f"{self.prefix}\n{text}\n{self.suffix}"
+
+    def _size(self, count):
+        size = self.limit
+        if self.prefix or self.suffix:
+            size -= len(self.prefix) + len(self.suffix) + 2
+        if self.max_pages is not None and count == self.max_pages - 1:
+            # Last page, keep room to say the output was cut
+            size -= len(self.truncated)
+        return size
+
+    def pages(self, chunks):
+        """ Yields pages from a string or an iterable of strings """
+        if isinstance(chunks, str):
+            chunks = (chunks,)
+
+        page, length, count = [], 0, 0
+        size = self._size(count)
+
+        for chunk in chunks:
+            if self.prefix:
+                # Don't let the content close the code block
+                chunk = chunk.replace("```", "`\u200b``")
+
+            pos = 0
+            while pos < len(chunk):
+                room = size - length
+                if len(chunk) - pos <= room:
+                    page.append(chunk[pos:] if pos else chunk)
+                    length += len(chunk) - pos
+                    break
+
+                # Break at the last newline that fits, or mid line if the
+                # page is empty and the line is too long for any page
+                cut = chunk.rfind("\n", pos, pos + room) + 1
+                if not cut:
+                    cut = pos if length else pos + room
+                page.append(chunk[pos:cut])
+                pos = cut
+
+                count += 1
+                if count == self.max_pages:
+                    yield self._page(page + [self.truncated])
+                    return
+
+                yield self._page(page)
+                page, length, size = [], 0, self._size(count)
+
+        if length:
+            yield self._page(page)
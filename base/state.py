@@ -0,0 +1,315 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+import asyncio
+import hashlib
+import json
+import pickle
+import struct
+import time
+
+from .exceptions import FrameworkException
+from .ipc import read_messages
+
+
+__all__ = ["StateBackend", "LocalState", "SharedMemoryState", "TCPState",
+           "StateServer"]
+
+
+class StateBackend:
+    """ Key-value store for state that should be shared between the
+    processes running the bot: cooldowns, counters, cached values.
+
+    Keys are strings. `ttl` is in seconds, None means no expiry.
+    """
+    async def get(self, key, default=None):
+        raise NotImplementedError
+
+    async def set(self, key, value, ttl=None):
+        raise NotImplementedError
+
+    async def delete(self, key):
+        raise NotImplementedError
+
+    async def incr(self, key, amount=1, ttl=None):
+        """ Adds `amount` to a number, starting at 0, and returns it.
+        `ttl` is only set when the key is created. """
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class LocalState(StateBackend):
+    """ State of this process only. Expired keys are dropped when read,
+    and all at once every `sweep` writes """
+    def __init__(self, sweep=4096):
+        self._data = {}
+        self.sweep = sweep
+        self._writes = 0
+
+    def _get(self, key):
+        item = self._data.get(key)
+        if item is None:
+            return None
+
+        if item[1] is not None and item[1] <= time.monotonic():
+            del self._data[key]
+            return None
+        return item
+
+    async def get(self, key, default=None):
+        item = self._get(key)
+        return default if item is None else item[0]
+
+    async def set(self, key, value, ttl=None):
+        self._data[key] = (value,
+                           time.monotonic() + ttl if ttl is not None else None)
+
+        self._writes += 1
+        if self._writes >= self.sweep:
+            self._writes = 0
+            now = time.monotonic()
+            self._data = {k: v for k, v in self._data.items()
+                          if v[1] is None or v[1] > now}
+
+    async def delete(self, key):
+        self._data.pop(key, None)
+
+    async def incr(self, key, amount=1, ttl=None):
+        item = self._get(key)
+        if item is None:
+            await self.set(key, amount, ttl)
+            return amount
+
+        self._data[key] = (item[0] + amount, item[1])
+        return item[0] + amount
+
+
+# Record header: key hash, expiry (wall clock, 0 for none), value length
+_HEADER = struct.Struct("<QdH")
+# Hash of a deleted record, lookups probe past it
+_DELETED = 1
+# Slots probed for a key before giving up or evicting
+_PROBES = 8
+
+
+def _hash(key):
+    # Stable between processes, unlike hash(); 0 and 1 are reserved
+    digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+    return max(int.from_bytes(digest, "little"), 2)
+
+
+class SharedMemoryState(StateBackend):
+    """ State shared by processes on one host, in a hash table of
+    `slots` fixed-size records in shared memory. Values are pickled and
+    must fit in `record_size` minus 18 bytes. When all the slots a key
+    may use are taken, the first one is overwritten.
+
+    Pass the instance to worker processes as an argument, they attach
+    to the same memory and lock.
+    """
+    def __init__(self, slots=4096, record_size=128, name=None, lock=None):
+        self.slots = slots
+        self.record_size = record_size
+        # Imported here, most bots never need it (see benchmarks.startup)
+        import multiprocessing  # pylint: disable=import-outside-toplevel
+        from multiprocessing import shared_memory  # noqa pylint: disable=import-outside-toplevel
+
+        # Workers are spawned, see utils.sandbox and launcher.py
+        self._lock = lock or multiprocessing.get_context("spawn").Lock()
+        self._owner = name is None
+        self._memory = shared_memory.SharedMemory(
+            name=name, create=self._owner, size=slots * record_size)
+        self._buffer = self._memory.buf
+
+    def __getstate__(self):
+        return (self.slots, self.record_size, self._memory.name, self._lock)
+
+    def __setstate__(self, state):
+        slots, record_size, name, lock = state
+        self.__init__(slots, record_size, name, lock)
+        self._owner = False
+
+    def _find(self, key_hash, now):
+        """ Returns the offset of the key's record, or of a free record
+        for it with False """
+        start = key_hash % self.slots
+        free = None
+        for i in range(_PROBES):
+            offset = (start + i) % self.slots * self.record_size
+            slot_hash, expires, _ = _HEADER.unpack_from(self._buffer, offset)
+            if slot_hash == key_hash:
+                if expires and expires <= now:
+                    return offset, False
+                return offset, True
+
+            if free is None and (slot_hash in (0, _DELETED) or
+                                 expires and expires <= now):
+                free = offset
+            if slot_hash == 0:
+                break
+
+        if free is None:
+            free = start * self.record_size
+        return free, False
+
+    def _read(self, key):
+        with self._lock:
+            offset, found = self._find(_hash(key), time.time())
+            if not found:
+                return None, offset
+
+            _, expires, length = _HEADER.unpack_from(self._buffer, offset)
+            start = offset + _HEADER.size
+            return (pickle.loads(self._buffer[start:start + length]),
+                    expires), offset
+
+    def _write(self, key, value, expires):
+        data = pickle.dumps(value)
+        if len(data) > self.record_size - _HEADER.size:
+            raise FrameworkException(f"Value for {key} is too large!")
+
+        offset, _ = self._find(_hash(key), time.time())
+        _HEADER.pack_into(self._buffer, offset, _hash(key), expires,
+                          len(data))
+        start = offset + _HEADER.size
+        self._buffer[start:start + len(data)] = data
+
+    async def get(self, key, default=None):
+        item, _ = self._read(key)
+        return default if item is None else item[0]
+
+    async def set(self, key, value, ttl=None):
+        with self._lock:
+            self._write(key, value, time.time() + ttl if ttl else 0)
+
+    async def delete(self, key):
+        with self._lock:
+            offset, found = self._find(_hash(key), time.time())
+            if found:
+                _HEADER.pack_into(self._buffer, offset, _DELETED, 0, 0)
+
+    async def incr(self, key, amount=1, ttl=None):
+        with self._lock:
+            offset, found = self._find(_hash(key), time.time())
+            expires = time.time() + ttl if ttl else 0
+            value = amount
+            if found:
+                _, expires, length = _HEADER.unpack_from(self._buffer, offset)
+                start = offset + _HEADER.size
+                value += pickle.loads(self._buffer[start:start + length])
+
+            self._write(key, value, expires)
+            return value
+
+    async def close(self):
+        self._buffer.release()
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
+
+
+class StateServer:
+    """ Serves a backend (default `LocalState`) to `TCPState` clients,
+    for bots running on several hosts. Values must be JSON. """
+    def __init__(self, host="127.0.0.1", port=47400, backend=None):
+        self.host = host
+        self.port = port
+        self.backend = backend or LocalState()
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host,
+                                                  self.port)
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        try:
+            async for request in read_messages(reader):
+                op = request.pop("op")
+                if op not in ("get", "set", "delete", "incr"):
+                    result = None
+                else:
+                    result = await getattr(self.backend, op)(**request)
+                writer.write(json.dumps(result).encode() + b"\n")
+
+        except (ConnectionError, ValueError):
+            pass
+
+        finally:
+            writer.close()
+
+
+class TCPState(StateBackend):
+    """ Client of a `StateServer` """
+    def __init__(self, host="127.0.0.1", port=47400):
+        self.host = host
+        self.port = port
+        self._reader = None
+        self._writer = None
+        self._lock = asyncio.Lock()
+
+    async def _request(self, **request):
+        async with self._lock:
+            if self._writer is None:
+                self._reader, self._writer = await asyncio.open_connection(
+                    self.host, self.port)
+
+            try:
+                self._writer.write(json.dumps(request).encode() + b"\n")
+                line = await self._reader.readline()
+                if not line:
+                    raise ConnectionResetError
+
+            except (ConnectionError, asyncio.IncompleteReadError) as e:
+                # Drop the dead stream, the next call reconnects
+                self._writer.close()
+                self._reader = self._writer = None
+                raise FrameworkException("State server disconnected!") from e
+
+            return json.loads(line)
+
+    async def get(self, key, default=None):
+        value = await self._request(op="get", key=key)
+        return default if value is None else value
+
+    async def set(self, key, value, ttl=None):
+        await self._request(op="set", key=key, value=value, ttl=ttl)
+
+    async def delete(self, key):
+        await self._request(op="delete", key=key)
+
+    async def incr(self, key, amount=1, ttl=None):
+        return await self._request(op="incr", key=key, amount=amount,
+                                   ttl=ttl)
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
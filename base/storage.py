@@ -0,0 +1,256 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+import asyncio
+import json
+import re
+
+from .db import ConnectionPool
+from .exceptions import FrameworkException
+
+
+__all__ = ["Storage", "Namespace", "Table"]
+
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _identifier(name):
+    if not _IDENTIFIER.match(name):
+        raise FrameworkException(f"Invalid storage name {name!r}!")
+    return name
+
+
+def _execute(conn, statements):
+    # Runs a batch of writes in one transaction, returning the row count
+    # of every statement, or the exception if the whole batch failed
+    with conn:
+        return [conn.executemany(sql, rows).rowcount
+                for sql, rows in statements]
+
+
+class Storage:
+    """ Async SQLite storage shared by all cogs
+
+    Reads go straight to the connection pool. Writes are queued and
+    committed together: while one transaction runs, the writes made in
+    the meantime gather into the next one, so concurrent commands cost
+    one commit per batch rather than one each.
+    """
+    def __init__(self, path, pool_size=2, batch_size=1000):
+        self.pool = ConnectionPool(path, pool_size)
+        self.batch_size = batch_size
+        self._namespaces = {}
+        self._pending = []
+        self._writer = None
+        self._ready = None
+
+    async def _setup(self):
+        await self.pool.run(lambda conn: conn.execute(
+            "CREATE TABLE IF NOT EXISTS kv (namespace TEXT, key TEXT, "
+            "value TEXT, PRIMARY KEY (namespace, key)) WITHOUT ROWID"))
+
+    async def ready(self):
+        """ Creates the key-value table on first use """
+        if self._ready is None:
+            self._ready = asyncio.ensure_future(self._setup())
+        await asyncio.shield(self._ready)
+
+    async def read(self, sql, params=()):
+        """ Runs a query and returns all rows """
+        await self.ready()
+        return await self.pool.run(
+            lambda conn: conn.execute(sql, params).fetchall())
+
+    def write(self, sql, rows):
+        """ Queues `sql` to be run once per parameter tuple in `rows`,
+        returns a future of the number of rows changed """
+        future = asyncio.get_event_loop().create_future()
+        self._pending.append((sql, rows, future))
+        if self._writer is None:
+            self._writer = asyncio.ensure_future(self._write_loop())
+        return future
+
+    async def _write_loop(self):
+        await self.ready()
+        try:
+            while self._pending:
+                batch = self._pending[:self.batch_size]
+                del self._pending[:self.batch_size]
+
+                try:
+                    counts = await self.pool.run(
+                        _execute, [(sql, rows) for sql, rows, _ in batch])
+
+                except Exception:  # noqa pylint: disable=broad-except
+                    # Retry one by one, so a bad write only fails itself
+                    await self._write_each(batch)
+                    continue
+
+                for (_, _, future), count in zip(batch, counts):
+                    if not future.done():
+                        future.set_result(count)
+
+        finally:
+            self._writer = None
+
+    async def _write_each(self, batch):
+        for sql, rows, future in batch:
+            try:
+                count, = await self.pool.run(_execute, [(sql, rows)])
+
+            except Exception as e:  # noqa pylint: disable=broad-except
+                if not future.done():
+                    future.set_exception(e)
+
+            else:
+                if not future.done():
+                    future.set_result(count)
+
+    def namespace(self, name):
+        """ Returns the key-value namespace `name` """
+        if name not in self._namespaces:
+            self._namespaces[name] = Namespace(self, name)
+        return self._namespaces[name]
+
+    async def flush(self):
+        """ Waits until every queued write is committed """
+        while self._writer is not None:
+            await asyncio.shield(self._writer)
+
+    async def close(self):
+        """ Commits queued writes and closes the connections """
+        await self.flush()
+        await asyncio.get_event_loop().run_in_executor(None, self.pool.close)
+
+
+class Namespace:
+    """ A cog's view of the storage, values are stored as JSON """
+    def __init__(self, storage, name):
+        self.storage = storage
+        self.name = name
+        self._tables = {}
+
+    async def get(self, key, default=None):
+        rows = await self.storage.read(
+            "SELECT value FROM kv WHERE namespace = ? AND key = ?",
+            (self.name, str(key)))
+        return json.loads(rows[0][0]) if rows else default
+
+    async def get_many(self, keys):
+        """ Returns a dict of the given keys that exist """
+        keys = [str(k) for k in keys]
+        result = {}
+        # Stay below SQLite's limit of host parameters per query
+        for i in range(0, len(keys), 900):
+            chunk = keys[i:i + 900]
+            rows = await self.storage.read(
+                "SELECT key, value FROM kv WHERE namespace = ? AND key IN "
+                f"({', '.join('?' * len(chunk))})", (self.name, *chunk))
+            result.update((k, json.loads(v)) for k, v in rows)
+        return result
+
+    async def keys(self, prefix=""):
+        rows = await self.storage.read(
+            "SELECT key FROM kv WHERE namespace = ? AND key >= ? AND "
+            "key < ? ORDER BY key", (self.name, prefix, prefix + "\uffff"))
+        return [key for key, in rows]
+
+    def put(self, key, value):
+        """ Stores a value, await the result to wait for the commit """
+        return self.put_many({key: value})
+
+    def put_many(self, items):
+        return self.storage.write(
+            "INSERT OR REPLACE INTO kv VALUES (?, ?, ?)",
+            [(self.name, str(k), json.dumps(v)) for k, v in items.items()])
+
+    def delete(self, *keys):
+        return self.storage.write(
+            "DELETE FROM kv WHERE namespace = ? AND key = ?",
+            [(self.name, str(k)) for k in keys])
+
+    def table(self, name, *columns, primary_key=None):
+        """ Returns a table of this namespace, created on first use """
+        if name not in self._tables:
+            self._tables[name] = Table(self.storage, f"{self.name}_{name}",
+                                       columns, primary_key)
+        return self._tables[name]
+
+
+class Table:
+    """ A plain SQLite table, rows are dicts of column to value """
+    def __init__(self, storage, name, columns, primary_key=None):
+        self.storage = storage
+        self.name = _identifier(name)
+        self.columns = [_identifier(c) for c in columns]
+        self.primary_key = [_identifier(c) for c in primary_key or ()]
+        self._created = None
+
+    async def _create(self):
+        definition = ", ".join(self.columns)
+        if self.primary_key:
+            definition += f", PRIMARY KEY ({', '.join(self.primary_key)})"
+        await self.storage.pool.run(lambda conn: conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.name} ({definition})"))
+
+    async def ready(self):
+        if self._created is None:
+            self._created = asyncio.ensure_future(self._create())
+        await asyncio.shield(self._created)
+
+    def _where(self, where):
+        for column in where:
+            if column not in self.columns:
+                raise FrameworkException(
+                    f"Unknown column {column} in {self.name}!")
+        if not where:
+            return "", ()
+        return (" WHERE " + " AND ".join(f"{c} = ?" for c in where),
+                tuple(where.values()))
+
+    async def select(self, **where):
+        await self.ready()
+        clause, params = self._where(where)
+        rows = await self.storage.read(
+            f"SELECT {', '.join(self.columns)} FROM {self.name}{clause}",
+            params)
+        return [dict(zip(self.columns, row)) for row in rows]
+
+    async def insert(self, **row):
+        return await self.insert_many([row])
+
+    async def insert_many(self, rows):
+        """ Inserts rows, replacing those with the same primary key """
+        await self.ready()
+        return await self.storage.write(
+            f"INSERT OR REPLACE INTO {self.name} VALUES "
+            f"({', '.join('?' * len(self.columns))})",
+            [tuple(row.get(c) for c in self.columns) for row in rows])
+
+    async def delete(self, **where):
+        await self.ready()
+        clause, params = self._where(where)
+        return await self.storage.write(
+            f"DELETE FROM {self.name}{clause}", [params])
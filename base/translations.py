@@ -24,37 +24,375 @@ Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
 
 
 import json
+import os
+import re
+import string
+import weakref
 
+from _string import formatter_field_name_split  # pylint: disable=import-error
+
+from .catalog import Catalog, write_catalog
 from .exceptions import SyntaxError  # noqa: ignore=E402 pylint: disable=redefined-builtin
 
 
-__all__ = ["LocaleEngine", "SyntaxError"]
+__all__ = ["LocaleEngine", "SyntaxError", "compile_template"]
+
+
+# Format specs made only of these characters can be inlined into the
+# generated f-string, anything else is left to str.format_map
+_SAFE_SPEC = re.compile(r"^[\w<>=^+\- #,.%]*$")
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# Messages under this prefix are localized command names
+COMMAND_PREFIX = "command."
+
+
+def _one_other(n):
+    return "one" if n == 1 else "other"
+
+
+def _zero_one_other(n):
+    return "one" if 0 <= n < 2 else "other"
+
+
+def _east_slavic(n):
+    if n % 10 == 1 and n % 100 != 11:
+        return "one"
+    if 2 <= n % 10 <= 4 and not 12 <= n % 100 <= 14:
+        return "few"
+    return "many"
+
+
+def _polish(n):
+    if n == 1:
+        return "one"
+    if 2 <= n % 10 <= 4 and not 12 <= n % 100 <= 14:
+        return "few"
+    return "many"
+
+
+def _west_slavic(n):
+    if n == 1:
+        return "one"
+    if 2 <= n <= 4:
+        return "few"
+    return "other"
+
+
+def _other(n):  # pylint: disable=unused-argument
+    return "other"
+
+
+# CLDR plural categories per base language, anything missing uses English
+PLURAL_RULES = {
+    "fr": _zero_one_other, "pt": _zero_one_other, "hi": _zero_one_other,
+    "ru": _east_slavic, "uk": _east_slavic, "be": _east_slavic,
+    "hr": _east_slavic, "sr": _east_slavic, "bs": _east_slavic,
+    "pl": _polish, "cs": _west_slavic, "sk": _west_slavic,
+    "ja": _other, "zh": _other, "ko": _other, "th": _other, "vi": _other,
+    "id": _other, "ms": _other,
+}
+
+
+def _field_expression(field):
+    """ Turns a format field name like `user.name` or `items[0]` into a
+    python expression reading it from the `_v` mapping """
+    root, rest = formatter_field_name_split(field)
+
+    if not isinstance(root, str) or not root:
+        raise SyntaxError(f"Positional field {{{field}}} in translation, "
+                          "use a name instead")
+
+    expr = f"_v[{root!r}]"
+    for is_attr, key in rest:
+        if is_attr:
+            if not _IDENTIFIER.match(key):
+                raise SyntaxError(f"Invalid attribute in field {{{field}}}")
+            expr += f".{key}"
+
+        else:
+            expr += f"[{key!r}]"
+
+    return expr
+
+
+def compile_template(template):
+    """ Compiles a str.format-style template into a function taking a
+    mapping of variables and returning the rendered string.
+
+    The template is parsed once and turned into a single f-string, so
+    rendering does no parsing at all.
+    """
+    try:
+        parsed = list(string.Formatter().parse(template))
+
+    except ValueError as e:
+        raise SyntaxError(f"Invalid translation {template!r}: {e}") from e
+
+    lines = ["def render(_v):"]
+    body = ""
+    fields = {}
+
+    for literal, field, spec, conversion in parsed:
+        body += literal.replace("{", "{{").replace("}", "}}")
+
+        if field is None:
+            continue
+
+        if not _SAFE_SPEC.match(spec or ""):
+            # Nested or exotic specs, let str.format deal with those
+            return template.format_map
+
+        if field not in fields:
+            fields[field] = f"_{len(fields)}"
+            lines.append(f"    {fields[field]} = {_field_expression(field)}")
+
+        body += "{" + fields[field]
+        if conversion:
+            body += "!" + conversion
+        if spec:
+            body += ":" + spec
+        body += "}"
+
+    lines.append(f"    return f{body!r}")
+
+    namespace = {}
+    code = compile("\n".join(lines), "<translation>", "exec")
+    exec(code, namespace)  # pylint: disable=exec-used
+    return namespace["render"]
+
+
+def compile_plural(forms, rule, count="count"):
+    """ Compiles a dict of CLDR plural categories to templates. The
+    category is picked with `rule` from the `count` variable, categories
+    missing from `forms` use `other`, or else the last form given. """
+    if not forms:
+        raise SyntaxError("Plural translations need at least one form")
+
+    compiled = {cat: compile_template(text) for cat, text in forms.items()}
+    other = compiled.get("other") or compiled[list(forms)[-1]]
+
+    def render(_v):
+        return compiled.get(rule(_v[count]), other)(_v)
+
+    return render
+
+
+def _command_names(messages):
+    """ `{command name: localized names}` from the `command.<name>`
+    messages of a locale, without decoding the other messages """
+    prefixed = getattr(messages, "prefixed", None)
+    items = (prefixed(COMMAND_PREFIX) if prefixed is not None else
+             ((k, v) for k, v in messages.items()
+              if k.startswith(COMMAND_PREFIX)))
+    return {key[len(COMMAND_PREFIX):]: tuple(value.split())
+            for key, value in items if isinstance(value, str)}
+
+
+def _missing(key):
+    def render(_v):  # pylint: disable=unused-argument
+        return key
+    return render
+
+
+class _LocaleTable(dict):
+    """ Compiled renderers for one requested locale, filled on first use """
+    def __init__(self, engine, chain):
+        super().__init__()
+        self.engine = engine
+        self.chain = chain
+
+    def __missing__(self, key):
+        render = self.engine._compile(self.chain, key)
+        self[key] = render
+        return render
+
+
+class _Tables(dict):
+    """ Maps requested locale tags to their compiled tables """
+    def __init__(self, engine):
+        super().__init__()
+        self.engine = engine
+
+    def __missing__(self, locale):
+        table = _LocaleTable(self.engine, self.engine.fallback_chain(locale))
+        self[locale] = table
+        return table
 
 
 class LocaleEngine:
     """
     Handles translation data
-    Translation data format in JSON
+    Translation data format in JSON, mapping locales to their messages:
+
+        {"en": {"hello": "Hello {user.name}!",
+                "items": {"one": "{count} item", "other": "{count} items"}},
+         "pt-BR": {"hello": "Olá {user.name}!"}}
+
+    Messages are compiled the first time they're used. Missing messages
+    fall back from `pt-BR` to `pt` and then to the default locale.
+
+    If a binary catalog (see `base.catalog`) built from the file exists
+    at `catalog`, by default `<filename>.catalog`, messages are read from
+    it instead of parsing the JSON. A catalog older than the file is
+    rebuilt from the JSON. Pass `catalog=False` to always use the JSON.
+
+    `command_names` maps locales to the localized command names found
+    under `command.<name>`, read on every (re)load.
+
+    A missing file means no translations until it is created and
+    `refresh` is called.
     """
 
-    def __init__(self, filename):
+    def __init__(self, filename, default_locale="en", catalog=None):
         self.data = {}
         self.filename = filename
+        self.default_locale = default_locale
+        self.catalog = (f"{filename}.catalog" if catalog is None
+                        else catalog)
+        self._source_stat = None
+        self._compiled = {}
+        self._tables = _Tables(self)
+        self._hooks = []
+        self.command_names = {}
         self.reload()
 
     def __getattr__(self, item):
-        return self.data[item]
+        if item.startswith("_"):
+            raise AttributeError(item)
 
-    def reload(self):
-        """ Reloads data from the translation file """
+        try:
+            return self.data[item]
+
+        except KeyError:
+            raise AttributeError(item) from None
+
+    @property
+    def locales(self):
+        """ Returns the locales present in the translation data """
+        return list(self.data)
+
+    def fallback_chain(self, locale):
+        """ Returns the locales to search, in order, for `locale` """
+        chain = []
+        if locale:
+            parts = locale.replace("_", "-").split("-")
+            for i in range(len(parts), 0, -1):
+                chain.append("-".join(parts[:i]))
+        chain.append(self.default_locale)
+
+        return tuple(loc for i, loc in enumerate(chain)
+                     if loc in self.data and loc not in chain[:i])
+
+    def _compile(self, chain, key):
+        for locale in chain:
+            message = self.data[locale].get(key)
+            if message is None:
+                continue
+
+            render = self._compiled.get((locale, key))
+            if render is None:
+                if isinstance(message, dict):
+                    rule = PLURAL_RULES.get(locale.split("-")[0], _one_other)
+                    render = compile_plural(message, rule)
+                else:
+                    render = compile_template(message)
+                self._compiled[(locale, key)] = render
+
+            return render
+
+        return _missing(key)
+
+    def get(self, key, locale=None):
+        """ Returns the compiled render function for `key` in `locale` """
+        return self._tables[locale][key]
 
+    def render(self, key, variables=None, locale=None):
+        """ Renders `key` in `locale` with a mapping of variables.
+        Unknown keys render as the key itself.
+        """
+        return self._tables[locale][key](variables or {})
+
+    def _stat(self):
         try:
-            with open(self.filename) as f:
-                data = json.load(f)
+            st = os.stat(self.filename)
 
-        except json.JSONDecodeError:
-            # Don't save the data if the JSON is invalid.
-            raise SyntaxError("Invalid JSON in translation file!")
+        except OSError:
+            return None
 
-        else:
-            self.data = data  # noqa: ignore=F821
+        return st.st_mtime_ns, st.st_size
+
+    def _load_catalog(self, stat):
+        """ Returns the catalog if it is up to date with the JSON file """
+        if not self.catalog or not os.path.exists(self.catalog):
+            return None
+
+        try:
+            catalog = Catalog(self.catalog)
+
+        except (OSError, ValueError, SyntaxError):
+            # Unreadable or damaged, rebuilt from the JSON
+            return None
+
+        if stat is not None and catalog.source_stat != stat:
+            catalog.close()
+            return None
+
+        return catalog
+
+    def reload(self):
+        """ Reloads data from the catalog or the translation file """
+        stat = self._stat()
+        data = self._load_catalog(stat)
+
+        if data is None:
+            try:
+                with open(self.filename, encoding="utf-8") as f:
+                    data = json.load(f)
+
+            except FileNotFoundError:
+                # No translations yet, every key renders as itself
+                data = {}
+
+            except json.JSONDecodeError as e:
+                # Don't save the data if the JSON is invalid.
+                raise SyntaxError("Invalid JSON in translation file!") from e
+
+            if self.catalog and stat is not None:
+                try:
+                    write_catalog(data, self.catalog, stat)
+
+                except OSError:
+                    # Read-only deployment, keep using the JSON
+                    pass
+
+        replaced, self.data = self.data, data
+        self.command_names = {locale: _command_names(data[locale])
+                              for locale in data}
+        self._source_stat = stat
+        self._compiled = {}
+        self._tables = _Tables(self)
+
+        hooks = [(hook, hook()) for hook in self._hooks]
+        self._hooks = [hook for hook, method in hooks if method is not None]
+        for _, method in hooks:
+            if method is not None:
+                method()
+
+        # Tables and hooks are rebuilt, nothing reads the old catalog now
+        if isinstance(replaced, Catalog) and replaced is not data:
+            replaced.close()
+
+    def add_reload_hook(self, method):
+        """ Calls the bound `method` after every reload, for as long as
+        its object lives """
+        self._hooks.append(weakref.WeakMethod(method))
+
+    def refresh(self):
+        """ Reloads if the translation file changed since the last load,
+        returns whether it did """
+        if self._stat() == self._source_stat:
+            return False
+
+        self.reload()
+        return True
@@ -0,0 +1,347 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+import asyncio
+import inspect
+import re
+
+from .exceptions import FrameworkException
+
+
+__all__ = ["trigger", "Trigger", "TriggerIndex", "trie_pattern"]
+
+
+# Flags a trigger can set on its part of the combined pattern
+_SCOPED = ((re.IGNORECASE, "i"), (re.MULTILINE, "m"), (re.DOTALL, "s"),
+           (re.VERBOSE, "x"))
+_SCOPABLE = re.UNICODE | re.IGNORECASE | re.MULTILINE | re.DOTALL | re.VERBOSE
+
+_BACKREF = re.compile(r"\\[1-9]|\(\?P=")
+_BOUNDARY = re.compile(r"\b")
+
+# A literal, optionally between word boundaries
+_KEYWORD = re.compile(r"(\\b)?((?:[^.^$*+?{}\[\]\\|()]|\\\W)+)(\\b)?")
+
+# How the cooldown of a trigger is keyed
+_PER = {
+    "channel": lambda m: m.channel.id,
+    "guild": lambda m: m.guild.id if m.guild else m.channel.id,
+    "user": lambda m: m.author.id
+}
+
+
+def trie_pattern(words, variants=None):
+    """ Regex matching any of `words`, built from a trie of them so shared
+    prefixes are only matched once. `variants` maps characters to others
+    that match in their place, like {"s": "$"}. """
+    variants = variants or {}
+
+    def one_of(chars):
+        if len(chars) == 1:
+            return re.escape(chars)
+        return f"[{''.join(re.escape(char) for char in chars)}]"
+
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = None
+
+    def build(node):
+        if list(node) == [""]:
+            return None
+
+        alternatives = []
+        chars = []
+        for char in sorted(k for k in node if k):
+            rest = build(node[char])
+            if rest is None:
+                chars.append(char + variants.get(char, ""))
+            else:
+                alternatives.append(
+                    one_of(char + variants.get(char, "")) + rest)
+
+        if chars:
+            alternatives.append(one_of("".join(chars)))
+
+        result = (alternatives[0] if len(alternatives) == 1 else
+                  f"(?:{'|'.join(alternatives)})")
+        if "" in node:
+            result = f"(?:{result})?"
+        return result
+
+    return build(trie) if trie else None
+
+
+def trigger(pattern, flags=0, cooldown=None, per="channel"):
+    """ Marks a cog method as trigger, called with `(message, match)` for
+    messages without a prefix that match `pattern` anywhere.
+
+    With a `cooldown` in seconds the trigger fires at most once in that
+    time per channel, or per guild or user with `per`.
+    """
+    def decorator(func):  # pylint: disable=missing-docstring
+        if not inspect.iscoroutinefunction(func):
+            raise FrameworkException("Triggers must be coroutines!")
+
+        if per not in _PER:
+            raise FrameworkException(f"Unknown cooldown scope {per!r}!")
+
+        func.__trigger__ = (re.compile(pattern, flags), cooldown, per)
+        return func
+    return decorator
+
+
+class Trigger:
+    """ A registered trigger. Cooldowns are kept in the bot's `state`,
+    so with a shared backend they hold across shard processes """
+    __slots__ = ("func", "regex", "cooldown", "key")
+
+    def __init__(self, func, regex, cooldown, per):
+        self.func = func
+        self.regex = regex
+        self.cooldown = cooldown
+        self.key = _PER[per]
+
+    async def ready(self, message, state):
+        """ Returns whether the trigger is off cooldown for the message,
+        starting the cooldown if it is """
+        if not self.cooldown:
+            return True
+
+        key = f"trigger:{self.func.__qualname__}:{self.key(message)}"
+        return await state.incr(key, ttl=self.cooldown) == 1
+
+
+def _fragment(regex):
+    # The pattern as part of the combined one, or None if it can't be:
+    # its named groups could clash and backreferences would be renumbered
+    if (regex.groupindex or _BACKREF.search(regex.pattern) or
+            regex.flags & ~_SCOPABLE):
+        return None
+
+    flags = "".join(c for flag, c in _SCOPED if regex.flags & flag)
+    fragment = (f"(?{flags}:{regex.pattern})" if flags else
+                f"(?:{regex.pattern})")
+    try:
+        # Inline global flags only work at the start of a pattern
+        re.compile(f"(?:)|{fragment}")
+    except re.error:
+        return None
+    return fragment
+
+
+class _Single:
+    """ One trigger as an alternative of the combined pattern """
+    __slots__ = ("trigger", "fragment")
+    once = True
+
+    def __init__(self, trig, fragment):
+        self.trigger = trig
+        self.fragment = fragment
+
+    def match(self, content, pos):
+        match = self.trigger.regex.match(content, pos)
+        return () if match is None else ((self.trigger, match),)
+
+
+class _Keywords:
+    """ Literal triggers with the same case sensitivity and boundaries,
+    one alternative of the combined pattern matching them all.
+    The trie matches the longest keyword at a position, the shorter
+    ones it starts with are looked up by length """
+    __slots__ = ("fold", "bounds", "triggers", "lengths", "fragment",
+                 "regex")
+    once = False
+
+    def __init__(self, fold, bounds):
+        self.fold = fold
+        self.bounds = bounds
+        self.triggers = {}
+        self.lengths = ()
+        self.fragment = self.regex = None
+
+    def add(self, text, trig):
+        self.triggers.setdefault(text.lower() if self.fold else text,
+                                 []).append(trig)
+
+    def compile(self):
+        start, end = ("\\b" if b else "" for b in self.bounds)
+        pattern = f"{start}{trie_pattern(self.triggers)}{end}"
+        self.regex = re.compile(pattern, re.IGNORECASE if self.fold else 0)
+        self.fragment = f"(?{'i' if self.fold else ''}:{pattern})"
+        self.lengths = sorted({len(k) for k in self.triggers}, reverse=True)
+        return self
+
+    def match(self, content, pos):
+        match = self.regex.match(content, pos)
+        if match is None:
+            return ()
+
+        found = []
+        end = match.end()
+        for length in self.lengths:
+            if pos + length > end:
+                continue
+
+            key = content[pos:pos + length]
+            triggers = self.triggers.get(key.lower() if self.fold else key)
+            if triggers is None:
+                continue
+
+            found_match = match
+            if pos + length < end:
+                # A shorter keyword, if it ends on a boundary where needed
+                if (self.bounds[1] and
+                        not _BOUNDARY.match(content, pos + length)):
+                    continue
+                found_match = self.regex.match(content, pos, pos + length)
+                if found_match is None or found_match.end() != pos + length:
+                    continue
+
+            found.extend((trig, found_match) for trig in triggers)
+        return found
+
+
+class TriggerIndex:
+    """ The triggers of all cogs, matched by one combined pattern.
+
+    Each trigger is an alternative wrapped in a lookahead and a group
+    named after its position, `(?=(?P<_t0>...))|(?=(?P<_t1>...))`, so one
+    `finditer` over a message finds every position where any trigger
+    matches. Most messages match nothing and cost that one scan.
+    Literal triggers, optionally between `\\b`, share one alternative
+    built from a trie of them, so adding keywords barely slows the scan.
+
+    At a position where an alternative matches, the alternatives after
+    it are tried too, the pattern only reports the first. Triggers
+    whose pattern can't be combined are searched on their own.
+    """
+    def __init__(self):
+        self.triggers = ()
+        self._combined = None
+        self._units = ()
+        self._alone = ()
+
+    def __len__(self):
+        return len(self.triggers)
+
+    def add_owner(self, owner):
+        """ Adds the trigger methods of a cog """
+        triggers = [Trigger(func, *func.__trigger__)
+                    for _, func in inspect.getmembers(
+                        owner, lambda v: hasattr(v, "__trigger__"))]
+        if triggers:
+            self._rebuild(self.triggers + tuple(triggers))
+
+    def remove_owner(self, owner):
+        """ Removes the trigger methods of a cog """
+        kept = tuple(t for t in self.triggers
+                     if getattr(t.func, "__self__", None) is not owner)
+        if len(kept) != len(self.triggers):
+            self._rebuild(kept)
+
+    def _rebuild(self, triggers):
+        units, alone, keywords = [], [], {}
+        for trig in triggers:
+            regex = trig.regex
+            keyword = (_KEYWORD.fullmatch(regex.pattern)
+                       if not regex.flags & re.VERBOSE else None)
+            if keyword is not None:
+                fold = bool(regex.flags & re.IGNORECASE)
+                bounds = (bool(keyword[1]), bool(keyword[3]))
+                if (fold, bounds) not in keywords:
+                    keywords[fold, bounds] = _Keywords(fold, bounds)
+                keywords[fold, bounds].add(
+                    re.sub(r"\\(.)", r"\1", keyword[2]), trig)
+                continue
+
+            fragment = _fragment(regex)
+            if fragment is None:
+                alone.append(trig)
+            else:
+                units.append(_Single(trig, fragment))
+
+        units[:0] = (k.compile() for k in keywords.values())
+        combined = (re.compile("|".join(
+            f"(?=(?P<_t{i}>{unit.fragment}))" for i, unit in enumerate(units)))
+            if units else None)
+
+        # Swapped in together, a scan never sees half a rebuild
+        self.triggers, self._units, self._alone, self._combined = (
+            triggers, tuple(units), tuple(alone), combined)
+
+    def scan(self, message):
+        """ Returns `(trigger, match)` of every trigger matching the
+        message, each trigger at most once """
+        content = message.content
+        found = []
+        fired = set()
+        combined, units = self._combined, self._units
+        if combined is not None:
+            # Alternatives of single triggers that fired already
+            done = set()
+            for m in combined.finditer(content):
+                first = int(m.lastgroup[2:])
+                if first in done:
+                    continue
+
+                start = m.start()
+                for index in range(first, len(units)):
+                    if index in done:
+                        continue
+
+                    for trig, match in units[index].match(content, start):
+                        if trig in fired:
+                            continue
+
+                        fired.add(trig)
+                        if units[index].once:
+                            done.add(index)
+                        found.append((trig, match))
+
+                if len(done) == len(units):
+                    break
+
+        for trig in self._alone:
+            match = trig.regex.search(content)
+            if match is not None:
+                found.append((trig, match))
+
+        return found
+
+    @staticmethod
+    async def run(trig, message, match, state, on_error):
+        """ Runs a trigger if it's off cooldown in `state`, handing
+        errors to `on_error` """
+        try:
+            if await trig.ready(message, state):
+                await trig.func(message, match)
+
+        except asyncio.CancelledError:  # pylint: disable=try-except-raise
+            raise
+
+        except Exception as e:  # noqa pylint: disable=broad-except
+            await on_error("trigger", trig.func, e)
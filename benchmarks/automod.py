@@ -0,0 +1,133 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+# Auto-moderation throughput on a stream of chat messages across many
+# guilds, each with its own list of banned terms: one search of the
+# combined per-guild regex against a precompiled regex per term.
+#
+# Run from the repository root: python -m benchmarks.automod
+
+import random
+import re
+import time
+
+from utils.automod import AutoMod
+
+
+GUILDS = 300
+TERMS = 300
+MESSAGES = 20000
+
+WORDS = ("the a to and i you it is that of in for on my me this so but "
+         "what lol just have was with be not are do we no get like can "
+         "game play when time new yeah ok good how going stream today "
+         "anyone server role channel voice music bot here there know").split()
+
+
+class Author:
+    bot = False
+
+
+class Guild:
+    def __init__(self, guild_id):
+        self.id = guild_id
+
+
+class Message:
+    author = Author()
+    mentions = ()
+    role_mentions = ()
+
+    def __init__(self, guild, content):
+        self.guild = guild
+        self.content = content
+
+
+def pseudo_word(rng):
+    return "".join(rng.choice("abcdefghijklmnopqrstuvwxyz")
+                   for _ in range(rng.randint(4, 9)))
+
+
+def make_stream(rng, guild_terms):
+    guilds = [Guild(i) for i in range(GUILDS)]
+    messages = []
+    for _ in range(MESSAGES):
+        guild = rng.choice(guilds)
+        words = [rng.choice(WORDS) for _ in range(rng.randint(3, 25))]
+        roll = rng.random()
+        if roll < 0.02:
+            words.insert(rng.randrange(len(words)),
+                         rng.choice(guild_terms[guild.id]))
+        elif roll < 0.03:
+            words.append("discord.gg/" + pseudo_word(rng))
+        messages.append(Message(guild, " ".join(words)))
+    return messages
+
+
+def main():
+    rng = random.Random(0)
+    pool = [pseudo_word(rng) for _ in range(5000)]
+    guild_terms = {i: rng.sample(pool, TERMS) for i in range(GUILDS)}
+    messages = make_stream(rng, guild_terms)
+
+    naive = {
+        guild_id: [re.compile(rf"\b{re.escape(t)}\b") for t in terms] +
+                  [re.compile(r"discord\.gg/\w+")]
+        for guild_id, terms in guild_terms.items()
+    }
+
+    automod = AutoMod()
+    for guild_id, terms in guild_terms.items():
+        rules = automod.rules(guild_id)
+        rules.add_terms(*terms)
+        rules.set_invites(True)
+
+    def run_naive():
+        found = 0
+        for message in messages:
+            content = message.content.lower()
+            found += any(p.search(content) for p in naive[message.guild.id])
+        return found
+
+    def run_automod():
+        return sum(automod.check(m) is not None for m in messages)
+
+    start = time.perf_counter()
+    run_automod()
+    print(f"{'compile':>14}: {(time.perf_counter() - start) * 1000:10.1f} "
+          f"ms for {GUILDS} guilds")
+
+    for name, func in (("regex per term", run_naive),
+                       ("automod", run_automod)):
+        best = float("inf")
+        for _ in range(3):
+            start = time.perf_counter()
+            found = func()
+            best = min(best, time.perf_counter() - start)
+        print(f"{name:>14}: {MESSAGES / best:10,.0f} messages/s "
+              f"({found} flagged)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+# Startup time: a fresh interpreter importing the framework, creating the
+# bot, loading every cog and handling its first command, and an
+# -X importtime breakdown of the same imports. Exits with status 1 when
+# the imports take longer than the budget, so it can gate CI.
+#
+# Run from the repository root: python -m benchmarks.startup [budget ms]
+
+import os
+import subprocess
+import sys
+import time
+
+
+BUDGET_MS = 500
+RUNS = 5
+
+# Stand-ins for the user's settings and a DM, so nothing hits the network
+CHILD = """
+import asyncio, os, sys, types
+sys.modules["settings"] = types.SimpleNamespace(
+    prefix="!", admins=[], token="")
+
+from base import Bot
+import discord
+
+class Channel:
+    async def send(self, content=None, **kwargs):
+        print("handled", flush=True)
+
+class Message:
+    id = 1
+    content = "!help"
+    guild = None
+    author = types.SimpleNamespace(id=2, bot=False)
+    channel = Channel()
+
+kwargs = {"intents": discord.Intents.none()} if hasattr(
+    discord, "Intents") else {}
+bot = Bot(prefix="!", **kwargs)
+for f in sorted(os.listdir("cogs")):
+    if f.endswith(".py"):
+        bot.load_cog(f"cogs.{f[:-3]}")
+
+asyncio.new_event_loop().run_until_complete(bot.process_commands(Message()))
+"""
+
+IMPORTS = ("import base; from base import Bot, Cog, command; "
+           "import cogs.basic, cogs.mod, cogs.module")
+
+
+def first_command():
+    """ Seconds from starting python to the first command's response """
+    start = time.perf_counter()
+    child = subprocess.Popen([sys.executable, "-c", CHILD],
+                             stdout=subprocess.PIPE, text=True)
+    line = child.stdout.readline()
+    elapsed = time.perf_counter() - start
+    child.wait()
+    if line.strip() != "handled":
+        raise RuntimeError("The command wasn't handled")
+    return elapsed
+
+
+def import_times():
+    """ Returns (cumulative us, module) of top level imports """
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c",
+         f"import sys, types; sys.modules['settings'] = "
+         f"types.SimpleNamespace(); {IMPORTS}"],
+        stderr=subprocess.PIPE, text=True, env=env, check=True)
+
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "):
+            # Only top level imports, their children are included
+            times.append((int(cumulative), name.strip()))
+    return times
+
+
+def main():
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else BUDGET_MS
+
+    best = min(first_command() for _ in range(RUNS))
+    print(f"first command handled after {best * 1000:.1f} ms")
+
+    times = import_times()
+    total = sum(t for t, _ in times) / 1000
+    print(f"imports: {total:.1f} ms (budget {budget:.0f} ms)")
+    for cumulative, name in sorted(times, reverse=True)[:10]:
+        print(f"{cumulative / 1000:10.1f} ms  {name}")
+
+    if total > budget:
+        print("Startup budget exceeded!")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
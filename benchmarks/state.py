@@ -0,0 +1,87 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+# Per-operation latency of the state backends: in-process dict, shared
+# memory hash table, and the TCP server running in another process.
+#
+# Run from the repository root: python -m benchmarks.state
+
+import asyncio
+import multiprocessing
+import time
+
+from base.state import LocalState, SharedMemoryState, StateServer, TCPState
+
+
+OPERATIONS = 20000
+PORT = 47499
+
+
+def serve(ready):
+    async def run():
+        server = StateServer(port=PORT)
+        await server.start()
+        ready.set()
+        await asyncio.Event().wait()
+
+    asyncio.new_event_loop().run_until_complete(run())
+
+
+async def measure(backend):
+    keys = [f"cooldown:{i % 500}" for i in range(OPERATIONS)]
+    results = {}
+    for name, op in (("set", lambda k: backend.set(k, 1, ttl=60)),
+                     ("get", backend.get),
+                     ("incr", backend.incr)):
+        start = time.perf_counter()
+        for key in keys:
+            await op(key)
+        results[name] = (time.perf_counter() - start) / OPERATIONS * 1e6
+    await backend.close()
+    return results
+
+
+def main():
+    context = multiprocessing.get_context("spawn")
+    ready = context.Event()
+    server = context.Process(target=serve, args=(ready,), daemon=True)
+    server.start()
+    ready.wait()
+
+    loop = asyncio.new_event_loop()
+    try:
+        for name, backend in (("local", LocalState()),
+                              ("shared memory", SharedMemoryState()),
+                              ("tcp", TCPState(port=PORT))):
+            results = loop.run_until_complete(measure(backend))
+            print(f"{name:>14}: " + "  ".join(
+                f"{op} {us:7.2f} us" for op, us in results.items()))
+
+    finally:
+        loop.close()
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+# Sustained writes per second from concurrent commands, each storing a
+# value and waiting for it to be committed, through Storage (writes
+# batched into shared transactions) against one commit per write on the
+# same connection pool.
+#
+# Run from the repository root: python -m benchmarks.storage
+
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from base.db import ConnectionPool
+from base.storage import Storage
+
+
+COMMANDS = 200
+WRITES = 25
+
+
+def commit_one(conn, key, value):
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO kv VALUES (?, ?, ?)",
+                     ("bench", key, json.dumps(value)))
+
+
+async def per_write(path):
+    pool = ConnectionPool(path)
+    await pool.run(lambda conn: conn.execute(
+        "CREATE TABLE IF NOT EXISTS kv (namespace TEXT, key TEXT, "
+        "value TEXT, PRIMARY KEY (namespace, key)) WITHOUT ROWID"))
+
+    async def command(n):
+        for i in range(WRITES):
+            await pool.run(commit_one, f"{n}:{i}", {"count": i})
+
+    start = time.perf_counter()
+    await asyncio.gather(*(command(n) for n in range(COMMANDS)))
+    elapsed = time.perf_counter() - start
+    pool.close()
+    return elapsed
+
+
+async def batched(path):
+    storage = Storage(path)
+    namespace = storage.namespace("bench")
+
+    async def command(n):
+        for i in range(WRITES):
+            await namespace.put(f"{n}:{i}", {"count": i})
+
+    start = time.perf_counter()
+    await asyncio.gather(*(command(n) for n in range(COMMANDS)))
+    elapsed = time.perf_counter() - start
+    await storage.close()
+    return elapsed
+
+
+def main():
+    for name, func in (("per write", per_write), ("batched", batched)):
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        loop = asyncio.new_event_loop()
+        try:
+            elapsed = loop.run_until_complete(func(path))
+
+        finally:
+            loop.close()
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+
+        rate = COMMANDS * WRITES / elapsed
+        print(f"{name:>10}: {rate:12,.0f} writes/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+# Rendering throughput of compiled translations against looking up the raw
+# string, falling back by hand and calling str.format on every render, and
+# load time of the JSON file against the binary catalog.
+#
+# Run from the repository root: python -m benchmarks.translations
+
+import json
+import os
+import tempfile
+import timeit
+
+from base.translations import LocaleEngine
+
+
+KEYS = 5000
+LOCALES = ["en", "nl", "pt", "pt-BR", "ru"]
+NUMBER = 200000
+
+
+class User:
+    name = "Clara"
+
+
+def make_catalog():
+    data = {}
+    for i, locale in enumerate(LOCALES):
+        # Every other locale only translates part of the keys
+        keys = range(0, KEYS, i + 1)
+        data[locale] = {
+            f"key{k}": f"[{locale}] Hello {{user.name}}, you have {{count}} "
+                       f"messages in {{channel}} ({k})" for k in keys
+        }
+    return data
+
+
+def naive(data, locale, key, **kwargs):
+    message = data.get(locale, {}).get(key)
+    if message is None and "-" in locale:
+        message = data.get(locale.split("-")[0], {}).get(key)
+    if message is None:
+        message = data["en"][key]
+    return message.format(**kwargs)
+
+
+def main():
+    data = make_catalog()
+    fd, path = tempfile.mkstemp(suffix=".json")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+    try:
+        engine = LocaleEngine(path)
+        variables = {"user": User(), "count": 12, "channel": "#general"}
+        keys = [f"key{k}" for k in range(0, KEYS, 7)]
+
+        def run_naive():
+            for key in keys:
+                naive(data, "pt-BR", key, **variables)
+
+        def run_compiled():
+            for key in keys:
+                engine.render(key, variables, "pt-BR")
+
+        for name, func in (("str.format", run_naive),
+                           ("compiled", run_compiled)):
+            loops = NUMBER // len(keys)
+            best = min(timeit.repeat(func, number=loops, repeat=5))
+            rate = loops * len(keys) / best
+            print(f"{name:>12}: {rate:12,.0f} renders/s")
+
+        for name, catalog in (("json load", False), ("catalog load", None)):
+            best = min(timeit.repeat(
+                lambda c=catalog: LocaleEngine(path, catalog=c),
+                number=20, repeat=5))
+            print(f"{name:>12}: {best / 20 * 1000:12.3f} ms")
+
+    finally:
+        os.remove(path)
+        if os.path.exists(f"{path}.catalog"):
+            os.remove(f"{path}.catalog")
+
+
+if __name__ == "__main__":
+    main()
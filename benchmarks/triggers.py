@@ -0,0 +1,120 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+# Trigger matching cost per message as the number of triggers grows: a
+# re.search per trigger, as cogs did in on_message, against one scan of
+# the combined pattern of a TriggerIndex. Most messages match nothing,
+# a few mention a keyword or contain a link.
+#
+# Run from the repository root: python -m benchmarks.triggers
+
+import random
+import re
+import time
+
+from base.triggers import TriggerIndex, trigger
+
+
+COUNTS = (10, 100, 1000)
+MESSAGES = 2000
+
+WORDS = ("the a to and i you it is that of in for on my me this so but "
+         "what lol just have was with be not are do we no get like can "
+         "game play when time new yeah ok good how going stream today "
+         "anyone server role channel voice music bot here there know").split()
+
+
+class Channel:
+    id = 1
+
+
+class Message:
+    channel = Channel()
+
+    def __init__(self, content):
+        self.content = content
+
+
+def pseudo_word(rng):
+    return "".join(rng.choice("abcdefghijklmnopqrstuvwxyz")
+                   for _ in range(rng.randint(4, 9)))
+
+
+def make_owner(patterns):
+    async def handler(message, match):
+        pass
+
+    # Every trigger gets its own function, like a cog method would
+    methods = {}
+    for i, pattern in enumerate(patterns):
+        func = trigger(pattern, re.I)(
+            type(handler)(handler.__code__, {}, f"t{i}"))
+        methods[f"t{i}"] = func
+    return type("Owner", (), methods)()
+
+
+def main():
+    rng = random.Random(0)
+    keywords = [pseudo_word(rng) for _ in range(max(COUNTS))]
+    messages = []
+    for _ in range(MESSAGES):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(3, 25))]
+        roll = rng.random()
+        if roll < 0.02:
+            words.insert(rng.randrange(len(words)), rng.choice(keywords))
+        elif roll < 0.04:
+            words.append(f"https://{pseudo_word(rng)}.com/{pseudo_word(rng)}")
+        messages.append(Message(" ".join(words)))
+
+    for count in COUNTS:
+        patterns = [r"https?://\S+"] + [
+            rf"\b{re.escape(k)}\b" for k in keywords[:count - 1]]
+        compiled = [re.compile(p, re.I) for p in patterns]
+
+        start = time.perf_counter()
+        index = TriggerIndex()
+        index.add_owner(make_owner(patterns))
+        build = time.perf_counter() - start
+
+        def run_naive(compiled=compiled):
+            return sum(1 for m in messages for p in compiled
+                       if p.search(m.content))
+
+        def run_index(index=index):
+            return sum(len(index.scan(m)) for m in messages)
+
+        print(f"{count} triggers, built in {build * 1000:.1f} ms")
+        for name, func in (("search each", run_naive),
+                           ("combined", run_index)):
+            best = float("inf")
+            for _ in range(3):
+                start = time.perf_counter()
+                fired = func()
+                best = min(best, time.perf_counter() - start)
+            print(f"{name:>14}: {MESSAGES / best:10,.0f} messages/s "
+                  f"({fired} fired)")
+
+
+if __name__ == "__main__":
+    main()
@@ -22,30 +22,56 @@ SOFTWARE.
 Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
 """
 
+import asyncio
 import contextlib
+import cProfile
 import inspect
 import io
-import pprint
+import itertools
 import re
 import textwrap
+import time
 import traceback
+import tracemalloc
 
 import discord
 
 from base import Cog, command, check
+from base.paginator import iter_repr
+from utils.analytics import Analytics
+from utils.profiling import (CommandProfiler, format_table, snapshot_table,
+                             stats_table)
+from utils.repl import SessionManager, deep_sizeof
+from utils.sandbox import SandboxPool
 import settings
 
 
+# Names every eval gets, they don't count against the session's memory
+INJECTED = ("message", "author", "channel", "guild", "ctx", "self", "bot",
+            "inspect", "discord", "contextlib", "func")
+
+
 class Code(Cog):
     def __init__(self, bot):
         super().__init__(bot)
-        self.ln = 0
-        self.env = {}
-        self._ = None
-        self.stdout = io.StringIO()
-
-    def _format(self, inp, out):
-        self._ = out
+        self.sessions = SessionManager()
+        self.memory_budget = 32 * 1024 * 1024
+        self.pool = SandboxPool()
+        self._snapshot = None
+        path = getattr(settings, "analytics", None)
+        self.analytics = Analytics.open(path) if path else None
+        if self.analytics is not None:
+            bot.add_middleware(self.analytics.record, "post_invoke")
+
+    def cog_unload(self):
+        self.pool.close()
+        if self.analytics is not None:
+            self.bot.remove_middleware(self.analytics.record)
+            self.analytics.close()
+
+    @staticmethod
+    def _format(session, inp, out, text=None):
+        session._ = out
 
         res = ""
 
@@ -60,11 +86,11 @@ class Code(Cog):
         # Create the inpit dialog
         for i, line in enumerate(lines):
             if i == 0:
-                s = f"In [{self.ln}]: "
+                s = f"In [{session.ln}]: "
 
             else:
                 # Indent the 3 dots correctly
-                s = (f"{{:<{len(str(self.ln))+2}}}...: ").format("")
+                s = (f"{{:<{len(str(session.ln))+2}}}...: ").format("")
 
             if i == len(lines)-2:
                 if line.startswith("return"):
@@ -72,24 +98,25 @@ class Code(Cog):
 
             res += s + line + "\n"
 
-        self.stdout.seek(0)
-        text = self.stdout.read()
-        self.stdout.close()
-        self.stdout = io.StringIO()
+        if text is None:
+            session.stdout.seek(0)
+            text = session.stdout.read()
+            session.stdout.close()
+            session.stdout = io.StringIO()
 
         if text:
             res += text + "\n"
 
         if out is None:
             # No output, return the input statement
-            return (res, None)
+            return (iter((res,)), None)
 
-        res += f"Out[{self.ln}]: "
+        res += f"Out[{session.ln}]: "
 
         if isinstance(out, discord.Embed):
             # We made an embed? Send that as embed
             res += "<Embed>"
-            res = (res, out)
+            res = (iter((res,)), out)
 
         else:
             if (isinstance(out, str) and
@@ -97,32 +124,44 @@ class Code(Cog):
                 # Leave out the traceback message
                 out = "\n"+"\n".join(out.split("\n")[1:])
 
-            pretty = (pprint.pformat(out, compact=True, width=60) if not
-                      isinstance(out, str) else str(out))
+            if isinstance(out, str):
+                pretty = iter((out,))
 
-            if pretty != str(out):
-                # We're using the pretty version, start on the next line
-                res += "\n"
-
-            if pretty.count("\n") > 20:
-                # Text too long, shorten
-                l = pretty.split("\n")
-                pretty = "\n".join(l[:3]) + "\n ...\n" + "\n".join(l[-3:])
+            else:
+                # Bounded rendering, huge objects are cut off lazily
+                pretty = iter_repr(out)
+                first = next(pretty)
+                if first.endswith("\n"):
+                    # One item per line, start on the next line
+                    res += "\n"
+                pretty = itertools.chain((first,), pretty)
 
             # Add the output
-            res += pretty
-            res = (res, None)
+            res = (itertools.chain((res,), pretty), None)
 
         return res
 
     async def _eval(self, ctx, code):
-        self.ln += 1
+        session = self.sessions.get(ctx.author.id)
+        session.ln += 1
 
         if code.startswith("exit"):
-            self.ln = 0
-            self.env = {}
+            session.reset()
             return await ctx.send(f"```Reset history!```")
 
+        res = await self._run(ctx, session, code)
+        out, embed = self._format(session, code, res)
+
+        await ctx.send_paginated(out, embed=embed)
+
+        dropped = session.trim(self.memory_budget, INJECTED)
+        if dropped:
+            await ctx.send(f"```py\n# Dropped {', '.join(dropped)} to stay "
+                           "in the session's memory budget```")
+
+    async def _run(self, ctx, session, code):
+        """ Run code in the session's environment, returns the result
+        or the formatted traceback """
         env = {
             "message": ctx.message,
             "author": ctx.message.author,
@@ -133,40 +172,111 @@ class Code(Cog):
             "bot": self.bot,
             "inspect": inspect,
             "discord": discord,
-            "contextlib": contextlib
+            "contextlib": contextlib,
+            "__session__": session
         }
 
-        self.env.update(env)
+        session.env.update(env)
 
         # Ignore this shitcode, it works
         _code = """
 async def func():
     try:
-        with contextlib.redirect_stdout(self.stdout):
+        with contextlib.redirect_stdout(__session__.stdout):
 {}
         if '_' in locals():
             if inspect.isawaitable(_):
                 _ = await _
             return _
     finally:
-        self.env.update(locals())
+        __session__.env.update(locals())
 """.format(textwrap.indent(code, '            '))
 
         try:
-            exec(_code, self.env)  # pylint: disable=exec-used
-            func = self.env['func']
+            exec(_code, session.env)  # pylint: disable=exec-used
+            func = session.env['func']
             res = await func()
 
         except:  # noqa pylint: disable=bare-except
             res = traceback.format_exc()
 
-        out, embed = self._format(code, res)
-        await ctx.send(f"```py\n{out}```", embed=embed)
+        return res
 
-    @check(lambda ctx: ctx.author.id in settings.admins)
-    @command()
-    async def eval(self, ctx, *, code):
-        """ Run eval in a REPL-like format. """
+    @staticmethod
+    async def _report(ctx, text, filename):
+        """ Send a report, attached as a file if it doesn't fit a message """
+        if len(text) < 1990:
+            return await ctx.send(f"```py\n{text}```")
+
+        head = "\n".join(text.split("\n")[:12])[:1900]
+        await ctx.send(f"```py\n{head}\n...```",
+                       file=discord.File(io.BytesIO(text.encode()), filename))
+
+    def _sandbox_state(self, ctx):
+        """ The bot state snippets in the sandbox can see """
+        bot = self.bot
+        return {
+            "user": str(bot.user),
+            "guild_count": len(bot.guilds),
+            "latency": bot.latency,
+            "cogs": list(bot._cogs),
+            "commands": [c["invokes"][0] for c in bot._commands.commands],
+            "guild": self._guild_info(getattr(ctx.guild, "id", None)),
+            "channel": ctx.channel.id,
+            "author": ctx.author.id
+        }
+
+    def _guild_info(self, guild_id):
+        guild = self.bot.get_guild(guild_id)
+        if guild is None:
+            return None
+
+        return {"id": guild.id, "name": guild.name,
+                "members": guild.member_count,
+                "channels": [c.name for c in guild.channels],
+                "roles": [r.name for r in guild.roles]}
+
+    def _user_info(self, user_id):
+        user = self.bot.get_user(user_id)
+        if user is None:
+            return None
+
+        return {"id": user.id, "name": str(user), "bot": user.bot}
+
+    async def _sandbox(self, ctx, code):
+        session = self.sessions.get(ctx.author.id)
+        session.ln += 1
+        msg = await ctx.send(f"```py\nIn [{session.ln}]: running...```")
+        output = []
+        last_edit = time.monotonic()
+
+        async def on_output(text):
+            nonlocal last_edit
+            output.append(text)
+
+            # Stream the output without hitting edit ratelimits
+            if time.monotonic() - last_edit > 1:
+                last_edit = time.monotonic()
+                text = "".join(output)[-1900:]
+                await msg.edit(content=f"```py\n{text}```")
+
+        kind, res = await self.pool.run(
+            code, state=self._sandbox_state(ctx),
+            queries={"guild": self._guild_info, "user": self._user_info},
+            on_output=on_output)
+
+        # The result is a repr already, don't pretty print it again
+        out, _ = self._format(session, code,
+                              res if kind == "error" else None,
+                              "".join(output))
+        if kind == "result" and res is not None:
+            out = itertools.chain(out, (f"Out[{session.ln}]: {res}",))
+
+        await ctx.send_paginated(out, edit=msg)
+
+    @staticmethod
+    def _prepare(code):
+        """ Strip codeblocks and turn single expressions into `_ = expr` """
         code = code.strip("`")
         if code.startswith("py\n"):
             code = "\n".join(code.split("\n")[1:])
@@ -177,7 +287,150 @@ async def func():
                 code, re.M) and len(code.split("\n")) == 1:
             code = "_ = "+code
 
-        await self._eval(ctx, code)
+        return code
+
+    @check(lambda ctx: ctx.author.id in settings.admins)
+    @command()
+    async def eval(self, ctx, *, code):
+        """ Run eval in a REPL-like format. """
+        await self._eval(ctx, self._prepare(code))
+
+    @check(lambda ctx: ctx.author.id in settings.admins)
+    @command()
+    async def profile(self, ctx, *, code):
+        """ Run code like eval under cProfile and show where time went """
+        code = self._prepare(code)
+        session = self.sessions.get(ctx.author.id)
+        session.ln += 1
+
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            res = await self._run(ctx, session, code)
+        finally:
+            profile.disable()
+
+        out = "".join(self._format(session, code, res)[0])
+        session.trim(self.memory_budget, INJECTED)
+        await self._report(ctx, f"{out}\n\n{stats_table(profile)}",
+                           "profile.txt")
+
+    @check(lambda ctx: ctx.author.id in settings.admins)
+    @command(name="profile-command")
+    async def profile_command(self, ctx, name: str, count: int = 1):
+        """ Profile the next `count` invocations of a command """
+        comm = self.bot._commands.get_command(name)
+
+        if not comm:
+            return await ctx.send(f"No command named `{name}`.")
+
+        if CommandProfiler.is_profiling(comm):
+            return await ctx.send(f"`{name}` is already being profiled.")
+
+        profiler = CommandProfiler(comm, count)
+        profiler.install()
+        await ctx.send(f"Profiling the next {count} invocation(s) "
+                       f"of `{name}`...")
+
+        try:
+            await asyncio.wait_for(asyncio.shield(profiler.done), 600)
+        except asyncio.TimeoutError:
+            profiler.uninstall()
+
+        if not profiler.invocations:
+            return await ctx.send(f"`{name}` wasn't invoked in 10 minutes.")
+
+        await self._report(ctx, f"{name}: {profiler.invocations} "
+                                f"invocation(s) in {profiler.elapsed:.4f}s\n"
+                                f"{stats_table(profiler.profile)}",
+                           "profile.txt")
+
+    @check(lambda ctx: ctx.author.id in settings.admins)
+    @command()
+    async def memtop(self, ctx, arg: str = None):
+        """ Show which lines allocated memory since the last memtop.
+        `memtop <n>` shows n lines, `memtop stop` stops tracing.
+        """
+        if arg == "stop":
+            tracemalloc.stop()
+            self._snapshot = None
+            return await ctx.send("Stopped tracing allocations.")
+
+        if not tracemalloc.is_tracing() or self._snapshot is None:
+            tracemalloc.start()
+            self._snapshot = tracemalloc.take_snapshot()
+            return await ctx.send("Tracing allocations, run `memtop` again "
+                                  "to see what grew.")
+
+        snapshot = tracemalloc.take_snapshot()
+        limit = int(arg) if arg and arg.isdigit() else 15
+        table = snapshot_table(self._snapshot, snapshot, limit)
+        self._snapshot = snapshot
+        await self._report(ctx, table, "memtop.txt")
+
+    @check(lambda ctx: ctx.author.id in settings.admins)
+    @command()
+    async def tenants(self, ctx):
+        """ Show the CPU time, tasks, guilds and estimated memory of every
+        bot run by this bot's host """
+        host = self.bot.host
+        if host is None:
+            return await ctx.send("This bot isn't run by a host.")
+
+        # Objects shared by the tenants aren't counted against any, nor
+        # are the other bots, reachable through `bot.host`
+        shared = {id(obj) for obj in host.shared()}
+        bots = {id(t.bot) for t in host.tenants.values()}
+        rows = []
+        for name, cpu, tasks, guilds in host.usage():
+            bot = host.tenants[name].bot
+            size = deep_sizeof(bot, shared | (bots - {id(bot)}))
+            rows.append((name, f"{cpu:.2f}s", tasks, guilds,
+                         f"{size / 1024:,.0f} KiB"))
+
+        await self._report(ctx, format_table(
+            ("tenant", "cpu", "tasks", "guilds", "memory"), rows),
+            "tenants.txt")
+
+    @check(lambda ctx: ctx.author.id in settings.admins)
+    @command()
+    async def usage(self, ctx, hours: int = 24, scope: str = None):
+        """ Show how often commands ran in the last `hours` hours, how
+        often they failed and how long they took.
+        `usage <hours> here` only counts this guild.
+        """
+        if self.analytics is None:
+            return await ctx.send("Command analytics aren't enabled.")
+
+        guild = ctx.guild.id if scope == "here" and ctx.guild else None
+        commands = {}
+        totals = await self.analytics.query(hours)
+        for (name, guild_id), (uses, errors, total, peak) in totals.items():
+            if guild is not None and guild_id != guild:
+                continue
+
+            row = commands.setdefault(name, [0, 0, 0.0, 0.0, set()])
+            row[0] += uses
+            row[1] += errors
+            row[2] += total
+            row[3] = max(row[3], peak)
+            row[4].add(guild_id)
+
+        rows = sorted(commands.items(), key=lambda i: -i[1][0])
+        await self._report(ctx, format_table(
+            ("command", "uses", "errors", "avg", "max", "guilds"),
+            [(name, uses, errors, f"{total / uses:.1f}ms",
+              f"{peak:.1f}ms", len(guilds))
+             for name, (uses, errors, total, peak, guilds) in rows]),
+            "usage.txt")
+
+    @check(lambda ctx: ctx.author.id in settings.admins)
+    @command()
+    async def sandbox(self, ctx, *, code):
+        """ Run code in a separate, resource limited process.
+        `bot` is a snapshot of the bot's state, use `eval` for live objects.
+        """
+        await self._sandbox(ctx, self._prepare(code))
 
 
 def setup(bot):
@@ -22,7 +22,9 @@ SOFTWARE.
 Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
 """
 
-from base import Cog, command
+import functools
+
+from base import Cog, command, Paginator
 
 
 # TODO: Translations (cc @Enra @Cameron)
@@ -36,6 +38,12 @@ Github: https://github.com/ClaraIO/Karen
 Support: https://discord.gg/rmMTZue"""
 
 
+@functools.lru_cache(maxsize=256)
+def help_pages(doc):
+    """ Help pages of a docstring, shared by every bot in the process """
+    return tuple(Paginator(prefix="", suffix="").pages(doc))
+
+
 class Basic(Cog):
     @command(name="help")
     async def _help(self, ctx, _command: str = None):
@@ -46,14 +54,30 @@ class Basic(Cog):
         comm = self.bot.get_command(_command)
 
         # TODO: @property on command that utilizes the signature
-        await ctx.send(comm.func.__doc__)
+        for page in help_pages(comm.func.__doc__ or "No help given."):
+            await ctx.send(page)
 
     @command()
     async def commands(self, ctx):
         """ Returns a list of commands """
-        commands = [c['invokes'][0] for c in self.bot._commands.commands]
-        commlist = ", ".join(commands)
-        await ctx.send(f"My commands: {commlist}")
+        commands = (c['invokes'][0] for c in self.bot._commands.commands)
+        chunks = (f"{', ' if i else 'My commands: '}{name}"
+                  for i, name in enumerate(commands))
+        await ctx.send_paginated(chunks, Paginator(prefix="", suffix=""))
+
+    @command()
+    async def guilds(self, ctx):
+        """ Shows how many servers the bot is in, over all shards """
+        if self.bot.ipc is None:
+            return await ctx.send(f"I'm in {len(self.bot.guilds)} servers.")
+
+        counts = await self.bot.ipc.query("guild_count")
+        answered = [c for c in counts if c is not None]
+        text = f"I'm in {sum(answered)} servers."
+        if len(answered) != len(counts):
+            text += (f" ({len(counts) - len(answered)} of {len(counts)} "
+                     "workers didn't answer)")
+        await ctx.send(text)
 
 
 def setup(bot):
@@ -23,12 +23,164 @@ Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
 """
 
 
+import asyncio
+import logging
+
 import discord
 
-from base import Cog, command, has_permission, MentionConverter
+from base import Cog, command, has_permission, listener, MentionConverter
+from utils.antispam import ACTIONS, AntiSpam, ActionQueue
+from utils.automod import AutoMod
+from utils.bulk import (parse_targets, resolve_targets, BulkWorker,
+                        Progress)
+
+
+log = logging.getLogger(__name__)
 
 
 class Moderation(Cog):
+    # Mass actions on more members ask for confirmation
+    confirm_over = 10
+
+    def __init__(self, bot):
+        super().__init__(bot)
+        self.automod = AutoMod()
+        self.spam = AntiSpam()
+        self.actions = ActionQueue()
+        self.bulk = BulkWorker()
+        # Action taken against spammers and raiders, by guild id
+        self.spam_actions = {}
+        self._loading = None
+        bot.add_middleware(self.check_message, "pre_parse")
+
+        # Loaded into a running bot, by a reload for instance. Otherwise
+        # the loop isn't running yet and on_ready starts the load.
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            self._start_loading()
+
+    def cog_unload(self):
+        self.bot.remove_middleware(self.check_message)
+        if self._loading is not None:
+            self._loading.cancel()
+
+    def _start_loading(self):
+        if self._loading is None and self.storage is not None:
+            self._loading = asyncio.ensure_future(self.load_rules())
+
+    @listener()
+    async def on_ready(self):
+        """ Loads the moderation settings once the bot runs """
+        self._start_loading()
+
+    async def load_rules(self):
+        """ Loads the auto-moderation rules and anti-spam actions of every
+        guild """
+        keys = await self.storage.keys("automod:")
+        for key, data in (await self.storage.get_many(keys)).items():
+            self.automod.load(int(key.split(":")[1]), data)
+
+        keys = await self.storage.keys("antispam:")
+        for key, action in (await self.storage.get_many(keys)).items():
+            self.spam_actions[int(key.split(":")[1])] = action
+
+    @listener()
+    async def on_member_join(self, member):
+        """ Punishes members joining in a raid """
+        action = self.spam_actions.get(member.guild.id)
+        if action is not None and self.spam.join(member):
+            self.actions.add(member, action, "Joined during a raid")
+
+    def check_message(self, message):
+        """ Stops spam and messages breaking the auto-moderation rules
+        before they are parsed as commands """
+        if message.guild is None or message.author.bot:
+            return True
+
+        violation = self.automod.check(message)
+        action = self.spam_actions.get(message.guild.id)
+        spam = self.spam.message(message) if action else None
+        if violation is None and spam is None:
+            return True
+
+        # Moderators may break the rules, to manage the filter itself
+        perms = message.channel.permissions_for(message.author)
+        if perms.manage_messages:
+            return True
+
+        if spam is not None:
+            self.actions.add(message.author, action, f"Spam: {spam}")
+
+        if violation is not None:
+            asyncio.ensure_future(self.enforce(message, violation))
+        return False
+
+    async def enforce(self, message, violation):
+        """ Deletes a message that broke a rule """
+        try:
+            await message.delete()
+
+        except discord.HTTPException:
+            return
+
+        reasons = {"term": "a filtered word", "invite": "an invite link",
+                   "mentions": "too many mentions"}
+        await message.channel.send(
+            f"{message.author.mention}, your message was removed for "
+            f"containing {reasons[violation.rule]}.", delete_after=10)
+
+    @has_permission(manage_guild=True)
+    @command(name="filter")
+    async def filter_(self, ctx, action: str = "list", *, value: str = ""):
+        """ Manages the auto-moderation rules of this guild:
+        `filter add <words>`, `filter remove <words>`, `filter list`,
+        `filter invites on|off` and `filter mentions <max, 0 is off>` """
+        rules = self.automod.rules(ctx.guild.id)
+
+        if action == "add":
+            rules.add_terms(*value.split())
+        elif action == "remove":
+            rules.remove_terms(*value.split())
+        elif action == "invites":
+            rules.set_invites(value == "on")
+        elif action == "mentions":
+            rules.max_mentions = int(value or 0)
+        elif action == "list":
+            terms = ", ".join(sorted(rules.terms)) or "none"
+            return await ctx.send(
+                f"Filtered words: {terms}\n"
+                f"Invites: {'blocked' if rules.invites else 'allowed'}\n"
+                f"Max mentions: {rules.max_mentions or 'off'}")
+        else:
+            return await ctx.send(f"Unknown action `{action}`.")
+
+        if self.storage is not None:
+            await self.storage.put(f"automod:{ctx.guild.id}",
+                                   rules.to_dict())
+        await ctx.send("Filter updated.")
+
+    @has_permission(manage_guild=True)
+    @command()
+    async def antispam(self, ctx, action: str):
+        """ Sets what happens to spammers and raiders in this guild:
+        `mute`, `kick`, `ban` or `off` """
+        if action != "off" and action not in ACTIONS:
+            return await ctx.send(f"Unknown action `{action}`.")
+
+        if action == "off":
+            self.spam_actions.pop(ctx.guild.id, None)
+        else:
+            self.spam_actions[ctx.guild.id] = action
+
+        if self.storage is not None:
+            key = f"antispam:{ctx.guild.id}"
+            await (self.storage.delete(key) if action == "off" else
+                   self.storage.put(key, action))
+        await ctx.send(f"Anti-spam set to `{action}`.")
+
     @has_permission(ban_members=True)
     @command(pass_context=False)
     async def ban(self, member: MentionConverter(discord.Member),
@@ -42,9 +194,96 @@ class Moderation(Cog):
     async def kick(self, member: MentionConverter(discord.Member),
                    *, reason: str = "No reason given."):
         """ Bans a member with an optional given reason """
-        print(member)
+        log.info("Kicking %s", member, extra={"fields": {
+            "guild": member.guild.id, "user": member.id, "reason": reason}})
         await member.kick(reason=reason)
 
+    def _can_target(self, ctx, target):
+        """ Whether the author outranks `target`, users not in the guild
+        always can be """
+        if target.id in (ctx.author.id, ctx.guild.me.id):
+            return False
+        if not isinstance(target, discord.Member):
+            return True
+        if ctx.author.id == ctx.guild.owner_id:
+            return True
+        return (target.id != ctx.guild.owner_id and
+                target.top_role < ctx.author.top_role)
+
+    async def _confirm(self, ctx, question):
+        """ Asks the author to reply yes, returns whether they did """
+        await ctx.send(f"{question} Reply `yes` within 30 seconds.")
+        try:
+            reply = await self.bot.wait_for(
+                "message", timeout=30,
+                check=lambda m: (m.author.id == ctx.author.id and
+                                 m.channel.id == ctx.channel.id))
+
+        except asyncio.TimeoutError:
+            reply = None
+
+        if reply is None or reply.content.strip().lower() != "yes":
+            await ctx.send("Cancelled.")
+            return False
+        return True
+
+    async def _bulk(self, ctx, text, route, action):
+        """ Runs `action(target, reason)` for the targets in `text`,
+        reporting progress in one message """
+        ids, minutes, reason = parse_targets(text)
+        # Users not in the guild can only be banned
+        targets = resolve_targets(ctx.guild, ids, minutes,
+                                  ctx.message.created_at, route == "ban")
+        allowed = [t for t in targets if self._can_target(ctx, t)]
+        skipped = (f" Skipping {len(targets) - len(allowed)} you can't "
+                   f"{route}." if len(allowed) < len(targets) else "")
+        targets = allowed
+        if not targets:
+            return await ctx.send(f"No targets found.{skipped}")
+
+        if len(targets) > self.confirm_over and not await self._confirm(
+                ctx, f"This will {route} {len(targets)} members.{skipped}"):
+            return None
+
+        reason = reason or f"Mass {route} by {ctx.author}"
+        progress = Progress(ctx, f"Mass {route}", len(targets))
+        await progress.start()
+        done, failed = await self.bulk.run(
+            targets, lambda target: action(target, reason=reason), route,
+            progress.update)
+        await progress.finish(done, failed)
+
+    @has_permission(ban_members=True)
+    @command()
+    async def massban(self, ctx, *, targets: str):
+        """ Bans many members at once, by mention, id, or `joined:N` for
+        members that joined in the last N minutes. Other words are used
+        as reason. The owner and members with a role as high as yours
+        are skipped """
+        await self._bulk(ctx, targets, "ban", ctx.guild.ban)
+
+    @has_permission(kick_members=True)
+    @command()
+    async def masskick(self, ctx, *, targets: str):
+        """ Kicks many members at once, targets are given like massban """
+        await self._bulk(ctx, targets, "kick", ctx.guild.kick)
+
+    @has_permission(manage_messages=True)
+    @command()
+    async def purge(self, ctx, limit: int, *, targets: str = ""):
+        """ Deletes messages among the last `limit` of this channel, only
+        those of the targets if any are given like massban """
+        ids, minutes, _ = parse_targets(targets)
+        authors = {m.id for m in resolve_targets(
+            ctx.guild, ids, minutes, ctx.message.created_at)}
+        if (ids or minutes is not None) and not authors:
+            return await ctx.send("No targets found.")
+
+        # Discord deletes up to 100 messages per request
+        deleted = await ctx.channel.purge(
+            limit=limit, check=lambda m: not authors or m.author.id in authors)
+        await ctx.send(f"Deleted {len(deleted)} messages.", delete_after=5)
+
 
 def setup(bot):
     bot.add_cog(Moderation(bot))
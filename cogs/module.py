@@ -23,27 +23,61 @@ Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
 """
 
 
-from base import Cog, command
+from base import Cog, command, has_permission, DisabledCommands
 
 
 class Modules(Cog):
+    def __init__(self, bot):
+        super().__init__(bot)
+        self.disabled = DisabledCommands(bot.settings)
+        bot.add_middleware(self.disabled)
+
+    def cog_unload(self):
+        self.bot.remove_middleware(self.disabled)
+
     @command(pass_context=False)
-    def load(self, cog: str):
+    async def load(self, cog: str):
         """ Loads a cog by dotted path """
         self.bot.load_cog(cog)
 
     @command(pass_context=False)
-    def unload(self, cog: str):
+    async def unload(self, cog: str):
         """ Unloads a cog by cog class name """
         self.bot.unload_cog(cog)
 
     @command(pass_context=False)
-    def reload(self, cog: str):
-        """ Reloads a cog by cog class name """
+    async def reload(self, cog: str):
+        """ Reloads a cog by cog class name, in every shard worker when
+        run by the launcher """
+        if self.bot.ipc is not None:
+            return await self.bot.ipc.broadcast("reload", cog)
+
         file = self.bot._cogs[cog].__module__
         self.bot.unload_cog(cog)
         self.bot.load_cog(file)
 
+    @has_permission(manage_guild=True)
+    @command()
+    async def disable(self, ctx, name: str):
+        """ Disables a command in this guild """
+        comm = self.bot.get_command(name)
+        if comm is None or comm.cog is self:
+            return await ctx.send(f"`{name}` can't be disabled.")
+
+        self.disabled.disable(ctx.guild.id, comm.name)
+        await ctx.send(f"Disabled `{comm.name}`.")
+
+    @has_permission(manage_guild=True)
+    @command()
+    async def enable(self, ctx, name: str):
+        """ Enables a disabled command in this guild """
+        comm = self.bot.get_command(name)
+        if comm is None:
+            return await ctx.send(f"No command named `{name}`.")
+
+        self.disabled.enable(ctx.guild.id, comm.name)
+        await ctx.send(f"Enabled `{comm.name}`.")
+
 
 def setup(bot):
     bot.add_cog(Modules(bot))
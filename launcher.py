@@ -0,0 +1,151 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+# Runs the bot's shards in several worker processes, restarting workers
+# that exit, and relays queries between them.
+#
+# Usage: python launcher.py [workers] [shards]
+# Shards default to one per worker.
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import tempfile
+import time
+
+from base import IPCServer, SharedMemoryState
+from base.logs import setup_logging
+import run
+
+
+log = logging.getLogger("launcher")
+
+
+class Worker:
+    """ A worker process and its restart backoff """
+    def __init__(self, shard_ids, shard_count, address, state):
+        self.args = (shard_ids, shard_count, address, state)
+        self.process = None
+        self.started = 0
+        self.backoff = 1
+        self.restart_at = 0
+
+    def start(self, context):
+        # Not daemonic, workers start sandbox processes of their own.
+        # supervise() terminates and joins them on the way out
+        self.process = context.Process(target=run.worker, args=self.args,
+                                       daemon=False)
+        self.process.start()
+        self.started = time.monotonic()
+
+    def check(self, context, now):
+        """ Restarts the worker if it exited and its backoff passed """
+        if self.process.is_alive():
+            return
+
+        if not self.restart_at:
+            # A worker that ran for a while starts over with a short wait
+            if now - self.started > 60:
+                self.backoff = 1
+            self.restart_at = now + self.backoff
+            log.warning("Worker %s exited with %s, restarting in %ss",
+                        self.args[0], self.process.exitcode, self.backoff)
+            self.backoff = min(self.backoff * 2, 300)
+
+        elif now >= self.restart_at:
+            self.restart_at = 0
+            self.start(context)
+
+
+class Launcher:
+    """ Spreads `shard_count` shards over `workers` processes """
+    def __init__(self, workers, shard_count=None):
+        shard_count = shard_count or workers
+        # Unix sockets where available, local TCP elsewhere
+        address = (os.path.join(tempfile.mkdtemp(), "ipc.sock")
+                   if hasattr(asyncio, "start_unix_server")
+                   else ("127.0.0.1", 47300))
+        self.server = IPCServer(address)
+        self.context = multiprocessing.get_context("spawn")
+        # State shared by the bots of all workers
+        self.state = SharedMemoryState()
+        self.workers = [
+            Worker(list(range(i, shard_count, workers)), shard_count,
+                   address, self.state)
+            for i in range(min(workers, shard_count))
+        ]
+
+    async def supervise(self):
+        await self.server.start()
+        for worker in self.workers:
+            worker.start(self.context)
+
+        try:
+            while True:
+                await asyncio.sleep(1)
+                now = time.monotonic()
+                for worker in self.workers:
+                    worker.check(self.context, now)
+
+        finally:
+            for worker in self.workers:
+                if worker.process.is_alive():
+                    worker.process.terminate()
+            for worker in self.workers:
+                worker.process.join(10)
+            await self.server.close()
+            await self.state.close()
+
+
+async def launch(workers, shards):
+    """ Supervises the workers until SIGINT or SIGTERM """
+    task = asyncio.ensure_future(Launcher(workers, shards).supervise())
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            # Cancelling runs supervise()'s cleanup, stopping the workers
+            loop.add_signal_handler(sig, task.cancel)
+        except NotImplementedError:
+            # Windows, asyncio.run() cancels on Ctrl-C by itself
+            pass
+
+    try:
+        await task
+
+    except asyncio.CancelledError:
+        pass
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count()
+    shards = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    setup_logging()
+    asyncio.run(launch(workers, shards))
+
+
+if __name__ == "__main__":
+    main()
@@ -22,15 +22,64 @@ SOFTWARE.
 Written by Martmists <legal@martmists.com>, August 2017
 """
 
+import asyncio
 import os
 
-from base import Bot
+from base import Bot, IPCClient, SettingsStore, SQLiteBackend, Storage
+from base.logs import setup_logging
 import settings
 
-bot = Bot(prefix=settings.prefix, translation_file="translations")
 
-for f in os.listdir("cogs"):
-    if f.endswith(".py"):
-        bot.load_cog(f"cogs.{f[:-3]}")
+def make_bot(**kwargs):
+    """ Creates the bot and loads every cog, kwargs go to `Bot` """
+    # Per-guild settings are optional, enabled by a database path
+    store = (SettingsStore(SQLiteBackend(settings.database))
+             if hasattr(settings, "database") else None)
+    storage = (Storage(settings.storage)
+               if hasattr(settings, "storage") else None)
+    bot = Bot(prefix=settings.prefix, translation_file="translations",
+              settings=store, storage=storage, **kwargs)
 
-bot.run(settings.token)
+    for f in os.listdir("cogs"):
+        if f.endswith(".py"):
+            bot.load_cog(f"cogs.{f[:-3]}")
+
+    return bot
+
+
+def main():
+    setup_logging(filename=getattr(settings, "log_file", None))
+    make_bot().run(settings.token)
+
+
+def reload_cog(bots, name):
+    """ Reloads a cog by class name in every bot of this process """
+    for bot in bots:
+        if name in bot._cogs:
+            module = bot._cogs[name].__module__
+            bot.unload_cog(name)
+            bot.load_cog(module)
+
+
+def worker(shard_ids, shard_count, address, state=None):
+    """ Runs a bot per shard in this process, used by launcher.py """
+    setup_logging(filename=getattr(settings, "log_file", None))
+    ipc = IPCClient(address)
+    bots = [make_bot(shard_id=i, shard_count=shard_count, ipc=ipc,
+                     state=state)
+            for i in shard_ids]
+
+    ipc.register("guild_count", lambda: sum(len(b.guilds) for b in bots))
+    ipc.register("shards", lambda: shard_ids)
+    ipc.register("reload", lambda name: reload_cog(bots, name))
+
+    async def start():
+        await ipc.connect()
+        await asyncio.gather(*(b.start(settings.token) for b in bots))
+
+    asyncio.get_event_loop().run_until_complete(start())
+
+
+# Guarded so worker processes (see utils.sandbox) can import this safely
+if __name__ == "__main__":
+    main()
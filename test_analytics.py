@@ -0,0 +1,119 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from utils.analytics import Analytics, RECORD, OK, ERROR
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def write(analytics, hour, *records):
+    for name, guild, latency, outcome in records:
+        command = analytics.ids.get(name)
+        if command is None:
+            command = analytics._command_id(name)
+        analytics._append(RECORD.pack(hour * 3600, command, guild, latency,
+                                      outcome))
+
+
+def test_rollup(tmp_path):
+    path = str(tmp_path)
+    hour = int(time.time()) // 3600
+    analytics = Analytics(path)
+    write(analytics, hour - 2, ("ping", 1, 10, OK), ("eval", 1, 30, ERROR))
+    write(analytics, hour, ("ping", 1, 20, OK))
+
+    expected = {("ping", 1): [2, 0, 30, 20], ("eval", 1): [1, 1, 30, 30]}
+    assert analytics.scan(hour - 5) == expected
+    analytics.rollup(hour)
+    assert set(os.listdir(path)) == {
+        f"{hour - 2}.agg", f"{hour}.{analytics.pid}.seg", "commands.json",
+        f"commands.{analytics.pid}.json", "lock"}
+    assert analytics.scan(hour - 5) == expected
+    assert analytics.scan(hour) == {("ping", 1): [1, 0, 20, 20]}
+
+
+def test_dead_processes(tmp_path):
+    path = str(tmp_path)
+    hour = int(time.time()) // 3600
+
+    crashed = Analytics(path)
+    crashed.pid = dead_pid()
+    write(crashed, hour, ("eval", 1, 30, OK), ("ping", 2, 10, OK))
+
+    analytics = Analytics(path)
+    write(analytics, hour, ("ping", 2, 20, OK))
+    analytics.rollup(hour)
+
+    # The dead process' segment is rolled up even for the current hour
+    assert set(os.listdir(path)) == {
+        f"{hour}.agg", f"{hour}.{analytics.pid}.seg", "commands.json",
+        f"commands.{analytics.pid}.json", "lock"}
+    assert analytics.scan(hour) == {("eval", 1): [1, 0, 30, 30],
+                                    ("ping", 2): [2, 0, 30, 20]}
+
+
+def test_scan_during_rollup(tmp_path):
+    path = str(tmp_path)
+    hour = int(time.time()) // 3600
+    analytics = Analytics(path)
+    write(analytics, hour, ("ping", 1, 10, OK))
+
+    # Files removed between listing and reading are skipped
+    files = analytics._files
+    analytics._files = lambda: [*files(), (hour, None), (hour, 1)]
+    assert analytics.scan(hour) == {("ping", 1): [1, 0, 10, 10]}
+    analytics._files = files
+
+    # A scan waits for another process' rollup to finish
+    other = Analytics(path)
+    results = []
+    with other._locked(exclusive=True):
+        thread = threading.Thread(
+            target=lambda: results.append(analytics.scan(hour)))
+        thread.start()
+        thread.join(0.2)
+        assert thread.is_alive()
+    thread.join()
+    assert results == [{("ping", 1): [1, 0, 10, 10]}]
+
+
+def test_shared_instance(tmp_path):
+    first = Analytics.open(str(tmp_path))
+    second = Analytics.open(str(tmp_path / "." / ""))
+    assert first is second
+    first.close()
+    assert Analytics.open(str(tmp_path)) is first
+    first.close()
+    first.close()
+    assert Analytics.open(str(tmp_path)) is not first
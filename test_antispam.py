@@ -0,0 +1,161 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import discord
+
+from utils import antispam
+from utils.antispam import ActionQueue, AntiSpam, SlotTable
+
+
+class Clock:
+    def __init__(self, monkeypatch):
+        self.now = 1000.0
+        monkeypatch.setattr(antispam.time, "monotonic", lambda: self.now)
+
+
+def message(author, content, channel=10, guild=1):
+    return SimpleNamespace(author=SimpleNamespace(id=author),
+                           guild=SimpleNamespace(id=guild),
+                           channel=SimpleNamespace(id=channel),
+                           content=content)
+
+
+def test_slots():
+    table = SlotTable(size=3, capacity=2)
+    a = table.slot("a", 1)
+    # The window is full after `size` events
+    assert not table.hit(a, 1, 10)
+    assert not table.hit(a, 2, 10)
+    assert table.hit(a, 3, 10)
+    assert table.hit(a, 11, 10)
+    assert not table.hit(a, 30, 10)
+    assert [table.repeat(a, 7) for _ in range(3)] == [0, 1, 2]
+    assert table.repeat(a, 8) == 0
+
+    # Tables grow once their slots run out
+    table.slot("b", 5)
+    c = table.slot("c", 5)
+    assert table.capacity == 4 and len(table) == 3
+
+    # Idle keys are freed and their slots reset for reuse
+    assert table.sweep(3) == 4
+    assert len(table) == 2 and table.slot("b", 6) != a
+    d = table.slot("d", 6)
+    assert d == a and d != c
+    assert not table.hit(d, 6, 10)
+    assert table.repeat(d, 8) == 0
+
+
+def test_messages(monkeypatch):
+    clock = Clock(monkeypatch)
+    spam = AntiSpam(messages=(3, 5), channel_messages=(5, 5), duplicates=2)
+    assert spam.message(message(1, "a")) is None
+    assert spam.message(message(1, "b")) is None
+    assert spam.message(message(1, "c")) == "sending messages too fast"
+
+    clock.now += 10
+    assert spam.message(message(1, "d")) is None
+    assert spam.message(message(1, "d")) is None
+    clock.now += 10
+    assert spam.message(message(1, "d")) == "repeating messages"
+    # Members of other guilds are apart
+    assert spam.message(message(1, "d", guild=2)) is None
+
+    clock.now += 10
+    assert [spam.message(message(i, "x", channel=20))
+            for i in range(6)][-1] == "flooding the channel"
+
+
+def test_joins(monkeypatch):
+    clock = Clock(monkeypatch)
+    spam = AntiSpam(joins=(3, 10))
+    member = SimpleNamespace(guild=SimpleNamespace(id=1))
+    assert [spam.join(member) for _ in range(3)] == [False, False, True]
+    clock.now += 20
+    assert not spam.join(member)
+
+
+def test_sweep(monkeypatch):
+    clock = Clock(monkeypatch)
+    spam = AntiSpam(idle=60)
+    spam.sweep_chunk = 64
+    for i in range(200):
+        spam.message(message(i, "a"))
+    assert spam.users.capacity == 256
+
+    # Each check sweeps one chunk of slots
+    clock.now += 61
+    spam.message(message(1000, "a"))
+    assert spam._sweeping == 64
+    assert len(spam.users) == 200 - 64 + 1
+    for _ in range(3):
+        spam.message(message(1000, "a"))
+    assert spam._sweeping is None
+    assert len(spam.users) == 1
+
+
+class Member:
+    def __init__(self, guild, id, log, fail=False):
+        self.guild = guild
+        self.id = id
+        self.log = log
+        self.fail = fail
+
+    async def ban(self, reason):
+        self.log.append(("ban", self.id, reason))
+
+    async def kick(self, reason):
+        if self.fail:
+            raise discord.HTTPException(SimpleNamespace(status=403,
+                                                        reason=""), "")
+        self.log.append(("kick", self.id, reason))
+
+    async def add_roles(self, role, reason):
+        self.log.append(("mute", self.id, role.name))
+
+
+def test_actions():
+    async def main():
+        log = []
+        guild = SimpleNamespace(id=1, roles=[SimpleNamespace(name="Muted")])
+        a, b, c = (Member(guild, i, log) for i in range(3))
+        failing = Member(guild, 3, log, fail=True)
+        queue = ActionQueue(interval=0.01, concurrency=2)
+        queue.add(a, "kick", "spam")
+        queue.add(a, "mute", "spam")
+        queue.add(b, "mute", "spam")
+        queue.add(b, "ban", "raid")
+        queue.add(c, "mute", "spam")
+        queue.add(failing, "kick", "spam")
+        await asyncio.sleep(0.05)
+        return log, queue._task
+
+    log, task = asyncio.run(main())
+    # Only the strongest action of each member runs, failures are ignored
+    assert sorted(log) == [("ban", 1, "raid"), ("kick", 0, "spam"),
+                           ("mute", 2, "Muted")]
+    assert task is None
@@ -0,0 +1,77 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+from utils.automod import AutoMod, GuildRules
+
+
+class Message:
+    mentions = ()
+    role_mentions = ()
+
+    def __init__(self, content):
+        self.content = content
+
+
+def rule(rules, content):
+    violation = rules.check(Message(content))
+    return violation.rule if violation is not None else None
+
+
+def test_terms():
+    rules = GuildRules(terms=["idiot", "ass"])
+
+    for content in ("you idiot", "IDIOT", "you idiot!", "idiot$ here",
+                    "IDIOT|", "(idiot)", "\uff11diot", "id\u200biot", "!diot",
+                    "a$$", "@ss"):
+        assert rule(rules, content) == "term", content
+
+    for content in ("idiots", "idiotic", "class", "passing", "bass!",
+                    "hello"):
+        assert rule(rules, content) is None, content
+
+
+def test_invites_and_mentions():
+    rules = GuildRules(invites=True)
+    assert rule(rules, "join discord.gg/abc") == "invite"
+    assert rule(rules, "DISCORD.COM/invite/abc") == "invite"
+    assert rule(rules, "discord is fun") is None
+
+    rules = GuildRules(max_mentions=2)
+    message = Message("hey")
+    message.mentions = (1, 2)
+    assert rules.check(message).rule == "mentions"
+
+
+def test_rules_changes():
+    rules = GuildRules()
+    assert rule(rules, "idiot") is None
+    rules.add_terms("Idiot")
+    assert rule(rules, "idiot") == "term"
+    rules.remove_terms("IDIOT")
+    assert rule(rules, "idiot") is None
+
+    automod = AutoMod()
+    automod.load(1, GuildRules(terms=["idiot"], invites=True).to_dict())
+    assert automod.rules(1).terms == {"idiot"}
+    assert automod.rules(1).invites
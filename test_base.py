@@ -0,0 +1,58 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+import importlib
+import subprocess
+import sys
+
+import pytest
+
+import base
+
+
+def test_lazy_import():
+    # A fresh interpreter, this one has imported everything already
+    code = ("import sys, base\n"
+            "print(sorted(m for m in sys.modules if m == 'discord' or "
+            "m.startswith('base.')))\n"
+            "base.Paginator\n"
+            "print('base.paginator' in sys.modules, 'discord' in sys.modules)")
+    output = subprocess.run([sys.executable, "-c", code], check=True,
+                            capture_output=True, text=True).stdout
+    assert output.split("\n")[:2] == ["[]", "True False"]
+
+
+def test_exports():
+    assert set(base._EXPORTS) == set(base.__all__)
+    for name, module in base._EXPORTS.items():
+        value = getattr(importlib.import_module(f"base.{module}"), name)
+        assert getattr(base, name) is value
+        assert name in dir(base)
+
+    namespace = {}
+    exec("from base import *", namespace)  # pylint: disable=exec-used
+    assert namespace["Bot"] is base.Bot
+
+    with pytest.raises(AttributeError):
+        base.NotAName  # noqa pylint: disable=pointless-statement
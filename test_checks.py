@@ -0,0 +1,114 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+import asyncio
+
+import pytest
+
+from base.checks import run_checks, PermissionCache
+from base.exceptions import CheckFailed
+
+
+def test_run_checks():
+    order = []
+
+    def allow(ctx):
+        order.append("allow")
+        return True
+
+    async def slow(ctx):
+        order.append("slow start")
+        await asyncio.sleep(0.05)
+        order.append("slow end")
+        return True
+
+    async def refuse(ctx):
+        order.append("refuse")
+        return False
+
+    def broken(ctx):
+        raise KeyError("x")
+
+    async def main(checks):
+        await run_checks(checks, None)
+
+    asyncio.run(main([slow, allow, slow]))
+    # Sync checks first, async ones concurrently
+    assert order == ["allow", "slow start", "slow start", "slow end",
+                     "slow end"]
+
+    order.clear()
+    with pytest.raises(CheckFailed, match="refuse failed"):
+        asyncio.run(main([slow, refuse]))
+    # The slow check was cancelled
+    assert order == ["slow start", "refuse"]
+
+    with pytest.raises(CheckFailed, match="broken errored"):
+        asyncio.run(main([slow, broken]))
+
+
+class Guild:
+    id = 1
+
+
+class Channel:
+    guild = Guild()
+
+    def __init__(self, id):  # noqa pylint: disable=redefined-builtin
+        self.id = id
+        self.computed = 0
+
+    def permissions_for(self, member):
+        self.computed += 1
+        return (self.id, member.id, self.computed)
+
+
+class Member:
+    def __init__(self, id):  # noqa pylint: disable=redefined-builtin
+        self.id = id
+
+
+def test_permission_cache():
+    cache = PermissionCache()
+    channel, other = Channel(10), Channel(11)
+    alice, bob = Member(2), Member(3)
+
+    assert cache.get(channel, alice) == (10, 2, 1)
+    assert cache.get(channel, alice) == (10, 2, 1)
+    assert cache.get(channel, bob) == (10, 3, 2)
+    assert cache.get(other, alice) == (11, 2, 1)
+
+    # A member everywhere in the guild
+    cache.invalidate(guild=1, member=2)
+    assert cache.get(channel, alice) == (10, 2, 3)
+    assert cache.get(other, alice) == (11, 2, 2)
+    assert cache.get(channel, bob) == (10, 3, 2)
+
+    # Everyone in a channel
+    cache.invalidate(channel=10)
+    assert cache.get(channel, bob) == (10, 3, 4)
+    assert cache.get(other, alice) == (11, 2, 2)
+
+    cache.invalidate(guild=1)
+    assert cache.get(other, alice) == (11, 2, 3)
@@ -0,0 +1,177 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+import asyncio
+
+import discord
+import pytest
+
+from base import Bot, Cog, command
+from base.exceptions import FrameworkException
+
+
+class Guild:
+    id = 100
+
+
+class Author:
+    id = 2
+    bot = False
+
+
+class Channel:
+    id = 10
+    guild = Guild()
+
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, content=None, **kwargs):
+        self.sent.append(content)
+
+
+class Message:
+    author = Author()
+    guild = Guild()
+
+    def __init__(self, content, channel):
+        self.content = content
+        self.channel = channel
+
+
+class Cached(Cog):
+    def __init__(self, bot):
+        self.calls = []
+        super().__init__(bot)
+
+    @command(cache=60, key=lambda ctx, kwargs: ctx.guild.id)
+    async def rank(self, ctx):
+        self.calls.append("rank")
+        await ctx.send("rank")
+
+    @command(cache=60, key=lambda ctx, kwargs: ctx.guild.id)
+    async def top(self, ctx):
+        self.calls.append("top")
+        await ctx.send("top")
+
+    @command(cache=60)
+    async def echo(self, ctx, text):
+        self.calls.append(text)
+        await ctx.send(text)
+
+
+def test_cache():
+    async def main():
+        bot = Bot(prefix="!", intents=discord.Intents.none())
+        cog = Cached(bot)
+        channel = Channel()
+        for text in ("!rank", "!top", "!rank", "!top", "!echo a", "!echo b",
+                     "!echo a"):
+            await bot.process_commands(Message(text, channel))
+        return cog.calls, channel.sent
+
+    calls, sent = asyncio.run(main())
+    # Commands with the same custom key don't share responses
+    assert calls == ["rank", "top", "a", "b"]
+    assert sent == ["rank", "top", "rank", "top", "a", "b", "a"]
+
+
+def test_duplicate_commands():
+    bot = Bot(prefix="!", intents=discord.Intents.none())
+
+    async def ping(ctx):
+        pass
+
+    bot.add_command(command(name="ping", aliases=["p"])(ping))
+    with pytest.raises(FrameworkException):
+        bot.add_command(command(name="ping")(ping))
+    # Aliases are names too
+    with pytest.raises(FrameworkException):
+        bot.add_command(command(name="p")(ping))
+
+    bot.remove_command("ping")
+    bot.add_command(command(name="ping")(ping))
+    assert bot.get_command("ping") is not None
+    assert bot.get_command("p") is None
+
+
+class Coalesced(Cog):
+    def __init__(self, bot):
+        self.calls = []
+        self.release = asyncio.Event()
+        super().__init__(bot)
+
+    @command(coalesce=True)
+    async def slow(self, ctx, text):
+        self.calls.append(text)
+        await self.release.wait()
+        await ctx.send(text)
+
+    @command(coalesce=True)
+    async def fail(self, ctx):
+        self.calls.append("fail")
+        await self.release.wait()
+        raise ValueError("fail")
+
+    @command(coalesce=True)
+    async def upload(self, ctx):
+        self.calls.append("upload")
+        await self.release.wait()
+        await ctx.send("upload", file=object())
+
+
+def test_coalesce():
+    async def main():
+        bot = Bot(prefix="!", intents=discord.Intents.none())
+        errors = []
+
+        async def command_error(ctx, e):
+            errors.append(repr(e))
+        bot.command_error = command_error
+
+        cog = Coalesced(bot)
+        channels = {}
+        for texts in (("!slow a", "!slow a", "!slow b"), ("!fail", "!fail"),
+                      ("!upload", "!upload")):
+            cog.release.clear()
+            tasks = []
+            for text in texts:
+                channel = channels[text] = channels.get(text, Channel())
+                tasks.append(asyncio.ensure_future(
+                    bot.process_commands(Message(text, channel))))
+            await asyncio.sleep(0.01)
+            cog.release.set()
+            await asyncio.gather(*tasks)
+        sent = {text: channel.sent for text, channel in channels.items()}
+        return cog.calls, sent, errors, cog.slow._inflight
+
+    calls, sent, errors, inflight = asyncio.run(main())
+    # Followers send the leader's responses, other arguments run apart
+    assert sent["!slow a"] == ["a", "a"] and sent["!slow b"] == ["b"]
+    # Followers of a failing leader stop silently, only it reports
+    assert errors == ["ValueError('fail')"]
+    # Files can't be sent again, followers run the command themselves
+    assert calls == ["a", "b", "fail", "upload", "upload"]
+    assert sent["!upload"] == ["upload", "upload"]
+    assert inflight == {}
@@ -0,0 +1,126 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+import asyncio
+
+import pytest
+
+from base import SettingsStore, SQLiteBackend
+from base.exceptions import FrameworkException
+
+
+class Backend:
+    """ Holds rows in memory, reads and writes can be held back """
+    def __init__(self):
+        self.rows = {}
+        self.read_gate = None
+        self.write_gate = None
+        self.fail = False
+
+    async def load(self, guild_id):
+        rows = {key: value for (guild, key), value in self.rows.items()
+                if guild == guild_id}
+        if self.read_gate is not None:
+            gate, self.read_gate = self.read_gate, None
+            await gate.wait()
+        return rows
+
+    async def write(self, changes):
+        if self.write_gate is not None:
+            await self.write_gate.wait()
+        if self.fail:
+            raise OSError("disk full")
+        for guild, key, value in changes:
+            self.rows[(guild, key)] = value
+
+    async def close(self):
+        pass
+
+
+def test_load_during_flush():
+    async def main():
+        backend = Backend()
+        store = SettingsStore(backend)
+        store.set(1, "prefix", "?")
+        store._cache = type(store._cache)(10)
+
+        # The batch being written is seen by loads
+        backend.write_gate = asyncio.Event()
+        flush = asyncio.ensure_future(store.flush())
+        await asyncio.sleep(0)
+        assert (await store.load(1))["prefix"] == "?"
+        store._cache = type(store._cache)(10)
+
+        # A read from before the commit that returns after it is redone
+        backend.read_gate = read_gate = asyncio.Event()
+        load = asyncio.ensure_future(store.load(1))
+        await asyncio.sleep(0)
+        backend.write_gate.set()
+        await flush
+        read_gate.set()
+        assert (await load)["prefix"] == "?"
+        await store.close()
+
+    asyncio.run(main())
+
+
+def test_failed_flush():
+    async def main():
+        backend = Backend()
+        store = SettingsStore(backend)
+        store.set(1, "prefix", "?")
+        backend.fail = True
+        with pytest.raises(OSError):
+            await store.flush()
+        store.set(1, "locale", "pt-BR")
+
+        backend.fail = False
+        await store.close()
+        return backend.rows
+
+    assert asyncio.run(main()) == {(1, "prefix"): '"?"',
+                                   (1, "locale"): '"pt-BR"'}
+
+
+def test_sqlite(tmp_path):
+    path = str(tmp_path / "settings.db")
+
+    async def main():
+        store = SettingsStore(SQLiteBackend(path))
+        assert await store.get(1, "prefix") is None
+        store.set(1, "prefix", "?")
+        store.set(1, "mod_roles", [5])
+        assert store.get_cached(1, "prefix") == "?"
+        with pytest.raises(FrameworkException):
+            store.set(1, "unknown", 1)
+        await store.close()
+
+        store = SettingsStore(SQLiteBackend(path))
+        values = dict(await store.load(1))
+        store.set(1, "mod_roles", None)
+        await store.close()
+        return values
+
+    assert asyncio.run(main()) == {"prefix": "?", "locale": None,
+                                   "disabled_commands": [], "mod_roles": [5]}
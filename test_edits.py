@@ -0,0 +1,151 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+import asyncio
+import time
+
+from base import cache
+from base.cache import LRUCache
+from base.edits import DISCORD_EPOCH, EditTracker
+
+
+def snowflake(age=0):
+    return int((time.time() - age) * 1000 - DISCORD_EPOCH) << 22
+
+
+class Message:
+    def __init__(self, content, id=None):
+        self.id = id or snowflake()
+        self.content = content
+
+
+class Response:
+    def __init__(self, log, content):
+        self.log = log
+        self.content = content
+
+    async def edit(self, content=None, **kwargs):
+        self.log.append(("edit", self.content, content))
+        self.content = content
+
+    async def delete(self):
+        self.log.append(("delete", self.content))
+
+
+class FakeBot:
+    """ Runs a "command" sending one response per word of the message """
+    def __init__(self, edits):
+        self.edits = edits
+        self.log = []
+        self.processed = []
+
+    async def send(self, content=None, **kwargs):
+        self.log.append(("send", content))
+        return Response(self.log, content)
+
+    async def process_commands(self, message, prefix=None, triggers=True):
+        self.processed.append((message.content, prefix, triggers))
+        send = self.edits.track(message, prefix or "!", self.send)
+        for word in message.content[1:].split():
+            await send(word)
+
+
+def test_edit():
+    async def main():
+        edits = EditTracker()
+        bot = FakeBot(edits)
+        message = Message("!a b")
+        await bot.process_commands(message)
+        bot.log.clear()
+
+        # The first response is edited, the second one deleted
+        await edits.on_message_edit(bot, message, Message("!c", message.id))
+        log = list(bot.log)
+
+        # Embeds loading in don't count
+        bot.log.clear()
+        await edits.on_message_edit(
+            bot, Message("!c", message.id), Message("!c", message.id))
+        assert bot.log == []
+
+        # Edits can add responses
+        await edits.on_message_edit(
+            bot, Message("!c", message.id), Message("!d e", message.id))
+        return log, bot.log, bot.processed
+
+    log, relog, processed = asyncio.run(main())
+    assert log == [("edit", "a", "c"), ("delete", "b")]
+    assert relog == [("edit", "c", "d"), ("send", "e")]
+    assert processed == [("!a b", None, True), ("!c", "!", False),
+                         ("!d e", "!", False)]
+
+
+def test_untracked():
+    async def main():
+        edits = EditTracker(ttl=60)
+        bot = FakeBot(edits)
+        # A typo in a recent message is processed like a new message
+        recent = Message("!x", snowflake(age=10))
+        await edits.on_message_edit(bot, Message("?x", recent.id), recent)
+        old = Message("!y", snowflake(age=120))
+        await edits.on_message_edit(bot, Message("?y", old.id), old)
+        return bot.processed
+
+    assert asyncio.run(main()) == [("!x", None, False)]
+
+
+def test_files():
+    async def main():
+        edits = EditTracker(max_responses=1)
+        bot = FakeBot(edits)
+        message = Message("!a")
+        send = edits.track(message, "!", bot.send)
+        await send("a")
+        await send("b")
+        edits._entries.get(message.id).stale = [Response(bot.log, "a")]
+        bot.log.clear()
+        await send("c", file=object())
+        return bot.log, edits._entries.get(message.id).responses
+
+    log, responses = asyncio.run(main())
+    # Attachments can't be edited in
+    assert log == [("delete", "a"), ("send", "c")]
+    assert [r.content for r in responses] == ["a"]
+
+
+def test_ttl(monkeypatch):
+    now = [0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    lru = LRUCache(maxsize=2, ttl=10)
+    lru.set("a", 1)
+    lru.set("b", 2, ttl=30)
+    assert "a" in lru and lru.get("b") == 2
+    now[0] = 20
+    assert "a" not in lru and lru.get("a") is None
+    lru.set("c", 3)
+    lru.expire()
+    assert list(lru) == ["b", "c"]
+    now[0] = 40
+    lru.expire()
+    assert list(lru) == []
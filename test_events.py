@@ -0,0 +1,78 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+import asyncio
+
+import discord
+import pytest
+
+from base import Bot, Cog, listener
+from base.exceptions import FrameworkException
+
+
+class Greeter(Cog):
+    def __init__(self, bot):
+        self.joined = []
+        super().__init__(bot)
+
+    @listener()
+    async def on_member_join(self, member):
+        self.joined.append(member)
+
+    @listener("member_join")
+    async def broken(self, member):
+        raise ValueError(member)
+
+
+def test_listeners():
+    async def main():
+        bot = Bot(intents=discord.Intents.none())
+        errors = []
+
+        async def listener_error(event, func, error):
+            errors.append((event, func.__name__, repr(error)))
+        bot.listener_error = listener_error
+
+        cog = Greeter(bot)
+        bot.add_cog(cog)
+        bot.dispatch("member_join", "alice")
+        await asyncio.sleep(0.01)
+        bot.unload_cog("Greeter")
+        bot.dispatch("member_join", "bob")
+        await asyncio.sleep(0.01)
+        return bot, cog, errors
+
+    bot, cog, errors = asyncio.run(main())
+    # One failing listener doesn't stop the others
+    assert cog.joined == ["alice"]
+    assert errors == [("member_join", "broken", "ValueError('alice')")]
+    stats = bot.listeners.stats
+    assert stats["Greeter.on_member_join"].calls == 1
+    assert stats["Greeter.broken"].errors == 1
+    assert bot.listeners.get("member_join") is None
+
+
+def test_sync_listener():
+    with pytest.raises(FrameworkException):
+        listener()(lambda self: None)
@@ -0,0 +1,119 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+import asyncio
+import time
+
+import discord
+
+from base import host as host_module
+from base.host import Host
+from base.state import LocalState
+from utils.repl import deep_sizeof
+
+
+COG = '''
+from base import Cog, command
+
+
+class Greeter(Cog):
+    @command(coalesce=True)
+    async def hello(self, ctx):
+        await ctx.send("hello")
+
+
+def setup(bot):
+    bot.add_cog(Greeter(bot))
+'''
+
+
+def make_host(tmp_path, monkeypatch):
+    (tmp_path / "hostcog.py").write_text(COG)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    return Host(cogs=["hostcog"],
+                translation_file=str(tmp_path / "translations.json"))
+
+
+def test_tenants(tmp_path, monkeypatch):
+    host = make_host(tmp_path, monkeypatch)
+    state = LocalState()
+    a = host.add("a", "token", intents=discord.Intents.none(), state=state)
+    b = host.add("b", "token", intents=discord.Intents.none(), state=state)
+    c = host.add("c", "token", intents=discord.Intents.none())
+    assert a.bot.host is host
+
+    # Each bot has its own commands, sharing the function
+    hello_a = a.bot.get_command("hello")
+    hello_b = b.bot.get_command("hello")
+    assert hello_a is not hello_b and hello_a.func is hello_b.func
+    assert hello_a._inflight is not hello_b._inflight
+    assert hello_a.cog.bot is a.bot
+
+    # One translation engine per file
+    assert a.bot.translations is b.bot.translations is c.bot.translations
+
+    shared = {id(obj) for obj in host.shared()}
+    assert id(a.bot.translations) in shared
+    # Backends count as shared only when several bots use them
+    assert id(state) in shared
+    assert id(c.bot.state) not in shared
+
+    # A bot's estimate leaves out the others, reachable through the host
+    b.bot.blob = bytearray(1 << 20)
+    bots = {id(t.bot) for t in host.tenants.values()}
+    size = deep_sizeof(a.bot, shared | (bots - {id(a.bot)}))
+    assert size < 1 << 20
+
+    asyncio.run(host.remove("c"))
+    assert list(host.tenants) == ["a", "b"]
+
+
+def test_accounting(tmp_path, monkeypatch):
+    host = make_host(tmp_path, monkeypatch)
+    tenant = host.add("a", "token", intents=discord.Intents.none())
+
+    async def busy():
+        end = time.thread_time() + 0.05
+        while time.thread_time() < end:
+            pass
+        await asyncio.sleep(0)
+        # Tasks started by the tenant's tasks count too
+        await asyncio.ensure_future(asyncio.sleep(0))
+
+    async def main():
+        asyncio.get_running_loop().set_task_factory(host_module._task_factory)
+        token = host_module._tenant.set(tenant)
+        try:
+            task = asyncio.ensure_future(busy())
+
+        finally:
+            host_module._tenant.reset(token)
+        await task
+        # Tasks started outside of a tenant aren't counted
+        await asyncio.ensure_future(busy())
+
+    asyncio.run(main())
+    assert tenant.tasks == 2
+    assert 0.05 <= tenant.cpu < 0.1
+    assert host.usage() == [("a", tenant.cpu, 2, 0)]
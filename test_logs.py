@@ -0,0 +1,107 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+import io
+import json
+import logging
+
+from base.logs import (BoundedQueueHandler, JSONFormatter, SamplingFilter,
+                       setup_logging)
+
+
+def record(msg, *args, level=logging.INFO, **kwargs):
+    return logging.LogRecord("test", level, __file__, 1, msg, args,
+                             kwargs.get("exc_info"))
+
+
+def test_formatter():
+    rec = record("ran %s", "ping")
+    rec.fields = {"command": "ping", "latency": 0.5}
+    data = json.loads(JSONFormatter().format(rec))
+    assert data["message"] == "ran ping" and data["level"] == "INFO"
+    assert (data["command"], data["latency"]) == ("ping", 0.5)
+    assert "exception" not in data
+
+
+def test_sampling():
+    sampler = SamplingFilter({"DEBUG": 3, logging.INFO: 1})
+    kept = [sampler.filter(record("x", level=logging.DEBUG))
+            for _ in range(6)]
+    assert kept == [True, False, False, True, False, False]
+    assert sampler.filter(record("x")) and sampler.filter(record("x"))
+    assert sampler.filter(record("x", level=logging.ERROR))
+
+
+def test_queue():
+    handler = BoundedQueueHandler(maxsize=2)
+    try:
+        raise ValueError("boom")
+    except ValueError as e:
+        handler.handle(record("failed %d", 1, exc_info=(
+            type(e), e, e.__traceback__)))
+
+    # Messages and tracebacks are rendered before they are queued
+    queued = handler.queue.get_nowait()
+    assert (queued.msg, queued.args, queued.exc_info) == ("failed 1", None,
+                                                          None)
+    assert "ValueError: boom" in queued.exc_text
+    assert "ValueError: boom" in JSONFormatter().format(queued)
+
+    # A full queue drops records without blocking, and reports it later
+    for i in range(5):
+        handler.handle(record("r%d", i))
+    assert handler.dropped == 3
+    handler.queue.get_nowait()
+    handler.queue.get_nowait()
+    handler.handle(record("r5"))
+    assert handler.dropped == 0
+    note = handler.queue.get_nowait()
+    assert note.getMessage() == ("Dropped 3 log records, the log sink is "
+                                 "too slow")
+    assert handler.queue.get_nowait().getMessage() == "r5"
+
+
+def test_setup():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    stream = io.StringIO()
+    listener = setup_logging(stream=stream, level=logging.DEBUG,
+                             sampling={"DEBUG": 2})
+    try:
+        log = logging.getLogger("base.test")
+        for i in range(4):
+            log.debug("debug %d", i)
+        log.info("ran", extra={"fields": {"guild": 1}})
+
+    finally:
+        listener.stop()
+        # Stopping again, as at exit, does nothing
+        listener.stop()
+        root.handlers[:] = handlers
+        root.setLevel(level)
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [line["message"] for line in lines] == ["debug 0", "debug 2",
+                                                   "ran"]
+    assert lines[-1]["guild"] == 1 and lines[-1]["logger"] == "base.test"
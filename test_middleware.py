@@ -0,0 +1,135 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+import asyncio
+import inspect
+
+import pytest
+
+from base.exceptions import FrameworkException
+from base.middleware import (compile_stage, DisabledCommands, Middleware,
+                             MiddlewarePipeline)
+
+
+def test_compile_stage():
+    calls = []
+
+    def first(message):
+        calls.append(("first", message))
+
+    def stop(message):
+        calls.append(("stop", message))
+        return False
+
+    async def later(message):
+        calls.append(("later", message))
+
+    assert compile_stage("pre_parse", []) is None
+
+    stage = compile_stage("pre_parse", [first, first])
+    # Sync middlewares make a sync stage
+    assert not inspect.iscoroutinefunction(stage)
+    assert stage("hi") is True
+    assert calls == [("first", "hi")] * 2
+
+    calls.clear()
+    stage = compile_stage("pre_parse", [first, later, stop, first])
+    assert asyncio.run(stage("hi")) is False
+    assert calls == [("first", "hi"), ("later", "hi"), ("stop", "hi")]
+
+
+class Logger(Middleware):
+    def __init__(self):
+        self.seen = []
+
+    def pre_parse(self, message):
+        self.seen.append(message)
+
+    async def post_invoke(self, ctx, error):
+        self.seen.append(error)
+
+
+def test_pipeline():
+    pipeline = MiddlewarePipeline()
+    logger = Logger()
+    pipeline.add(logger)
+    assert pipeline.pre_parse("hi") is True
+    assert asyncio.run(pipeline.post_invoke(None, "error")) is True
+    assert pipeline.post_lookup is None
+    assert logger.seen == ["hi", "error"]
+
+    pipeline.add(lambda ctx: False, "post_lookup")
+    assert pipeline.post_lookup(None) is False
+
+    pipeline.remove(logger)
+    assert pipeline.pre_parse is None and pipeline.post_invoke is None
+
+    with pytest.raises(FrameworkException):
+        pipeline.add(print, "pre_send")
+    with pytest.raises(FrameworkException):
+        pipeline.add(object())
+
+
+class Store:
+    def __init__(self, settings):
+        self.settings = settings
+
+    def get_cached(self, guild_id, key):
+        return self.settings.get(guild_id, {}).get(key)
+
+    def set(self, guild_id, key, value):
+        self.settings.setdefault(guild_id, {})[key] = value
+
+
+class Guild:
+    def __init__(self, id):  # noqa pylint: disable=redefined-builtin
+        self.id = id
+
+
+class Command:
+    def __init__(self, name):
+        self.name = name
+
+
+class Context:
+    def __init__(self, guild, name):
+        self.guild = guild
+        self.command = Command(name)
+
+
+def test_disabled_commands():
+    store = Store({1: {"disabled_commands": ["ban"]}})
+    disabled = DisabledCommands(store)
+
+    assert disabled.is_disabled(1, "ban")
+    assert not disabled.post_lookup(Context(Guild(1), "ban"))
+    assert disabled.post_lookup(Context(Guild(1), "kick"))
+    assert disabled.post_lookup(Context(Guild(2), "ban"))
+    assert disabled.post_lookup(Context(None, "ban"))
+
+    disabled.disable(1, "kick")
+    disabled.enable(1, "ban")
+    assert disabled.disabled(1) == ["kick"]
+    assert store.settings[1]["disabled_commands"] == ["kick"]
+    assert not disabled.post_lookup(Context(Guild(1), "kick"))
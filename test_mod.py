@@ -0,0 +1,184 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+import asyncio
+import datetime
+
+import discord
+
+from base import Bot, Storage
+from cogs.mod import Moderation
+from utils.bulk import parse_targets, resolve_targets, BulkWorker
+
+
+NOW = datetime.datetime(2017, 8, 1, 12, 0)
+
+
+class Member(discord.Member):
+    id = top_role = joined_at = None
+
+    def __init__(self, id, top_role, joined=60):  # noqa pylint: disable=redefined-builtin
+        self.id = id
+        self.top_role = top_role
+        self.joined_at = NOW - datetime.timedelta(minutes=joined)
+
+    def __repr__(self):
+        return f"<Member {self.id}>"
+
+    __str__ = __repr__
+
+
+class Guild:
+    owner_id = 1
+
+    def __init__(self):
+        self.owner = Member(1, 0)
+        self.me = Member(2, 9)
+        self.moderator = Member(3, 5)
+        self.other_moderator = Member(4, 5, joined=1)
+        self.members = [self.owner, self.me, self.moderator,
+                        self.other_moderator,
+                        *(Member(i, 1, joined=1) for i in range(10, 25))]
+
+
+class Channel:
+    id = 7
+
+
+class Message:
+    channel = Channel()
+    created_at = NOW
+
+    def __init__(self, author=None, content=""):
+        self.author = author
+        self.content = content
+
+
+class Context:
+    def __init__(self, guild, author):
+        self.guild = guild
+        self.author = author
+        self.channel = Channel()
+        self.message = Message(author)
+        self.sent = []
+
+    async def send(self, content):
+        self.sent.append(content)
+        return self
+
+    async def edit(self, content):
+        pass
+
+
+def test_rules_load_on_reload(tmp_path):
+    async def main():
+        storage = Storage(str(tmp_path / "bot.db"))
+        bot = Bot(intents=discord.Intents.none(), storage=storage)
+        moderation = storage.namespace("moderation")
+        moderation.put("automod:1", {"terms": ["idiot"]})
+        moderation.put("antispam:1", "kick")
+        await storage.flush()
+
+        # Loaded into a running bot, no on_ready follows
+        bot.load_cog("cogs.mod")
+        cog = bot._cogs["Moderation"]
+        await cog._loading
+        bot.unload_cog("Moderation")
+        await storage.close()
+        return cog
+
+    cog = asyncio.run(main())
+    assert cog.automod.rules(1).terms == {"idiot"}
+    assert cog.spam_actions == {1: "kick"}
+
+
+def test_targets():
+    assert parse_targets("<@10> <@!11> 123456789012345678 joined:5 spam") \
+        == ({10, 11, 123456789012345678}, 5, "spam")
+
+    guild = Guild()
+    targets = resolve_targets(guild, {10, 99}, 5, NOW)
+    assert [t.id for t in targets] == [4, *range(10, 25), 99]
+    assert not isinstance(targets[-1], discord.Member)
+    assert [t.id for t in resolve_targets(guild, {10, 99}, missing=False)] \
+        == [10]
+
+
+def test_bulk_worker():
+    attempts = []
+
+    async def action(target):
+        attempts.append(target)
+        if target == 3:
+            raise discord.HTTPException(type("Response", (), {
+                "status": 403, "reason": "Forbidden"}), "Missing access")
+
+    worker = BulkWorker(concurrency=2)
+    assert asyncio.run(worker.run(range(5), action, "ban")) == (4, 1)
+    assert sorted(attempts) == list(range(5))
+
+
+def test_bulk_hierarchy():
+    async def main(author, text, reply=None):
+        bot = Bot(intents=discord.Intents.none())
+        cog = Moderation(bot)
+        cog.confirm_over = 3
+        cog.bulk.limiter.rates = {}
+        guild = Guild()
+        ctx = Context(guild, getattr(guild, author))
+        done = []
+
+        async def wait_for(event, timeout, check):
+            if reply is None:
+                raise asyncio.TimeoutError()
+            message = Message(ctx.author, reply)
+            assert check(message)
+            return message
+        bot.wait_for = wait_for
+
+        async def kick(target, reason):
+            done.append(target.id)
+
+        await cog._bulk(ctx, text, "kick", kick)
+        cog.cog_unload()
+        return sorted(done), ctx.sent
+
+    # The owner and moderators as high as the author are skipped
+    done, sent = asyncio.run(main("moderator", "<@1> <@4> <@10> <@11>"))
+    assert done == [10, 11]
+    done, sent = asyncio.run(main("moderator", "<@1> <@3> <@4>"))
+    assert done == [] and sent == ["No targets found. Skipping 3 you "
+                                   "can't kick."]
+    # The owner outranks everyone
+    done, _ = asyncio.run(main("owner", "<@2> <@3> <@4>"))
+    assert done == [3, 4]
+
+    # Big mass actions need a yes
+    done, sent = asyncio.run(main("moderator", "joined:5"))
+    assert done == [] and sent[-1] == "Cancelled."
+    assert sent[0].startswith("This will kick 15 members. Skipping 1")
+    done, _ = asyncio.run(main("moderator", "joined:5", reply="no"))
+    assert done == []
+    done, _ = asyncio.run(main("moderator", "joined:5", reply="Yes"))
+    assert done == list(range(10, 25))
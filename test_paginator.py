@@ -0,0 +1,96 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+import asyncio
+
+from base import Context, Paginator
+from base.paginator import iter_repr
+
+
+def test_pages():
+    paginator = Paginator(prefix="", suffix="", limit=10)
+    assert list(paginator.pages("abc\ndef\nghi\njkl\n")) == [
+        "abc\ndef\n", "ghi\njkl\n"]
+    # Lines longer than a page are cut
+    assert list(paginator.pages(["x" * 25])) == ["x" * 10, "x" * 10, "x" * 5]
+
+    paginator = Paginator(limit=30, max_pages=2)
+    pages = list(paginator.pages(f"line {i}\n" for i in range(100)))
+    assert len(pages) == 2
+    assert all(len(page) <= 30 for page in pages)
+    assert pages[0].startswith("```py\nline 0\n")
+    assert pages[1].endswith("[output truncated]\n```")
+    # Content can't close the code block
+    assert "```" not in list(paginator.pages("a```b"))[0][6:-4]
+
+
+def test_pages_are_lazy():
+    read = []
+
+    def chunks():
+        for i in range(1000):
+            read.append(i)
+            yield "x" * 100 + "\n"
+
+    pages = Paginator(max_pages=2).pages(chunks())
+    next(pages)
+    assert len(read) < 30
+    list(pages)
+    assert len(read) < 50
+
+
+def test_iter_repr():
+    assert list(iter_repr([1, 2])) == ["[1, 2]"]
+    lines = list(iter_repr(dict.fromkeys(range(500))))
+    assert lines[0] == "{\n" and lines[1] == " 0: None,\n"
+    assert lines[-2:] == [" ... 300 more\n", "}"]
+    assert len(list(iter_repr("x" * 1000))[0]) < 300
+
+
+def test_send_paginated():
+    class Message:
+        def __init__(self, content):
+            self.content = content
+
+        async def edit(self, content):
+            self.content = content
+
+    sent = []
+
+    async def send(content, **kwargs):
+        sent.append(content)
+        return Message(content)
+
+    async def main():
+        ctx = Context(send=send)
+        first = Message("Running...")
+        paginator = Paginator(prefix="", suffix="", limit=5)
+        messages = await ctx.send_paginated(["1234\n5678\n90"], paginator,
+                                            edit=first)
+        return first, messages
+
+    first, messages = asyncio.run(main())
+    assert first.content == "1234\n"
+    assert messages[0] is first
+    assert sent == ["5678\n", "90"]
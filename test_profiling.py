@@ -0,0 +1,105 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+import asyncio
+import cProfile
+import tracemalloc
+
+import discord
+
+from base import Bot, command
+from utils.profiling import (format_table, stats_table, snapshot_table,
+                             CommandProfiler)
+
+
+class Channel:
+    id = 10
+
+    async def send(self, content=None, **kwargs):
+        pass
+
+
+class Author:
+    id = 2
+    bot = False
+
+
+class Message:
+    author = Author()
+    channel = Channel()
+    guild = None
+
+    def __init__(self, content):
+        self.content = content
+
+
+def work():
+    return sum(range(1000))
+
+
+def test_tables():
+    assert format_table(("name", "n"), [("a", 10), ("bb", 2)]) == (
+        "name  n\n"
+        "----  --\n"
+        "a     10\n"
+        "bb    2")
+
+    profile = cProfile.Profile()
+    profile.runcall(work)
+    table = stats_table(profile, limit=5)
+    assert table.splitlines()[0].endswith("sorted by cumulative")
+    assert "test_profiling.py" in table and "_lsprof" not in table
+
+    tracemalloc.start()
+    try:
+        old = tracemalloc.take_snapshot()
+        kept = [bytearray(1000) for _ in range(100)]
+        new = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    table = snapshot_table(old, new, limit=3)
+    assert "test_profiling.py" in table and kept
+
+
+def test_command_profiler():
+    async def main():
+        bot = Bot(prefix="!", intents=discord.Intents.none())
+
+        async def ping(ctx):
+            work()
+
+        ping = command(bot=bot)(ping)
+        profiler = CommandProfiler(ping, 2)
+        profiler.install()
+        assert CommandProfiler.is_profiling(ping)
+        for _ in range(3):
+            await bot.process_commands(Message("!ping"))
+        assert profiler.done.done()
+        return profiler, ping
+
+    profiler, ping = asyncio.run(main())
+    # Only the first two invocations are profiled
+    assert profiler.invocations == 2
+    assert not CommandProfiler.is_profiling(ping)
+    assert "work" in stats_table(profiler.profile)
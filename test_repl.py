@@ -0,0 +1,75 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+import sys
+
+from utils.repl import SessionManager, deep_sizeof
+
+
+def test_deep_sizeof():
+    data = [bytes(1000), {"key": bytes(2000)}]
+    assert deep_sizeof(data) > 3000
+
+    # Shared objects are counted once, modules and functions not at all
+    seen = set()
+    first = deep_sizeof(data, seen)
+    assert deep_sizeof(data, seen) == 0
+    assert deep_sizeof([data, data]) < first + 200
+    assert deep_sizeof(sys) == 0
+    numbers = list(range(1000, 2000))
+    assert deep_sizeof(numbers, limit=10) == (sys.getsizeof(numbers) +
+                                              9 * sys.getsizeof(1000))
+
+
+def test_trim():
+    session = SessionManager().get(1)
+    session.env.update(big=bytes(100000), small=bytes(10), __builtins__={},
+                       _=bytes(50000))
+    session._ = session.env["_"]
+
+    names = [name for name, _ in session.bindings()]
+    assert names == ["big", "_", "small"]
+    assert session.trim(60000) == ["big"]
+    assert session.trim(1000) == ["_"]
+    assert session._ is None
+    assert set(session.env) == {"small", "__builtins__"}
+
+
+def test_sessions(monkeypatch):
+    now = [0]
+    monkeypatch.setattr("utils.repl.time.monotonic", lambda: now[0])
+    sessions = SessionManager(max_sessions=2, idle_timeout=60)
+
+    first = sessions.get(1)
+    assert sessions.get(1) is first
+    sessions.get(2)
+    sessions.get(1)
+    # The least recently used session goes
+    sessions.get(3)
+    assert len(sessions) == 2 and sessions.get(1) is first
+
+    now[0] = 61
+    sessions.get(4)
+    assert len(sessions) == 1
+    assert sessions.get(1) is not first
@@ -0,0 +1,67 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+import asyncio
+
+from utils.sandbox import SandboxPool
+
+
+def test_sandbox():
+    async def main():
+        pool = SandboxPool(size=1, timeout=2, cpu_seconds=1)
+        output = []
+        try:
+            results = [
+                await pool.run("_ = 6 * 7"),
+                await pool.run("print('hi')\nprint(bot.guilds)",
+                               state={"guilds": 3},
+                               on_output=output.append),
+                await pool.run("_ = bot.query('double', 21)",
+                               queries={"double": lambda n: n * 2}),
+                await pool.run("bot.query('unknown')"),
+                await pool.run("import asyncio\nawait asyncio.sleep(0)\n"
+                               "_ = 'awaited'"),
+            ]
+            worker = pool._workers[0]
+            # Runaway code is stopped, by wall clock or CPU time
+            timed_out = await pool.run("import time\ntime.sleep(10)")
+            killed = worker not in pool._workers
+            pool.timeout = 30
+            cpu = await pool.run("while True: pass")
+            after = await pool.run("_ = 'still works'")
+        finally:
+            pool.close()
+        return results, output, timed_out, killed, cpu, after
+
+    results, output, timed_out, killed, cpu, after = asyncio.run(main())
+    assert results[0] == ("result", "42")
+    assert results[1] == ("result", None)
+    assert "".join(output) == "hi\n3\n"
+    assert results[2] == ("result", "42")
+    assert results[3][0] == "error" and "Unknown query" in results[3][1]
+    assert results[4] == ("result", "'awaited'")
+    assert timed_out == ("error", "Timed out after 2 seconds")
+    assert killed
+    assert cpu[0] == "error" and "CPUTimeExceeded" in cpu[1]
+    assert after == ("result", "'still works'")
@@ -0,0 +1,150 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from base import state as state_module
+from base.exceptions import FrameworkException
+from base.state import LocalState, SharedMemoryState, StateServer, TCPState
+from base.triggers import Trigger
+
+
+class Clock:
+    def __init__(self, monkeypatch):
+        self.now = 1000.0
+        monkeypatch.setattr(state_module.time, "monotonic", lambda: self.now)
+        monkeypatch.setattr(state_module.time, "time", lambda: self.now)
+
+
+def test_local(monkeypatch):
+    async def main():
+        clock = Clock(monkeypatch)
+        state = LocalState(sweep=3)
+        await state.set("a", 1, ttl=10)
+        await state.set("b", 2)
+        assert await state.incr("c", ttl=10) == 1
+        # The ttl is kept from when the key was created
+        clock.now += 5
+        assert await state.incr("c", 2, ttl=100) == 3
+        assert (await state.get("a"), await state.get("b")) == (1, 2)
+
+        clock.now += 6
+        assert await state.get("a", "gone") == "gone"
+        assert await state.incr("c") == 1
+        await state.delete("b")
+        assert await state.get("b") is None
+
+        # Every `sweep` writes drop all the expired keys
+        await state.set("d", 4, ttl=1)
+        clock.now += 2
+        await state.set("e", 5)
+        await state.set("f", 6)
+        return sorted(state._data)
+
+    assert asyncio.run(main()) == ["c", "e", "f"]
+
+
+def test_shared_memory(monkeypatch):
+    async def main():
+        clock = Clock(monkeypatch)
+        state = SharedMemoryState(slots=16, record_size=64)
+        # Workers attach to the same memory
+        other = SharedMemoryState.__new__(SharedMemoryState)
+        other.__setstate__(state.__getstate__())
+        try:
+            await state.set("a", {"x": 1}, ttl=10)
+            assert await other.get("a") == {"x": 1}
+            assert await other.incr("n", ttl=10) == 1
+            assert await state.incr("n", 4) == 5
+
+            with pytest.raises(FrameworkException):
+                await state.set("big", "x" * 64)
+
+            # Keys hashing to full slots evict the first one
+            for i in range(40):
+                await state.set(f"k{i}", i)
+            assert await state.get("k39") == 39
+
+            clock.now += 11
+            assert await other.get("a") is None
+            assert await state.incr("n") == 1
+            await other.delete("n")
+            assert await state.get("n", 0) == 0
+
+        finally:
+            await other.close()
+            await state.close()
+
+    asyncio.run(main())
+
+
+def test_tcp():
+    async def main():
+        server = StateServer(port=0)
+        await server.start()
+        port = server._server.sockets[0].getsockname()[1]
+        state = TCPState(port=port)
+        try:
+            await state.set("a", [1, 2])
+            assert await state.get("a") == [1, 2]
+            assert await state.incr("n", 2) == 2
+
+            # A dropped connection fails the call, the next one reconnects
+            state._writer.transport.abort()
+            with pytest.raises(FrameworkException):
+                await state.get("a")
+            assert await state.incr("n") == 3
+            await state.delete("a")
+            assert await state.get("a", "gone") == "gone"
+
+        finally:
+            await state.close()
+            await server.close()
+
+    asyncio.run(main())
+
+
+def test_trigger_cooldown(monkeypatch):
+    async def main():
+        clock = Clock(monkeypatch)
+        state = LocalState()
+
+        async def hello(message, match):
+            pass
+
+        trig = Trigger(hello, None, 30, "channel")
+        here = SimpleNamespace(channel=SimpleNamespace(id=1))
+        there = SimpleNamespace(channel=SimpleNamespace(id=2))
+        ready = [await trig.ready(here, state), await trig.ready(here, state),
+                 await trig.ready(there, state)]
+        clock.now += 31
+        ready.append(await trig.ready(here, state))
+        always = Trigger(hello, None, None, "channel")
+        ready.append(await always.ready(here, state))
+        return ready
+
+    assert asyncio.run(main()) == [True, False, True, True, True]
@@ -0,0 +1,102 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+import asyncio
+import sqlite3
+
+import pytest
+
+from base import Storage
+from base.exceptions import FrameworkException
+
+
+def test_namespace(tmp_path):
+    async def main():
+        storage = Storage(str(tmp_path / "bot.db"))
+        ns = storage.namespace("tags")
+        assert storage.namespace("tags") is ns
+        await ns.put("a", {"text": "hi"})
+        ns.put_many({f"b{i}": i for i in range(1000)})
+        await storage.namespace("other").put("a", 1)
+        await ns.delete("b0")
+
+        result = (await ns.get("a"), await ns.get("missing", 5),
+                  len(await ns.get_many(f"b{i}" for i in range(1000))),
+                  await ns.keys("b99"))
+        await storage.close()
+        return result
+
+    assert asyncio.run(main()) == ({"text": "hi"}, 5, 999,
+                                   ["b99", "b990", "b991", "b992", "b993",
+                                    "b994", "b995", "b996", "b997", "b998",
+                                    "b999"])
+
+
+def test_batched_writes(tmp_path):
+    async def main():
+        storage = Storage(str(tmp_path / "bot.db"))
+        await storage.ready()
+        commits = []
+        run = storage.pool.run
+
+        async def counting(func, *args):
+            commits.append(func)
+            return await run(func, *args)
+        storage.pool.run = counting
+
+        ns = storage.namespace("counts")
+        writes = [ns.put(i, i) for i in range(100)]
+        # A bad write fails alone, the others still commit
+        bad = storage.write("INSERT INTO missing VALUES (?)", [(1,)])
+        results = await asyncio.gather(*writes, bad, return_exceptions=True)
+        await storage.close()
+        return len(commits), results
+
+    commits, results = asyncio.run(main())
+    assert results[:100] == [1] * 100
+    assert isinstance(results[100], sqlite3.OperationalError)
+    # One failed batch, then one write at a time
+    assert commits == 102
+
+
+def test_table(tmp_path):
+    async def main():
+        storage = Storage(str(tmp_path / "bot.db"))
+        warns = storage.namespace("mod").table(
+            "warns", "guild", "user", "reason", primary_key=("guild", "user"))
+        await warns.insert_many([
+            {"guild": 1, "user": 2, "reason": "spam"},
+            {"guild": 1, "user": 3, "reason": "caps"}])
+        await warns.insert(guild=1, user=2, reason="flood")
+        await warns.delete(user=3)
+        rows = await warns.select(guild=1)
+        with pytest.raises(FrameworkException):
+            await warns.select(nope=1)
+        await storage.close()
+        return rows
+
+    assert asyncio.run(main()) == [{"guild": 1, "user": 2,
+                                    "reason": "flood"}]
+    with pytest.raises(FrameworkException):
+        Storage(":memory:").namespace("mod").table("x; DROP", "a")
@@ -0,0 +1,98 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+import json
+import os
+
+import pytest
+
+from base.catalog import Catalog, write_catalog
+from base.exceptions import SyntaxError  # noqa pylint: disable=redefined-builtin
+from base.translations import LocaleEngine
+
+
+DATA = {"en": {"hello": "Hello {name}!",
+               "items": {"one": "{count} item", "other": "{count} items"},
+               "command.ping": "ping"},
+        "pt-BR": {"hello": "Olá {name}!", "command.ping": "pingue"}}
+
+
+def test_missing_file(tmp_path):
+    filename = tmp_path / "translations"
+    engine = LocaleEngine(str(filename))
+    assert engine.render("hello") == "hello"
+    assert engine.command_names == {}
+
+    filename.write_text(json.dumps({"en": {"hello": "Hello {name}!"}}))
+    assert engine.refresh()
+    assert engine.render("hello", {"name": "Clara"}) == "Hello Clara!"
+
+
+def test_catalog(tmp_path):
+    target = str(tmp_path / "translations.catalog")
+    write_catalog(DATA, target, (1, 2))
+    assert os.listdir(tmp_path) == ["translations.catalog"]
+
+    catalog = Catalog(target)
+    assert catalog.source_stat == (1, 2)
+    assert sorted(catalog) == ["en", "pt-BR"]
+    assert dict(catalog["en"]) == DATA["en"]
+    assert catalog["pt-BR"]["hello"] == "Olá {name}!"
+    assert "missing" not in catalog["en"]
+    catalog.close()
+
+
+def test_damaged_catalog(tmp_path):
+    target = str(tmp_path / "translations.catalog")
+    write_catalog(DATA, target)
+    with open(target, "rb") as f:
+        raw = f.read()
+
+    # Cut anywhere, even inside the string table
+    for size in range(len(raw)):
+        with open(target, "wb") as f:
+            f.write(raw[:size])
+        with pytest.raises(SyntaxError):
+            Catalog(target)
+
+
+def test_engine_catalog(tmp_path):
+    filename = tmp_path / "translations"
+    filename.write_text(json.dumps(DATA))
+    LocaleEngine(str(filename))
+    engine = LocaleEngine(str(filename))
+    assert isinstance(engine.data, Catalog)
+    assert engine.render("hello", {"name": "Clara"}, "pt-BR") == "Olá Clara!"
+    assert engine.render("items", {"count": 2}) == "2 items"
+    assert engine.command_names["pt-BR"] == {"ping": ("pingue",)}
+
+    # A damaged catalog is rebuilt from the JSON, the old one is closed
+    old = engine.data
+    with open(engine.catalog, "r+b") as f:
+        f.truncate(10)
+    filename.write_text(json.dumps({"en": {"hello": "Hi"}}))
+    assert engine.refresh()
+    assert engine.render("hello") == "Hi"
+    assert old._map.closed
+    assert isinstance(LocaleEngine(str(filename)).data, Catalog)
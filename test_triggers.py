@@ -0,0 +1,112 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+import asyncio
+import re
+
+import discord
+
+from base import Bot, Cog
+from base.triggers import TriggerIndex, trigger
+
+
+class Channel:
+    id = 1
+
+
+class Message:
+    channel = Channel()
+
+    def __init__(self, content):
+        self.content = content
+
+
+class Owner:
+    @trigger("hi")
+    async def hi(self, message, match):
+        pass
+
+    @trigger("hit")
+    async def hit(self, message, match):
+        pass
+
+    @trigger(r"\bhel\b", re.I)
+    async def hel(self, message, match):
+        pass
+
+    @trigger(r"\bhello\b", re.I)
+    async def hello(self, message, match):
+        pass
+
+
+def fired(index, content):
+    return sorted((t.func.__name__, m.group())
+                  for t, m in index.scan(Message(content)))
+
+
+def test_overlapping_keywords():
+    index = TriggerIndex()
+    index.add_owner(Owner())
+
+    assert fired(index, "hit me") == [("hi", "hi"), ("hit", "hit")]
+    assert fired(index, "oh hi") == [("hi", "hi")]
+    assert fired(index, "HELLO there") == [("hello", "HELLO")]
+    # Shorter keywords still need their word boundary
+    assert fired(index, "hello hel") == [("hel", "hel"), ("hello", "hello")]
+    assert fired(index, "helloo") == []
+
+
+class Author:
+    id = 2
+    bot = False
+
+
+class ChatMessage(Message):
+    author = Author()
+    guild = None
+
+
+class Replies(Cog):
+    def __init__(self, bot):
+        self.seen = []
+        super().__init__(bot)
+
+    @trigger("hit")
+    async def hit(self, message, match):
+        self.seen.append(message.content)
+
+
+def test_prefixed_and_edited_messages():
+    async def run():
+        bot = Bot(intents=discord.Intents.none())
+        cog = Replies(bot)
+        # Prefixed messages that aren't commands run triggers too
+        await bot.process_commands(ChatMessage("!nothing hit"))
+        # Edits are re-processed without running them again
+        await bot.process_commands(ChatMessage("hit again"), triggers=False)
+        await asyncio.sleep(0)
+        return cog.seen
+
+    assert asyncio.new_event_loop().run_until_complete(run()) == [
+        "!nothing hit"]
@@ -0,0 +1,395 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+import asyncio
+import contextlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Not on POSIX, rollups and queries may overlap
+    fcntl = None
+
+from base import CheckFailed
+
+
+__all__ = ["Analytics", "RECORD", "AGGREGATE", "OK", "ERROR", "DENIED"]
+
+
+# timestamp, command id, guild id, latency in ms, outcome
+RECORD = struct.Struct("<IIQfB")
+# command id, guild id, uses, errors, total and max latency in ms
+AGGREGATE = struct.Struct("<IQIIdf")
+
+# Command outcomes
+OK, ERROR, DENIED = range(3)
+
+
+def _alive(pid):
+    if fcntl is None:
+        # os.kill would terminate it on Windows
+        return True
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+@contextlib.contextmanager
+def _mapped(path, fmt):
+    """ Maps a file read-only, yields a view of its whole records """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        size -= size % fmt.size
+        if not size:
+            # Empty files can't be mapped, a partial record isn't read
+            yield b""
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)[:size]
+            try:
+                yield view
+            finally:
+                view.release()
+
+
+def _add(totals, key, values):
+    # values are uses, errors, total and max latency
+    row = totals.get(key)
+    if row is None:
+        totals[key] = list(values)
+    else:
+        row[0] += values[0]
+        row[1] += values[1]
+        row[2] += values[2]
+        row[3] = max(row[3], values[3])
+
+
+# Shared instances by resolved directory, see `Analytics.open`
+_instances = {}
+
+
+class Analytics:
+    """ Records every command invocation to append-only segment files
+
+    `record` is a post_invoke middleware: it packs a fixed-width record
+    into a buffer and returns, a background task appends the buffer to
+    the segment of its hour every `interval` seconds. Command names are
+    numbered, the numbers are kept in `commands.<pid>.json` next to the
+    segments.
+
+    Segments belong to one process, named `<hour>.<pid>.seg`, so the
+    shard workers of a launcher can share the directory. Once an hour is
+    over, a process rolls its segment up into the per command and guild
+    totals of the hour, `<hour>.agg`, numbered by `commands.json`. It
+    also rolls up the segments of processes that died. Rollups and
+    queries lock the directory, so a query never sees a segment both
+    rolled up and still there. Bots of one process share an instance,
+    see `open`.
+    """
+    def __init__(self, path, interval=5):
+        self.path = path
+        self.interval = interval
+        self.pid = os.getpid()
+        self.users = 0
+        self._buffer = bytearray()
+        self._flusher = None
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+        self.names = self._names(self.pid)
+        self.ids = {name: i for i, name in enumerate(self.names)}
+        self._saved = len(self.names)
+
+    @classmethod
+    def open(cls, path, interval=5):
+        """ Returns the process' instance for the directory `path`,
+        created on first use. Every `open` is paired with a `close` """
+        key = os.path.realpath(path)
+        analytics = _instances.get(key)
+        if analytics is None or analytics.pid != os.getpid():
+            analytics = _instances[key] = cls(path, interval)
+        analytics.users += 1
+        return analytics
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _names(self, pid=None):
+        """ The command names of a process, or of the aggregates """
+        name = "commands.json" if pid is None else f"commands.{pid}.json"
+        try:
+            with open(self._file(name), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+    def _save_names(self, names, pid=None):
+        target = self._file("commands.json" if pid is None else
+                            f"commands.{pid}.json")
+        with open(target + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(names, f)
+        os.replace(target + ".tmp", target)
+
+    @contextlib.contextmanager
+    def _locked(self, exclusive):
+        """ Locks the directory against other processes' rollups, shared
+        to read it, exclusive to roll up """
+        with self._lock, open(self._file("lock"), "a",
+                              encoding="utf-8") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+
+    def _command_id(self, name):
+        self.ids[name] = len(self.names)
+        self.names.append(name)
+        return self.ids[name]
+
+    def record(self, ctx, error):
+        """ The post_invoke middleware, install it with
+        `bot.add_middleware(analytics.record, "post_invoke")` """
+        name = ctx.command.name
+        command_id = self.ids.get(name)
+        if command_id is None:
+            command_id = self._command_id(name)
+
+        if error is None:
+            outcome = OK
+        elif isinstance(error, CheckFailed):
+            outcome = DENIED
+        else:
+            outcome = ERROR
+
+        self._buffer += RECORD.pack(
+            int(time.time()), command_id, ctx.guild.id if ctx.guild else 0,
+            ctx.elapsed * 1000, outcome)
+
+        if self._flusher is None:
+            self._flusher = asyncio.ensure_future(self._flush_loop())
+        return True
+
+    async def _flush_loop(self):
+        loop = asyncio.get_event_loop()
+        hour = int(time.time()) // 3600
+        # Segments left behind by processes that died, a restarted worker
+        # picks up those of the worker it replaces
+        await loop.run_in_executor(None, self.rollup, hour)
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+            if int(time.time()) // 3600 != hour:
+                hour = int(time.time()) // 3600
+                await loop.run_in_executor(None, self.rollup, hour)
+
+    async def flush(self):
+        """ Appends the buffered records to their segments """
+        data, self._buffer = self._buffer, bytearray()
+        await asyncio.get_event_loop().run_in_executor(
+            None, self._append, data)
+
+    def _append(self, data):
+        if len(self.names) != self._saved:
+            names = self.names[:]
+            self._save_names(names, self.pid)
+            self._saved = len(names)
+
+        if not data:
+            return
+
+        first = int.from_bytes(data[0:4], "little") // 3600
+        last = int.from_bytes(data[-RECORD.size:-RECORD.size + 4],
+                              "little") // 3600
+        if first == last:
+            chunks = {first: data}
+
+        else:
+            # The buffer spans an hour boundary, split it by hour
+            chunks = {}
+            for offset in range(0, len(data), RECORD.size):
+                hour = int.from_bytes(data[offset:offset + 4], "little")
+                chunks.setdefault(hour // 3600, bytearray()).extend(
+                    data[offset:offset + RECORD.size])
+
+        with self._lock:
+            for hour, chunk in chunks.items():
+                with open(self._file(f"{hour}.{self.pid}.seg"), "ab") as f:
+                    f.write(chunk)
+
+    def _files(self):
+        """ Yields `(hour, pid)` of the segments, pid None for the
+        aggregates """
+        for name in os.listdir(self.path):
+            parts = name.split(".")
+            if parts[0].isdigit() and parts[1:] == ["agg"]:
+                yield int(parts[0]), None
+            elif (len(parts) == 3 and parts[0].isdigit() and
+                  parts[1].isdigit() and parts[2] == "seg"):
+                yield int(parts[0]), int(parts[1])
+
+    @staticmethod
+    def _fold_segment(path, totals):
+        with _mapped(path, RECORD) as view:
+            for _, command, guild, latency, outcome in \
+                    RECORD.iter_unpack(view):
+                _add(totals, (command, guild),
+                     (1, int(outcome != OK), latency, latency))
+
+    @staticmethod
+    def _fold_aggregate(path, totals):
+        with _mapped(path, AGGREGATE) as view:
+            for command, guild, uses, errors, total, peak in \
+                    AGGREGATE.iter_unpack(view):
+                _add(totals, (command, guild), (uses, errors, total, peak))
+
+    def _fold(self, hour, pid, totals):
+        """ Adds the totals of a segment, or of an hour's aggregate with
+        a pid of None """
+        try:
+            if pid is None:
+                self._fold_aggregate(self._file(f"{hour}.agg"), totals)
+            else:
+                self._fold_segment(self._file(f"{hour}.{pid}.seg"), totals)
+
+        except FileNotFoundError:
+            # Removed by a process that doesn't lock, see `_locked`
+            pass
+
+    @staticmethod
+    def _by_name(rows, names, totals):
+        for (command, guild), row in rows.items():
+            # A record can be written before its process saved the name
+            name = names[command] if command < len(names) else f"#{command}"
+            _add(totals, (name, guild), row)
+
+    def rollup(self, hour):
+        """ Compacts this process' segments of hours before `hour`, and
+        those of dead processes, into the totals of their hour """
+        with self._locked(exclusive=True):
+            segments = {}
+            for past, pid in self._files():
+                if pid is None:
+                    continue
+                if past < hour if pid == self.pid else not _alive(pid):
+                    segments.setdefault(past, []).append(pid)
+
+            names = self._names()
+            for past, pids in sorted(segments.items()):
+                self._rollup_hour(past, pids, names)
+
+            # Names of dead processes whose segments are all rolled up
+            left = {pid for _, pid in self._files()}
+            for pid in self._name_files():
+                if pid not in left and pid != self.pid and not _alive(pid):
+                    os.remove(self._file(f"commands.{pid}.json"))
+
+    def _rollup_hour(self, hour, pids, names):
+        """ Merges the segments of `pids` into the totals of `hour`,
+        numbering new commands in `names` """
+        by_name = {}
+        # Records rolled up before, or appended late, merge
+        totals = {}
+        self._fold(hour, None, totals)
+        self._by_name(totals, names, by_name)
+        for pid in pids:
+            totals = {}
+            self._fold(hour, pid, totals)
+            self._by_name(totals, self.names[:] if pid == self.pid else
+                          self._names(pid), by_name)
+
+        ids = {name: i for i, name in enumerate(names)}
+        records = []
+        for (name, guild), row in by_name.items():
+            if name not in ids:
+                ids[name] = len(names)
+                names.append(name)
+            records.append(AGGREGATE.pack(ids[name], guild, *row))
+
+        # The names first, the totals may use new ones
+        self._save_names(names)
+        aggregate = self._file(f"{hour}.agg")
+        with open(aggregate + ".tmp", "wb") as f:
+            f.write(b"".join(records))
+        os.replace(aggregate + ".tmp", aggregate)
+        for pid in pids:
+            os.remove(self._file(f"{hour}.{pid}.seg"))
+
+    def _name_files(self):
+        """ Yields the pids with a `commands.<pid>.json` """
+        for name in os.listdir(self.path):
+            parts = name.split(".")
+            if (len(parts) == 3 and parts[0] == "commands" and
+                    parts[1].isdigit()):
+                yield int(parts[1])
+
+    def scan(self, since):
+        """ Returns `{(command name, guild id): [uses, errors, total ms,
+        max ms]}` of the hours from `since` on """
+        # Totals by process first, command ids are per process
+        by_pid = {}
+        with self._locked(exclusive=False):
+            for hour, pid in self._files():
+                if hour >= since:
+                    self._fold(hour, pid, by_pid.setdefault(pid, {}))
+
+            totals = {}
+            for pid, rows in by_pid.items():
+                names = (self.names if pid == self.pid else
+                         self._names(pid))
+                self._by_name(rows, names, totals)
+        return totals
+
+    async def query(self, hours=24):
+        """ Flushes, then scans the last `hours` hours in an executor """
+        await self.flush()
+        since = int(time.time()) // 3600 - hours + 1
+        return await asyncio.get_event_loop().run_in_executor(
+            None, self.scan, since)
+
+    def close(self):
+        """ Stops the background task and writes what's buffered, once
+        every user of a shared instance closed it """
+        self.users -= 1
+        if self.users > 0:
+            return
+
+        if _instances.get(os.path.realpath(self.path)) is self:
+            del _instances[os.path.realpath(self.path)]
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+
+        data, self._buffer = self._buffer, bytearray()
+        self._append(data)
@@ -0,0 +1,262 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+import asyncio
+import time
+import zlib
+from array import array
+
+import discord
+
+
+__all__ = ["SlotTable", "AntiSpam", "ActionQueue", "ACTIONS"]
+
+
+class SlotTable:
+    """ Fixed-size rings of event times for many keys, in flat arrays.
+
+    Each key gets a slot: `size` 4 byte timestamps, a ring head, a last
+    seen time, a content hash and a repeat counter, 42 bytes with the
+    default size of 8. The key and its slot dict entry cost far more than
+    that, all in all a member takes about 370 bytes. Slots of keys idle
+    for a while are reused. Times are in ticks of a tenth of a second,
+    0 meaning no event.
+    """
+    __slots__ = ("size", "_slots", "_keys", "_free", "times", "heads",
+                 "seen", "hashes", "repeats")
+
+    def __init__(self, size=8, capacity=64):
+        self.size = size
+        self._slots = {}
+        self._keys = [None] * capacity
+        self._free = list(range(capacity - 1, -1, -1))
+        self.times = array("I", bytes(4 * size * capacity))
+        self.heads = array("B", bytes(capacity))
+        self.seen = array("I", bytes(4 * capacity))
+        self.hashes = array("I", bytes(4 * capacity))
+        self.repeats = array("B", bytes(capacity))
+
+    def __len__(self):
+        return len(self._slots)
+
+    @property
+    def capacity(self):
+        return len(self.heads)
+
+    def _grow(self):
+        capacity = len(self.heads)
+        self.times.extend(bytes(4 * self.size * capacity))
+        self.heads.extend(bytes(capacity))
+        self.seen.extend(bytes(4 * capacity))
+        self.hashes.extend(bytes(4 * capacity))
+        self.repeats.extend(bytes(capacity))
+        self._keys.extend([None] * capacity)
+        self._free.extend(range(2 * capacity - 1, capacity - 1, -1))
+
+    def slot(self, key, now):
+        """ Returns the slot of `key`, taking a free one for new keys """
+        slot = self._slots.get(key)
+        if slot is None:
+            if not self._free:
+                self._grow()
+            slot = self._slots[key] = self._free.pop()
+            self._keys[slot] = key
+        self.seen[slot] = now
+        return slot
+
+    def hit(self, slot, now, window):
+        """ Records an event, returns whether `size` events happened
+        within `window` ticks """
+        begin = slot * self.size
+        head = self.heads[slot]
+        self.times[begin + head] = now
+        head = self.heads[slot] = (head + 1) % self.size
+        # The ring now holds the last `size` events, the oldest at the head
+        oldest = self.times[begin + head]
+        return oldest != 0 and now - oldest < window
+
+    def repeat(self, slot, digest):
+        """ Records a content hash, returns how many times in a row it was
+        seen before """
+        if self.hashes[slot] == digest:
+            self.repeats[slot] = min(self.repeats[slot] + 1, 255)
+        else:
+            self.hashes[slot] = digest
+            self.repeats[slot] = 0
+        return self.repeats[slot]
+
+    def sweep(self, before, start=0, stop=None):
+        """ Frees the slots between `start` and `stop` of keys not seen
+        since `before`, returns where it stopped """
+        stop = self.capacity if stop is None else min(stop, self.capacity)
+        empty = array("I", bytes(4 * self.size))
+        for slot in range(start, stop):
+            key = self._keys[slot]
+            if key is not None and self.seen[slot] < before:
+                del self._slots[key]
+                self._keys[slot] = None
+                begin = slot * self.size
+                self.times[begin:begin + self.size] = empty
+                self.heads[slot] = 0
+                self.hashes[slot] = 0
+                self.repeats[slot] = 0
+                self._free.append(slot)
+        return stop
+
+
+class AntiSpam:
+    """ Detects message spam and join raids.
+
+    `messages`, `channel_messages` and `joins` are (count, seconds): that
+    many messages from one member, messages in one channel or joins to
+    one guild within the time are spam. `duplicates` is how many times a
+    member may send the same message in a row. Every check is O(1),
+    idle members are swept out `sweep_chunk` slots per check.
+    """
+    sweep_chunk = 256
+
+    def __init__(self, messages=(5, 5), channel_messages=(20, 5),  # noqa pylint: disable=too-many-arguments
+                 duplicates=3, joins=(10, 10), idle=600):
+        self.users = SlotTable(messages[0])
+        self.channels = SlotTable(channel_messages[0])
+        self.guilds = SlotTable(joins[0])
+        self.user_window = messages[1] * 10
+        self.channel_window = channel_messages[1] * 10
+        self.join_window = joins[1] * 10
+        self.duplicates = duplicates
+        self.idle = idle * 10
+        self._start = time.monotonic() - 0.1
+        self._swept = 0
+        self._sweeping = None
+
+    def _now(self):
+        now = int((time.monotonic() - self._start) * 10)
+        if self._sweeping is not None:
+            self._sweep(now)
+        elif now - self._swept > self.idle:
+            self._swept = now
+            self._sweeping = 0
+            self._sweep(now)
+        return now
+
+    def _sweep(self, now):
+        # A sweep pass visits `sweep_chunk` slots of every table per call,
+        # so no single message pays for a pass over all members
+        tables = (self.users, self.channels, self.guilds)
+        start = self._sweeping
+        stop = start + self.sweep_chunk
+        for table in tables:
+            table.sweep(now - self.idle, start, stop)
+        done = stop >= max(table.capacity for table in tables)
+        self._sweeping = None if done else stop
+
+    def message(self, message):
+        """ Returns why `message` is spam, or None """
+        now = self._now()
+        # One int key per member of a guild, cheaper than a tuple
+        slot = self.users.slot(message.guild.id << 64 | message.author.id,
+                               now)
+
+        if self.users.hit(slot, now, self.user_window):
+            return "sending messages too fast"
+
+        digest = zlib.crc32(message.content.encode())
+        if self.users.repeat(slot, digest) >= self.duplicates:
+            return "repeating messages"
+
+        channel = self.channels.slot(message.channel.id, now)
+        if self.channels.hit(channel, now, self.channel_window):
+            return "flooding the channel"
+
+        return None
+
+    def join(self, member):
+        """ Returns whether `member` joined during a join burst """
+        now = self._now()
+        slot = self.guilds.slot(member.guild.id, now)
+        return self.guilds.hit(slot, now, self.join_window)
+
+
+# Actions by strength, a member gets the strongest one queued
+ACTIONS = ("mute", "kick", "ban")
+
+
+class ActionQueue:
+    """ Punishes members in batches.
+
+    Actions are queued per member, keeping only the strongest, and run
+    every `interval` seconds with at most `concurrency` at a time.
+    Muting gives the guild's role named `muted_role`.
+    """
+    def __init__(self, interval=1.0, concurrency=5, muted_role="Muted"):
+        self.interval = interval
+        self.concurrency = concurrency
+        self.muted_role = muted_role
+        self._pending = {}
+        self._task = None
+
+    def add(self, member, action, reason):
+        key = (member.guild.id, member.id)
+        queued = self._pending.get(key)
+        if (queued is None or
+                ACTIONS.index(action) > ACTIONS.index(queued[1])):
+            self._pending[key] = (member, action, reason)
+
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        try:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+        finally:
+            self._task = None
+            if self._pending:
+                # Queued while flushing
+                self._task = asyncio.ensure_future(self._run())
+
+    async def flush(self):
+        """ Runs every queued action """
+        pending = list(self._pending.values())
+        self._pending = {}
+
+        for i in range(0, len(pending), self.concurrency):
+            await asyncio.gather(*(self._apply(*item) for item in
+                                   pending[i:i + self.concurrency]))
+
+    async def _apply(self, member, action, reason):
+        try:
+            if action == "ban":
+                await member.ban(reason=reason)
+            elif action == "kick":
+                await member.kick(reason=reason)
+            else:
+                role = discord.utils.get(member.guild.roles,
+                                         name=self.muted_role)
+                if role is not None:
+                    await member.add_roles(role, reason=reason)
+
+        except discord.HTTPException:
+            pass
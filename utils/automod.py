@@ -0,0 +1,169 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+import re
+import unicodedata
+
+from base.cache import LRUCache
+from base.triggers import trie_pattern
+
+
+__all__ = ["AutoMod", "GuildRules", "Violation", "normalize",
+           "trie_pattern"]
+
+
+# Invite links, matched on normalized text
+INVITE = (r"(?:discord(?:app)?\.com/invite|discord\.gg|discord\.me)"
+          r"/[a-z0-9-]+")
+
+# Characters used to dodge filters, mapped to what they stand for
+_CONFUSABLES = str.maketrans({
+    "0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t",
+    # Zero width characters are dropped
+    "\u200b": None, "\u200c": None, "\u200d": None, "\u2060": None,
+    "\ufeff": None, "\u00ad": None,
+})
+
+
+# Symbols standing for letters. They're matched in the terms' patterns
+# instead of folded, since they're also punctuation around words.
+_SYMBOLS = {"a": "@", "i": "!", "l": "|", "s": "$"}
+
+
+def normalize(text):
+    """ Folds case, compatibility characters (fullwidth letters, ligatures,
+    ...) and digits standing for letters, so variants of a term match it """
+    if not text.isascii():
+        text = unicodedata.normalize("NFKC", text)
+    return text.casefold().translate(_CONFUSABLES)
+
+
+# Compiled patterns by rule set, guilds with the same rules share one
+_compiled = LRUCache(256)
+
+
+def _compile(terms, invites):
+    key = (terms, invites)
+    pattern = _compiled.get(key)
+    if pattern is None:
+        parts = []
+        if invites:
+            parts.append(f"(?P<invite>{INVITE})")
+        if terms:
+            words = trie_pattern(terms, _SYMBOLS)
+            parts.append(rf"(?P<term>(?<!\w){words}(?!\w))")
+        pattern = re.compile("|".join(parts)) if parts else None
+        _compiled.set(key, pattern)
+    return pattern
+
+
+class Violation:
+    """ A broken rule: `rule` is "term", "invite" or "mentions" """
+    __slots__ = ("rule", "match")
+
+    def __init__(self, rule, match):
+        self.rule = rule
+        self.match = match
+
+    def __repr__(self):
+        return f"<Violation {self.rule} {self.match!r}>"
+
+
+class GuildRules:
+    """ The auto-moderation rules of a guild.
+
+    Banned terms and invite links are matched by a single regex, which
+    is rebuilt on the next message after the rules change.
+    """
+    def __init__(self, terms=(), invites=False, max_mentions=0):
+        self.terms = {normalize(t) for t in terms}
+        self.invites = invites
+        self.max_mentions = max_mentions
+        self._pattern = None
+        self._dirty = True
+
+    def add_terms(self, *terms):
+        self.terms.update(normalize(t) for t in terms)
+        self._dirty = True
+
+    def remove_terms(self, *terms):
+        self.terms.difference_update(normalize(t) for t in terms)
+        self._dirty = True
+
+    def set_invites(self, enabled):
+        self.invites = enabled
+        self._dirty = True
+
+    @property
+    def pattern(self):
+        if self._dirty:
+            self._pattern = _compile(frozenset(self.terms), self.invites)
+            self._dirty = False
+        return self._pattern
+
+    def to_dict(self):
+        return {"terms": sorted(self.terms), "invites": self.invites,
+                "max_mentions": self.max_mentions}
+
+    def check(self, message):
+        """ Returns the first rule `message` breaks, or None """
+        if self.max_mentions:
+            mentions = len(message.mentions) + len(message.role_mentions)
+            if mentions >= self.max_mentions:
+                return Violation("mentions", mentions)
+
+        pattern = self.pattern
+        if pattern is None:
+            return None
+
+        match = pattern.search(normalize(message.content))
+        if match is None:
+            return None
+
+        return Violation(match.lastgroup, match.group())
+
+
+class AutoMod:
+    """ Auto-moderation rules by guild id """
+    def __init__(self):
+        self.guilds = {}
+
+    def rules(self, guild_id):
+        """ Returns the rules of a guild, creating empty ones """
+        rules = self.guilds.get(guild_id)
+        if rules is None:
+            rules = self.guilds[guild_id] = GuildRules()
+        return rules
+
+    def load(self, guild_id, data):
+        """ Sets the rules of a guild from `GuildRules.to_dict` output """
+        self.guilds[guild_id] = GuildRules(**data)
+
+    def check(self, message):
+        """ Returns the rule `message` breaks, or None """
+        if message.guild is None or message.author.bot:
+            return None
+
+        rules = self.guilds.get(message.guild.id)
+        return rules.check(message) if rules is not None else None
@@ -0,0 +1,192 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+import asyncio
+import datetime
+import re
+import time
+
+import discord
+
+
+__all__ = ["parse_targets", "resolve_targets", "RouteLimiter",
+           "BulkWorker", "Progress"]
+
+
+_TARGET = re.compile(r"^(?:<@!?(\d+)>|(\d{15,20})|joined:(\d+))$")
+
+
+def parse_targets(text):
+    """ Splits `text` into target ids, the minutes of a `joined:N` filter
+    (or None) and the rest, used as reason """
+    ids = set()
+    minutes = None
+    rest = []
+
+    for token in text.split():
+        match = _TARGET.match(token)
+        if match is None:
+            rest.append(token)
+        elif match.group(3) is not None:
+            minutes = int(match.group(3))
+        else:
+            ids.add(int(match.group(1) or match.group(2)))
+
+    return ids, minutes, " ".join(rest)
+
+
+def resolve_targets(guild, ids, minutes=None, now=None, missing=True):
+    """ Returns the members with one of `ids` or that joined within
+    `minutes` before `now`, in a single pass over the guild's members.
+    With `missing`, ids of users not in the guild are returned as
+    `discord.Object`, they can still be banned.
+    """
+    cutoff = None
+    if minutes is not None:
+        cutoff = now - datetime.timedelta(minutes=minutes)
+
+    targets = []
+    found = set()
+    for member in guild.members:
+        if member.id in ids or (cutoff is not None and
+                                member.joined_at is not None and
+                                member.joined_at >= cutoff):
+            targets.append(member)
+            found.add(member.id)
+
+    if missing:
+        targets.extend(discord.Object(id=i) for i in ids - found)
+    return targets
+
+
+class RouteLimiter:
+    """ Token bucket per REST route, `rates` maps routes to (requests,
+    seconds). Routes not in it are not limited. """
+    def __init__(self, rates):
+        self.rates = rates
+        self._buckets = {}
+
+    async def acquire(self, route):
+        rate = self.rates.get(route)
+        if rate is None:
+            return
+
+        count, per = rate
+        while True:
+            now = time.monotonic()
+            tokens, last = self._buckets.get(route, (count, now))
+            tokens = min(count, tokens + (now - last) * count / per)
+            if tokens >= 1:
+                self._buckets[route] = (tokens - 1, now)
+                return
+
+            self._buckets[route] = (tokens, now)
+            await asyncio.sleep((1 - tokens) * per / count)
+
+
+# Conservative guesses of Discord's limits, 429s are retried anyway
+DEFAULT_RATES = {"ban": (5, 5), "kick": (5, 5), "delete": (5, 5)}
+
+
+class BulkWorker:
+    """ Runs a REST action for many targets with at most `concurrency`
+    in flight, limited per route, retrying once on 429 """
+    def __init__(self, concurrency=5, rates=None):
+        self.concurrency = concurrency
+        self.limiter = RouteLimiter(rates or DEFAULT_RATES)
+
+    async def run(self, targets, action, route, progress=None):
+        """ Calls `action(target)` for all targets, returns the number of
+        successes and failures. `progress(done, failed)` is called after
+        each target. """
+        targets = iter(targets)
+        counts = [0, 0]
+
+        async def work():
+            for target in targets:
+                ok = await self._attempt(target, action, route)
+                counts[0 if ok else 1] += 1
+                if progress is not None:
+                    progress(*counts)
+
+        await asyncio.gather(*(work() for _ in range(self.concurrency)))
+        return tuple(counts)
+
+    async def _attempt(self, target, action, route):
+        for retry in (True, False):
+            await self.limiter.acquire(route)
+            try:
+                await action(target)
+                return True
+
+            except discord.HTTPException as e:
+                if e.status != 429 or not retry:
+                    return False
+                await asyncio.sleep(getattr(e, "retry_after", 1))
+
+        return False
+
+
+class Progress:
+    """ A message edited to show the progress of a bulk action, at most
+    every `interval` seconds """
+    def __init__(self, ctx, label, total, interval=2.0):
+        self.ctx = ctx
+        self.label = label
+        self.total = total
+        self.interval = interval
+        self.message = None
+        self._last = 0
+        self._editing = None
+
+    def _text(self, done, failed):
+        text = f"{self.label}: {done}/{self.total}"
+        return f"{text} ({failed} failed)" if failed else text
+
+    async def start(self):
+        self.message = await self.ctx.send(self._text(0, 0))
+        self._last = time.monotonic()
+
+    def update(self, done, failed):
+        now = time.monotonic()
+        if now - self._last < self.interval or self._editing is not None:
+            return
+
+        self._last = now
+        self._editing = asyncio.ensure_future(self._edit(done, failed))
+
+    async def _edit(self, done, failed):
+        try:
+            await self.message.edit(content=self._text(done, failed))
+
+        except discord.HTTPException:
+            pass
+
+        finally:
+            self._editing = None
+
+    async def finish(self, done, failed):
+        if self._editing is not None:
+            await self._editing
+        await self.message.edit(content=self._text(done, failed) + " - done")
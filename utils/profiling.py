@@ -0,0 +1,150 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+
+import asyncio
+import cProfile
+import os
+import pstats
+import time
+import tracemalloc
+
+
+__all__ = ["format_table", "stats_table", "snapshot_table",
+           "CommandProfiler"]
+
+
+def format_table(headers, rows):
+    """ Formats rows as a compact, left aligned plain text table """
+    rows = [[str(c) for c in row] for row in rows]
+    widths = [max(len(str(h)), *(len(r[i]) for r in rows))
+              for i, h in enumerate(headers)]
+
+    def line(cells):
+        return "  ".join(c.ljust(w) for c, w in zip(cells, widths)).rstrip()
+
+    return "\n".join([line(headers), line("-" * w for w in widths)] +
+                     [line(row) for row in rows])
+
+
+def _location(filename, lineno, name):
+    if filename == "~":
+        # Builtins
+        return name
+    return f"{os.path.basename(filename)}:{lineno}({name})"
+
+
+def stats_table(profile, limit=20, sort="cumulative"):
+    """ Top `limit` functions of a cProfile.Profile sorted by `sort` """
+    stats = pstats.Stats(profile)
+    key = {"cumulative": 3, "tottime": 2, "calls": 1}[sort]
+    entries = sorted(stats.stats.items(), key=lambda i: i[1][key],
+                     reverse=True)
+
+    rows = []
+    for func, (cc, nc, tt, ct, _) in entries:
+        if "_lsprof.Profiler" in func[2]:
+            continue
+
+        rows.append((str(nc) if cc == nc else f"{nc}/{cc}",
+                     f"{tt:.4f}", f"{ct:.4f}", _location(*func)))
+        if len(rows) == limit:
+            break
+
+    summary = (f"{stats.total_calls} calls in {stats.total_tt:.4f}s, "
+               f"sorted by {sort}\n")
+    return summary + format_table(("calls", "tottime", "cumtime", "function"),
+                                  rows)
+
+
+def _size(n):
+    for unit in ("B", "KiB", "MiB"):
+        if abs(n) < 1024:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GiB"
+
+
+def snapshot_table(old, new, limit=15):
+    """ Top `limit` allocation differences between two tracemalloc
+    snapshots, grouped by line """
+    ignore = (tracemalloc.Filter(False, tracemalloc.__file__),
+              tracemalloc.Filter(False, "<frozen importlib._bootstrap>"))
+    old = old.filter_traces(ignore)
+    new = new.filter_traces(ignore)
+    diff = new.compare_to(old, "lineno")
+
+    rows = [(_size(d.size_diff), f"{d.count_diff:+}", _size(d.size),
+             f"{os.path.basename(d.traceback[0].filename)}:"
+             f"{d.traceback[0].lineno}")
+            for d in diff[:limit]]
+
+    total = sum(s.size for s in new.statistics("filename"))
+    growth = sum(d.size_diff for d in diff)
+    summary = f"Traced {_size(total)}, {_size(growth)} since last snapshot\n"
+    return summary + format_table(("diff", "blocks", "size", "line"), rows)
+
+
+class CommandProfiler:
+    """ Profiles the next `count` invocations of a command.
+
+    The command's `invoke` is shadowed by a profiling wrapper on the
+    instance until the invocations are done, so commands that aren't
+    profiled pay nothing. Concurrent invocations of other commands
+    while one is being profiled end up in the profile too.
+    """
+    def __init__(self, command, count):
+        self.command = command
+        self.remaining = count
+        self.invocations = 0
+        self.elapsed = 0
+        self.profile = cProfile.Profile()
+        self.done = asyncio.get_event_loop().create_future()
+
+    @staticmethod
+    def is_profiling(command):
+        return "invoke" in vars(command)
+
+    def install(self):
+        original = self.command.invoke
+
+        async def invoke(context):
+            start = time.perf_counter()
+            self.profile.enable()
+            try:
+                return await original(context)
+            finally:
+                self.profile.disable()
+                self.elapsed += time.perf_counter() - start
+                self.invocations += 1
+                self.remaining -= 1
+                if self.remaining <= 0:
+                    self.uninstall()
+
+        self.command.invoke = invoke
+
+    def uninstall(self):
+        vars(self.command).pop("invoke", None)
+        if not self.done.done():
+            self.done.set_result(self)
@@ -0,0 +1,150 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+
+import io
+import sys
+import time
+import types
+from collections import OrderedDict
+
+
+__all__ = ["Session", "SessionManager", "deep_sizeof"]
+
+
+# Shared objects that aren't owned by whatever session references them
+_SHARED = (types.ModuleType, type, types.FunctionType,
+           types.BuiltinFunctionType, types.MethodType)
+
+
+def deep_sizeof(obj, seen=None, limit=100000):
+    """ Approximate size of `obj` and everything it references, in bytes.
+    Stops after `limit` objects so huge structures stay cheap to measure.
+    Objects in `seen` are skipped, and visited objects are added to it.
+    """
+    seen = set() if seen is None else seen
+    stack = [obj]
+    size = 0
+
+    while stack and limit > 0:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, _SHARED):
+            continue
+
+        seen.add(id(obj))
+        limit -= 1
+        size += sys.getsizeof(obj, 0)
+
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif hasattr(obj, "__dict__"):
+            stack.append(vars(obj))
+
+    return size
+
+
+class Session:
+    """ REPL state of one user: their environment, line counter,
+    captured stdout and last result """
+    def __init__(self, owner):
+        self.owner = owner
+        self.ln = 0
+        self.env = {}
+        self._ = None
+        self.stdout = io.StringIO()
+        self.last_used = time.monotonic()
+
+    def reset(self):
+        self.ln = 0
+        self.env = {}
+        self._ = None
+        self.stdout = io.StringIO()
+
+    def bindings(self, skip=()):
+        """ Sizes of the session's own bindings, largest first.
+        Names in `skip` are ignored, as are dunders. """
+        seen = set()
+        sizes = [(name, deep_sizeof(value, seen))
+                 for name, value in self.env.items()
+                 if name not in skip and not name.startswith("__")]
+        return sorted(sizes, key=lambda i: i[1], reverse=True)
+
+    def trim(self, budget, skip=()):
+        """ Drops the largest bindings until the session fits in `budget`
+        bytes. Returns the names that were dropped. """
+        sizes = self.bindings(skip)
+        total = sum(size for _, size in sizes)
+        dropped = []
+
+        for name, size in sizes:
+            if total <= budget:
+                break
+
+            del self.env[name]
+            if name == "_":
+                self._ = None
+            dropped.append(name)
+            total -= size
+
+        return dropped
+
+
+class SessionManager:
+    """ Keeps at most `max_sessions` sessions, evicting the least recently
+    used one and any that were idle for `idle_timeout` seconds """
+    def __init__(self, max_sessions=8, idle_timeout=30 * 60):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._sessions = OrderedDict()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def sweep(self):
+        """ Drops idle sessions, oldest first """
+        deadline = time.monotonic() - self.idle_timeout
+        while self._sessions:
+            owner, session = next(iter(self._sessions.items()))
+            if session.last_used > deadline:
+                break
+            del self._sessions[owner]
+
+    def get(self, owner):
+        """ Returns the session of `owner`, creating it if needed """
+        self.sweep()
+
+        session = self._sessions.pop(owner, None) or Session(owner)
+        session.last_used = time.monotonic()
+        self._sessions[owner] = session
+
+        if len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+        return session
+
+    def drop(self, owner):
+        self._sessions.pop(owner, None)
@@ -0,0 +1,292 @@
+"""
+Copyright (C) 2017 ClaraIO
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in
+the Software without restriction, including without limitation the rights to
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+Written by ClaraIO <chinodesuuu@gmail.com>, August 2017
+"""
+
+
+import ast
+import asyncio
+import contextlib
+import inspect
+import io
+import multiprocessing
+import reprlib
+import signal
+import traceback
+
+try:
+    import resource
+except ImportError:  # Not on POSIX, run without rlimits
+    resource = None
+
+
+__all__ = ["SandboxPool", "BotProxy", "CPUTimeExceeded"]
+
+
+_repr = reprlib.Repr()
+_repr.maxstring = _repr.maxother = 1500
+_repr.maxlist = _repr.maxtuple = _repr.maxdict = _repr.maxset = 100
+
+
+class CPUTimeExceeded(Exception):
+    """ Raised inside a sandbox worker when a job used up its CPU time """
+
+
+class BotProxy:
+    """ What a sandboxed snippet sees as `bot`.
+
+    Attributes are a snapshot of the state curated by the cog. Live data
+    can be requested with `bot.query(name, *args)`, which asks the bot
+    process to run one of the queries it allows.
+    """
+    def __init__(self, conn, state):
+        self._conn = conn
+        self.__dict__.update(state)
+
+    def __repr__(self):
+        public = [k for k in self.__dict__ if not k.startswith("_")]
+        return f"<BotProxy {', '.join(public)}>"
+
+    def query(self, name, *args):
+        self._conn.send(("query", name, args))
+        kind, value = self._conn.recv()
+
+        if kind == "error":
+            raise RuntimeError(value)
+
+        return value
+
+
+class _Stream(io.TextIOBase):
+    """ Line buffered stdout sending its output to the bot process """
+    def __init__(self, conn):
+        super().__init__()
+        self.conn = conn
+        self.buffer = ""
+
+    def writable(self):
+        return True
+
+    def write(self, text):  # pylint: disable=arguments-renamed
+        self.buffer += text
+        if "\n" in text or len(self.buffer) > 1024:
+            self.flush()
+        return len(text)
+
+    def flush(self):
+        if self.buffer:
+            self.conn.send(("stdout", self.buffer))
+            self.buffer = ""
+
+
+def _cpu_used():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _cpu_limit(seconds):
+    """ Lets the worker use `seconds` more CPU time, or any without """
+    if resource is None:
+        return
+
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = hard if seconds is None else int(_cpu_used() + seconds) + 1
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _on_sigxcpu(signum, frame):  # pylint: disable=unused-argument
+    raise CPUTimeExceeded("CPU time limit exceeded")
+
+
+def _run(conn, code, state, cpu_seconds):
+    """ Runs one job, returns the message to send back """
+    stream = _Stream(conn)
+    env = {"__name__": "__sandbox__", "bot": BotProxy(conn, state)}
+
+    _cpu_limit(cpu_seconds)
+    try:
+        with contextlib.redirect_stdout(stream):
+            compiled = compile(code, "<sandbox>", "exec",
+                               flags=ast.PyCF_ALLOW_TOP_LEVEL_AWAIT)
+            ret = eval(compiled, env)  # pylint: disable=eval-used
+            if inspect.iscoroutine(ret):
+                asyncio.run(ret)
+
+        result = env.get("_")
+        return ("result", None if result is None else _repr.repr(result))
+
+    except (Exception, SystemExit):  # noqa pylint: disable=broad-except
+        return ("error", traceback.format_exc())
+
+    finally:
+        _cpu_limit(None)
+        stream.flush()
+
+
+def _worker_main(conn, memory, cpu_seconds):
+    """ Entry point of the worker processes """
+    if resource is not None:
+        signal.signal(signal.SIGXCPU, _on_sigxcpu)
+        if memory:
+            resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+
+    while True:
+        try:
+            code, state = conn.recv()
+
+        except (EOFError, KeyboardInterrupt):
+            return
+
+        conn.send(_run(conn, code, state, cpu_seconds))
+
+
+class _Worker:
+    def __init__(self, ctx, memory, cpu_seconds):
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main,
+                                   args=(child, memory, cpu_seconds),
+                                   daemon=True)
+        self.process.start()
+        child.close()
+
+    def kill(self):
+        self.conn.close()
+        self.process.kill()
+        self.process.join()
+
+
+class SandboxPool:
+    """ Pool of worker processes running code with CPU time, memory and
+    wall-clock limits, so runaway snippets can't hurt the bot itself.
+
+    `memory` is the address space limit of a worker in bytes. Workers
+    are started on first use and replaced after they are killed.
+    """
+    def __init__(self, size=2, timeout=10, cpu_seconds=5,
+                 memory=256 * 1024 * 1024):
+        self.size = size
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds
+        self.memory = memory
+        self._ctx = multiprocessing.get_context("spawn")
+        self._workers = []
+        self._idle = []
+        self._released = asyncio.Condition()
+
+    async def _acquire(self):
+        async with self._released:
+            while not self._idle and len(self._workers) >= self.size:
+                await self._released.wait()
+
+            if self._idle:
+                return self._idle.pop()
+
+            worker = _Worker(self._ctx, self.memory, self.cpu_seconds)
+            self._workers.append(worker)
+            return worker
+
+    async def _release(self, worker, alive):
+        async with self._released:
+            if alive:
+                self._idle.append(worker)
+            else:
+                self._workers.remove(worker)
+                worker.kill()
+            self._released.notify()
+
+    @staticmethod
+    async def _recv(conn):
+        loop = asyncio.get_event_loop()
+        while not conn.poll():
+            readable = loop.create_future()
+            loop.add_reader(conn.fileno(), lambda: readable.done() or
+                            readable.set_result(None))
+            try:
+                await readable
+            finally:
+                loop.remove_reader(conn.fileno())
+
+        return conn.recv()
+
+    async def _communicate(self, conn, job, queries, on_output):
+        conn.send(job)
+
+        while True:
+            kind, *payload = await self._recv(conn)
+
+            if kind == "stdout":
+                if on_output is not None:
+                    ret = on_output(payload[0])
+                    if inspect.isawaitable(ret):
+                        await ret
+
+            elif kind == "query":
+                name, args = payload
+                if name not in queries:
+                    conn.send(("error", f"Unknown query {name!r}"))
+                    continue
+
+                try:
+                    conn.send(("reply", queries[name](*args)))
+                except Exception as e:  # noqa pylint: disable=broad-except
+                    conn.send(("error", f"{name}: {e!r}"))
+
+            else:
+                return kind, payload[0]
+
+    async def run(self, code, state=None, queries=None, on_output=None):
+        """ Runs `code` in a worker.
+
+        `state` is a dict of attributes of the `bot` proxy the code sees,
+        `queries` maps names to functions it may call through
+        `bot.query`. `on_output` is called with each chunk of stdout.
+
+        Returns ("result", repr of `_` or None) or ("error", traceback).
+        """
+        worker = await self._acquire()
+        alive = False
+
+        try:
+            result = await asyncio.wait_for(
+                self._communicate(worker.conn, (code, state or {}),
+                                  queries or {}, on_output),
+                self.timeout)
+            alive = True
+            return result
+
+        except asyncio.TimeoutError:
+            return ("error", f"Timed out after {self.timeout} seconds")
+
+        except (EOFError, OSError):
+            return ("error", "The worker died, exit code "
+                             f"{worker.process.exitcode}")
+
+        finally:
+            await self._release(worker, alive)
+
+    def close(self):
+        """ Kills all the workers """
+        for worker in self._workers:
+            worker.kill()
+
+        self._workers = []
+        self._idle = []